@@ -0,0 +1,209 @@
+"""
+Đo chi phí dựng nội dung email thông báo lương cho mỗi 1000 nhân viên:
+f-string cũ (dựng lại cả CSS cho từng người, không escape) so với khung dựng
+sẵn từ template Jinja2 (src.utils.email_templates), có và không có phần văn
+bản thuần.
+
+    python -m benchmarks.payslip_render_bench --employees 10000
+"""
+import argparse
+import random
+from datetime import date
+from decimal import Decimal
+from time import perf_counter
+from types import SimpleNamespace
+
+from src.utils.email_templates import SalaryEmailRenderer, format_vnd
+
+HO = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Vũ", "Võ", "Đặng", "Bùi"]
+TEN = ["An", "Bình", "Châu", "Duyên", "Giang", "Hà", "Khánh", "Linh", "Mai", "Nam"]
+PHONG_BAN = ["Nhân sự", "Kế toán", "Công nghệ thông tin", "Marketing", "Kinh doanh"]
+CHUC_VU = ["Nhân viên", "Quản lý", "Chuyên viên", "Giám đốc", "Trợ lý"]
+
+
+def build_rows(size: int, seed: int = 2025):
+    rng = random.Random(seed)
+    rows = []
+    for emp_id in range(1, size + 1):
+        base = Decimal(rng.randrange(8_000_000, 40_000_000, 100_000))
+        bonus = Decimal(rng.randrange(0, 5_000_000, 100_000))
+        deductions = Decimal(rng.randrange(0, 3_000_000, 100_000))
+        rows.append(
+            (
+                SimpleNamespace(EmployeeID=emp_id, FullName=f"{rng.choice(HO)} {rng.choice(TEN)}"),
+                rng.choice(PHONG_BAN),
+                rng.choice(CHUC_VU),
+                SimpleNamespace(
+                    BaseSalary=base, Bonus=bonus, Deductions=deductions,
+                    NetSalary=base + bonus - deductions,
+                ),
+            )
+        )
+    return rows
+
+
+def legacy_html(month, employee, department_name, position_name, salary):
+    # Cách cũ: f-string dựng toàn bộ HTML (kể cả CSS) cho từng nhân viên
+    return f"""
+    <html>
+    <head>
+        <style>
+            body {{
+                font-family: Arial, sans-serif;
+                line-height: 1.6;
+            }}
+            .container {{
+                width: 100%;
+                max-width: 600px;
+                margin: 0 auto;
+                padding: 20px;
+                border: 1px solid #ddd;
+                border-radius: 5px;
+            }}
+            .header {{
+                background-color: #4CAF50;
+                color: white;
+                padding: 10px;
+                text-align: center;
+                border-radius: 5px 5px 0 0;
+            }}
+            .content {{
+                padding: 20px;
+            }}
+            table {{
+                width: 100%;
+                border-collapse: collapse;
+                margin-bottom: 20px;
+            }}
+            table, th, td {{
+                border: 1px solid #ddd;
+            }}
+            th, td {{
+                padding: 10px;
+                text-align: left;
+            }}
+            th {{
+                background-color: #f2f2f2;
+            }}
+            .footer {{
+                background-color: #f2f2f2;
+                padding: 10px;
+                text-align: center;
+                border-radius: 0 0 5px 5px;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h2>Thông báo lương tháng {month.month}/{month.year}</h2>
+            </div>
+            <div class="content">
+                <p>Kính gửi <b>{employee.FullName}</b>,</p>
+
+                <p>Công ty trân trọng thông báo lương tháng {month.month}/{month.year} của bạn như sau:</p>
+
+                <table>
+                    <tr>
+                        <th>Thông tin</th>
+                        <th>Chi tiết</th>
+                    </tr>
+                    <tr>
+                        <td>Mã nhân viên</td>
+                        <td>{employee.EmployeeID}</td>
+                    </tr>
+                    <tr>
+                        <td>Họ và tên</td>
+                        <td>{employee.FullName}</td>
+                    </tr>
+                    <tr>
+                        <td>Phòng ban</td>
+                        <td>{department_name}</td>
+                    </tr>
+                    <tr>
+                        <td>Chức vụ</td>
+                        <td>{position_name}</td>
+                    </tr>
+                </table>
+
+                <table>
+                    <tr>
+                        <th>Mục lương</th>
+                        <th>Giá trị (VNĐ)</th>
+                    </tr>
+                    <tr>
+                        <td>Lương cơ bản</td>
+                        <td>{format_vnd(salary.BaseSalary, ' VNĐ')}</td>
+                    </tr>
+                    <tr>
+                        <td>Thưởng</td>
+                        <td>{format_vnd(salary.Bonus, ' VNĐ')}</td>
+                    </tr>
+                    <tr>
+                        <td>Khấu trừ</td>
+                        <td>{format_vnd(salary.Deductions, ' VNĐ')}</td>
+                    </tr>
+                    <tr>
+                        <td><b>Lương thực lãnh</b></td>
+                        <td><b>{format_vnd(salary.NetSalary, ' VNĐ')}</b></td>
+                    </tr>
+                </table>
+
+                <p>Lương sẽ được chuyển vào tài khoản của bạn. Nếu có bất kỳ thắc mắc nào về bảng lương, vui lòng liên hệ với phòng kế toán.</p>
+
+                <p>Trân trọng,<br>
+                Phòng Kế Toán</p>
+            </div>
+            <div class="footer">
+                <p>Đây là email tự động, vui lòng không trả lời email này.</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+
+def run(label: str, render, rows) -> None:
+    start = perf_counter()
+    size = 0
+    for row in rows:
+        size += len(render(row))
+    elapsed = perf_counter() - start
+    print(
+        f"{label:<40} {elapsed * 1000 / len(rows) * 1000:8.1f} ms/1000 nhân viên"
+        f"  ({size / len(rows) / 1024:.1f} KB/email)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=10_000)
+    args = parser.parse_args()
+
+    month = date(2025, 5, 1)
+    rows = build_rows(args.employees)
+
+    run("f-string cũ", lambda row: legacy_html(month, *row), rows)
+
+    start = perf_counter()
+    html_only = SalaryEmailRenderer(month, plain_text=False)
+    with_text = SalaryEmailRenderer(month, plain_text=True)
+    print(f"Dựng phần dùng chung cho lượt gửi: {(perf_counter() - start) * 1000:.2f} ms")
+
+    def render_html(row):
+        employee, department_name, position_name, salary = row
+        return html_only.render(employee.EmployeeID, employee.FullName, department_name, position_name, salary)[0]
+
+    def render_both(row):
+        employee, department_name, position_name, salary = row
+        body_html, body_text = with_text.render(
+            employee.EmployeeID, employee.FullName, department_name, position_name, salary
+        )
+        return body_html + body_text
+
+    run("Khung dựng sẵn (HTML)", render_html, rows)
+    run("Khung dựng sẵn (HTML + văn bản thuần)", render_both, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Đo thời gian dựng response cho các trang lớn của bảng lương (dict chứa Decimal,
+date như get_payroll trả về) và chấm công (đối tượng ORM như
+get_attendance_records trả về): cách cũ jsonable_encoder + JSONResponse so với
+OrjsonResponse (src._utils.response).
+
+    python -m benchmarks.response_encoding_bench --rows 1000 --repeat 50
+"""
+import argparse
+import random
+from datetime import date, datetime
+from decimal import Decimal
+from time import perf_counter
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src._utils import response
+from src.schemas.payroll import Attendance as PrAttendance
+
+HO = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Vũ", "Võ", "Đặng", "Bùi"]
+TEN = ["An", "Bình", "Châu", "Duyên", "Giang", "Hà", "Khánh", "Linh", "Mai", "Nam"]
+
+
+def payroll_page(size: int, seed: int = 2025):
+    rng = random.Random(seed)
+    rows = []
+    for salary_id in range(1, size + 1):
+        base = Decimal(rng.randrange(8_000_000, 40_000_000, 100_000)).quantize(Decimal("0.01"))
+        bonus = Decimal(rng.randrange(0, 5_000_000, 100_000)).quantize(Decimal("0.01"))
+        deductions = Decimal(rng.randrange(0, 3_000_000, 100_000)).quantize(Decimal("0.01"))
+        rows.append(
+            {
+                "EmployeeID": rng.randint(1, 5000),
+                "SalaryID": salary_id,
+                "FullName": f"{rng.choice(HO)} {rng.choice(TEN)}",
+                "SalaryMonth": date(2025, rng.randint(1, 12), 1),
+                "BaseSalary": base,
+                "Bonus": bonus,
+                "Deductions": deductions,
+                "NetSalary": base + bonus - deductions,
+                "Status": "Đang làm việc",
+            }
+        )
+    return rows
+
+
+def attendance_page(size: int, seed: int = 2025):
+    rng = random.Random(seed)
+    return [
+        PrAttendance(
+            AttendanceID=attendance_id,
+            EmployeeID=rng.randint(1, 5000),
+            WorkDays=rng.randint(18, 23),
+            AbsentDays=rng.randint(0, 3),
+            LeaveDays=rng.randint(0, 2),
+            AttendanceMonth=date(2025, rng.randint(1, 12), 1),
+            CreatedAt=datetime(2025, 6, 1, 8, 30),
+        )
+        for attendance_id in range(1, size + 1)
+    ]
+
+
+def legacy_response(data, metadata):
+    return JSONResponse(
+        jsonable_encoder(
+            {"status": "success", "message": "", "data": data, "metadata": metadata}
+        )
+    )
+
+
+def run(label: str, build, data, metadata, repeat: int) -> bytes:
+    start = perf_counter()
+    for _ in range(repeat):
+        body = build(data, metadata).body
+    elapsed = (perf_counter() - start) / repeat
+    print(f"{label:<32} {elapsed * 1000:8.2f} ms/trang  ({len(body) / 1024:.0f} KB)")
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    metadata = {"page": 1, "per_page": args.rows, "next_cursor": "eyJrIjpbMV19"}
+    for name, data in (
+        ("payroll", payroll_page(args.rows)),
+        ("attendance (ORM)", attendance_page(args.rows)),
+    ):
+        print(f"Trang {name}, {args.rows} dòng:")
+        old = run("  jsonable_encoder + JSONResponse", legacy_response, data, metadata, args.repeat)
+        new = run("  OrjsonResponse", lambda d, m: response(data=d, metadata=m), data, metadata, args.repeat)
+        print(f"  Kết quả giống nhau: {old == new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Đo tốc độ tra cứu của chỉ mục tìm kiếm nhân viên với dữ liệu giả lập.
+
+    python -m benchmarks.search_index_bench --employees 100000
+"""
+import argparse
+import random
+from time import perf_counter
+
+from src.utils.search_index import EmployeeSearchIndex
+
+HO = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ", "Hồ", "Ngô", "Dương", "Lý"]
+DEM = ["Văn", "Thị", "Minh", "Quang", "Thanh", "Ngọc", "Hữu", "Đức", "Thu", "Hoài"]
+TEN = ["An", "Bình", "Châu", "Duyên", "Em", "Giang", "Hà", "Khánh", "Linh", "Mai", "Nam", "Phương", "Quân", "Sơn", "Tâm", "Uyên", "Việt", "Xuân", "Yến", "Đạt"]
+PHONG_BAN = ["Nhân sự", "Kế toán", "Công nghệ thông tin", "Marketing", "Kinh doanh"]
+CHUC_VU = ["Nhân viên", "Quản lý", "Chuyên viên", "Giám đốc", "Trợ lý"]
+
+
+def build_index(size: int, seed: int = 2025) -> EmployeeSearchIndex:
+    rng = random.Random(seed)
+    employees = [
+        (emp_id, f"{rng.choice(HO)} {rng.choice(DEM)} {rng.choice(TEN)}", rng.randint(1, 5), rng.randint(1, 5))
+        for emp_id in range(1, size + 1)
+    ]
+    index = EmployeeSearchIndex()
+    index.load(enumerate(PHONG_BAN, start=1), enumerate(CHUC_VU, start=1), employees)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    start = perf_counter()
+    index = build_index(args.employees)
+    print(f"Dựng chỉ mục {args.employees} nhân viên: {perf_counter() - start:.2f} giây")
+
+    for query in ["12345", "dat", "Khánh", "nguyen van dat", "hoai yen", "ng", "ke toan", "xyz"]:
+        start = perf_counter()
+        for _ in range(args.repeat):
+            ids, total = index.search(query, limit=10)
+        elapsed = (perf_counter() - start) / args.repeat * 1000
+        print(f"{query!r:20} tổng={total:>7}  {elapsed:8.3f} ms/truy vấn")
+
+    print("Gợi ý khi gõ (/employees/suggest):")
+    for query in ["1", "123", "n", "ngu", "nguyen van", "khanh", "yen", "xyz"]:
+        start = perf_counter()
+        for _ in range(args.repeat):
+            docs = index.suggest(query, limit=10)
+        elapsed = (perf_counter() - start) / args.repeat * 1000
+        print(f"{query!r:20} số gợi ý={len(docs):>3}  {elapsed:8.3f} ms/truy vấn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+So sánh gửi email mở kết nối SMTP mới cho mỗi email với pool kết nối
+(src.utils.smtp_pool) trên máy chủ SMTP giả lập cục bộ (cần aiosmtpd).
+
+    pip install aiosmtpd
+    python -m benchmarks.smtp_pool_bench --messages 2000 --handshake-ms 20
+
+--handshake-ms giả lập độ trễ mạng + TLS + đăng nhập mỗi lần mở kết nối,
+máy chủ thật thường mất vài chục tới vài trăm ms cho bước này.
+"""
+import argparse
+import asyncio
+import smtplib
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from time import perf_counter
+
+from aiosmtpd.controller import Controller
+
+from src.utils.smtp_pool import SMTPConnectionPool
+
+
+class CountingHandler:
+    def __init__(self, handshake_ms: float):
+        self.handshake_ms = handshake_ms
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        await asyncio.sleep(self.handshake_ms / 1000)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def build_message(i: int) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg["From"] = "noreply@company.com"
+    msg["To"] = f"nv{i}@company.com"
+    msg["Subject"] = f"Thông báo lương tháng 5/2025 - {i}"
+    msg.attach(MIMEText(f"<p>Kính gửi nhân viên {i}, lương thực lãnh: 15.000.000 VNĐ</p>" * 20, "html"))
+    return msg
+
+
+def send_with_new_connection(host: str, port: int, msg) -> None:
+    # Cách cũ: mỗi email một kết nối
+    server = smtplib.SMTP(host, port)
+    server.send_message(msg)
+    server.quit()
+
+
+def run(label: str, send, messages: int, workers: int) -> None:
+    batch = [build_message(i) for i in range(messages)]
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(send, batch))
+    elapsed = perf_counter() - start
+    print(f"{label:<28} {messages} email trong {elapsed:6.2f} giây: {messages / elapsed:8.1f} email/giây")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--handshake-ms", type=float, default=20)
+    parser.add_argument("--max-messages", type=int, default=100, help="Số email tối đa mỗi kết nối của pool")
+    args = parser.parse_args()
+
+    handler = CountingHandler(args.handshake_ms)
+    host, port = "127.0.0.1", free_port()
+    controller = Controller(handler, hostname=host, port=port)
+    controller.start()
+    try:
+        run(
+            "Mỗi email một kết nối",
+            lambda msg: send_with_new_connection(host, port, msg),
+            args.messages,
+            args.workers,
+        )
+
+        pool = SMTPConnectionPool(
+            host, port, size=args.workers, max_messages=args.max_messages, starttls=False
+        )
+        run("Pool kết nối", pool.send, args.messages, args.workers)
+        pool.close_all()
+        print(f"Thống kê pool: {pool.stats()}")
+        print(f"Máy chủ đã nhận: {handler.received} email")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
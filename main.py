@@ -8,6 +8,8 @@ from fastapi import (
     BackgroundTasks,
 )
 from fastapi.responses import RedirectResponse
+from contextlib import asynccontextmanager
+import asyncio
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -22,13 +24,64 @@ from src.routers.reports import reports_router
 from src.routers.notifications import notifications_router
 from src.routers.admin import admin_router
 from src.routers.dashboard import dashboard_router
+from src.routers.monitoring import monitoring_router
+from src.utils.search_index import run_employee_search_index_refresher
+from src.utils.calendar_index import run_calendar_index_refresher
+from src.utils.replication import ensure_outbox_table, run_replication_worker
+from src.utils.notification_store import ensure_notification_tables, run_notification_scheduler
+from src.utils.notifications import smtp_pool
+from src.utils.salary_email_jobs import (
+    ensure_salary_email_tables,
+    run_salary_email_worker,
+    salary_email_worker,
+)
+from src.utils.payroll_snapshot import run_payroll_snapshot
+from src.schemas.user import create_tables as create_user_tables
+from src.utils.id_allocator import ensure_id_allocation_table
+from src._utils import OrjsonResponse
 
 # uvicorn main:app --reload
 
+
+def create_app_tables() -> None:
+    # Bảng do ứng dụng quản lý (không có trong data/*.sql), tạo một lần khi khởi
+    # động thay vì chạy DDL trên đường xử lý request
+    create_user_tables()
+    ensure_id_allocation_table()
+    ensure_outbox_table()
+    ensure_salary_email_tables()
+    ensure_notification_tables()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await asyncio.to_thread(create_app_tables)
+    except Exception as e:
+        print(f"Lỗi khi tạo bảng của ứng dụng: {str(e)}")
+    # Các tác vụ nền chạy suốt vòng đời ứng dụng
+    background_tasks = [
+        asyncio.create_task(run_employee_search_index_refresher()),
+        asyncio.create_task(run_calendar_index_refresher()),
+        asyncio.create_task(run_replication_worker()),
+        asyncio.create_task(run_notification_scheduler()),
+        asyncio.create_task(run_salary_email_worker()),
+        asyncio.create_task(run_payroll_snapshot()),
+    ]
+    yield
+    for task in background_tasks:
+        task.cancel()
+    # Luồng gửi email đang chạy trả tác vụ về hàng đợi rồi dừng
+    salary_email_worker.stop()
+    smtp_pool.close_all()
+
+
 app = FastAPI(
     title="ZENHRM SYSTEM MANAGEMENT",
     description="App quản lý nhân sự và bảng lương",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=OrjsonResponse,
 )
 
 origins = [
@@ -53,6 +106,7 @@ app.include_router(positions_router, prefix="/positions")
 app.include_router(reports_router, prefix="/reports")
 app.include_router(notifications_router, prefix="/notifications")
 app.include_router(admin_router, prefix="/admin")
+app.include_router(monitoring_router, prefix="/monitoring")
 
 @app.get("/")
 async def hello():
@@ -1,26 +1,88 @@
+import orjson
 from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from fastapi.encoders import decimal_encoder
+from pydantic import BaseModel
 from datetime import datetime, timedelta, UTC, date
+from decimal import Decimal
+from pathlib import PurePath
 from typing import Any, Dict, Optional
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from sqlalchemy.engine import Row, RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.util import greenlet_spawn
+
+from src.utils.password import password_hasher
+
+
+def _orjson_default(obj: Any) -> Any:
+    """
+    Kiểu orjson không tự mã hóa; giữ cùng kết quả với jsonable_encoder trước đây.
+    date/datetime/UUID/Enum/dataclass được orjson xử lý trực tiếp.
+    """
+    if isinstance(obj, Decimal):
+        return decimal_encoder(obj)
+    if hasattr(obj, "_sa_instance_state"):
+        # Đối tượng ORM: chỉ các thuộc tính đã nạp (không kích hoạt lazy load,
+        # response được dựng ngoài greenlet của AsyncSession)
+        return {
+            key: value for key, value in obj.__dict__.items() if not key.startswith("_sa")
+        }
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if isinstance(obj, RowMapping):
+        return dict(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, PurePath):
+        return str(obj)
+    raise TypeError(f"Không mã hóa JSON được kiểu {type(obj).__name__}")
+
+
+def dumps_json(content: Any) -> bytes:
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    JSONResponse mã hóa bằng orjson: Decimal, date/datetime, đối tượng ORM, Row
+    được mã hóa ngay khi ghi bytes, không đi qua jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
 
 
 def response(code=200, status="success", message="", data="", metadata={}):
-    return JSONResponse(
-        jsonable_encoder(
-            {
-                "status": status, 
-                "message": message, 
-                "data": data, 
-                "metadata": metadata}
-        ),
+    return OrjsonResponse(
+        {
+            "status": status, 
+            "message": message, 
+            "data": data, 
+            "metadata": metadata},
         status_code=code,
     )
 
+async def run_sync(fn, **kwargs):
+    """
+    Chạy hàm logic viết cho Session đồng bộ trên các AsyncSession.
+    Truy vấn chạy trong greenlet của event loop nên không chiếm slot threadpool.
+    """
+    kwargs = {
+        key: value.sync_session if isinstance(value, AsyncSession) else value
+        for key, value in kwargs.items()
+    }
+    return await greenlet_spawn(fn, **kwargs)
+
+
 def hash_password(password: str):
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 # SECRET_KEY = "sao-cung-duoc"
 # ALGORITHM = "HS256"
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Any, ClassVar, Dict
 
 
 class CommonSettings(BaseSettings):
@@ -13,13 +14,42 @@ class AppSettings(CommonSettings):
     APP_VERSION: str
     
 
-class MySQLConfigs(CommonSettings):
+class PoolConfigs(CommonSettings):
+    """
+    Cấu hình connection pool dùng chung cho các engine.
+    Mỗi database khai báo prefix riêng, ví dụ MYSQL_POOL_SIZE, SQLSERVER_POOL_SIZE...
+    """
+
+    POOL_PREFIX: ClassVar[str] = ""
+
+    def engine_options(self) -> Dict[str, Any]:
+        prefix = self.POOL_PREFIX
+        return {
+            "echo": getattr(self, f"{prefix}_ECHO"),
+            "pool_size": getattr(self, f"{prefix}_POOL_SIZE"),
+            "max_overflow": getattr(self, f"{prefix}_MAX_OVERFLOW"),
+            "pool_recycle": getattr(self, f"{prefix}_POOL_RECYCLE"),
+            "pool_pre_ping": getattr(self, f"{prefix}_POOL_PRE_PING"),
+            "pool_timeout": getattr(self, f"{prefix}_POOL_TIMEOUT"),
+        }
+
+
+class MySQLConfigs(PoolConfigs):
+    POOL_PREFIX: ClassVar[str] = "MYSQL"
+
     MYSQL_USER: str
     MYSQL_PASSWORD: str
     MYSQL_HOST: str
     MYSQL_PORT: int
     MYSQL_DATABASE: str
 
+    MYSQL_ECHO: bool = False
+    MYSQL_POOL_SIZE: int = 10
+    MYSQL_MAX_OVERFLOW: int = 20
+    MYSQL_POOL_RECYCLE: int = 1800
+    MYSQL_POOL_PRE_PING: bool = True
+    MYSQL_POOL_TIMEOUT: int = 30
+
     @property
     def MYSQL_CONNECTION(self) -> str:
         return (
@@ -27,29 +57,160 @@ class MySQLConfigs(CommonSettings):
             f"@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DATABASE}"
         )
 
-class SQLServerConfigs(CommonSettings):
+    @property
+    def MYSQL_ASYNC_CONNECTION(self) -> str:
+        return (
+            f"mysql+aiomysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}"
+            f"@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DATABASE}"
+        )
+
+class SQLServerConfigs(PoolConfigs):
+    POOL_PREFIX: ClassVar[str] = "SQLSERVER"
+
     SQLSERVER_HOST: str
     SQLSERVER_DATABASE: str
 
+    SQLSERVER_ECHO: bool = False
+    SQLSERVER_POOL_SIZE: int = 10
+    SQLSERVER_MAX_OVERFLOW: int = 20
+    SQLSERVER_POOL_RECYCLE: int = 1800
+    SQLSERVER_POOL_PRE_PING: bool = True
+    SQLSERVER_POOL_TIMEOUT: int = 30
+    # pyodbc gửi cả lô tham số trong một lần gọi khi executemany (thêm hàng loạt)
+    SQLSERVER_FAST_EXECUTEMANY: bool = True
+
     @property
     def SQLSERVER_CONNECTION(self) -> str:
         return (
             f"mssql+pyodbc://{self.SQLSERVER_HOST}/{self.SQLSERVER_DATABASE}?driver=ODBC+Driver+17+for+SQL+Server"
         )
 
-class SQLServerUserConfigs(CommonSettings):
+    @property
+    def SQLSERVER_ASYNC_CONNECTION(self) -> str:
+        return (
+            f"mssql+aioodbc://{self.SQLSERVER_HOST}/{self.SQLSERVER_DATABASE}?driver=ODBC+Driver+17+for+SQL+Server"
+        )
+
+class SQLServerUserConfigs(PoolConfigs):
+    POOL_PREFIX: ClassVar[str] = "SQLSERVER_USER"
+
     SQLSERVER_HOST: str
     SQLSERVER_USER_DB: str
 
+    SQLSERVER_USER_ECHO: bool = False
+    SQLSERVER_USER_POOL_SIZE: int = 5
+    SQLSERVER_USER_MAX_OVERFLOW: int = 10
+    SQLSERVER_USER_POOL_RECYCLE: int = 1800
+    SQLSERVER_USER_POOL_PRE_PING: bool = True
+    SQLSERVER_USER_POOL_TIMEOUT: int = 30
+
     @property
     def SQLSERVER_USER_CONNECTION(self) -> str:
         return (
             f"mssql+pyodbc://{self.SQLSERVER_HOST}/{self.SQLSERVER_USER_DB}?driver=ODBC+Driver+17+for+SQL+Server"
         )
+
+    @property
+    def SQLSERVER_USER_ASYNC_CONNECTION(self) -> str:
+        return (
+            f"mssql+aioodbc://{self.SQLSERVER_HOST}/{self.SQLSERVER_USER_DB}?driver=ODBC+Driver+17+for+SQL+Server"
+        )
         
 
+class PasswordHashConfigs(CommonSettings):
+    # Số luồng băm bcrypt chạy song song và số yêu cầu tối đa được xếp hàng
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
+
+
+class SearchIndexConfigs(CommonSettings):
+    # Chu kỳ nạp lại toàn bộ chỉ mục nhân viên trong bộ nhớ: tìm kiếm, ngày kỷ niệm/sinh nhật
+    # (đồng bộ giữa các worker)
+    EMPLOYEE_INDEX_REFRESH_SECONDS: int = 300
+
+
+class IdAllocatorConfigs(CommonSettings):
+    # Số mã mỗi worker giữ trước cho một loại đối tượng (nhân viên, phòng ban, chức vụ)
+    ID_BLOCK_SIZE: int = 50
+
+
+class ReplicationConfigs(CommonSettings):
+    # Đồng bộ HUMAN_2025 -> payroll qua bảng ReplicationOutbox
+    REPLICATION_BATCH_SIZE: int = 500
+    REPLICATION_POLL_SECONDS: float = 1.0
+    # Quá số lần thử này thì bản ghi outbox bị bỏ qua và báo lỗi ở /monitoring/replication
+    REPLICATION_MAX_ATTEMPTS: int = 10
+
+
+class NotificationConfigs(CommonSettings):
+    # Ngưỡng chênh lệch lương (%) giữa hai tháng gần nhất để cảnh báo
+    SALARY_GAP_ALLOWED_PERCENTAGE: float = 30
+    # Chu kỳ tính lại toàn bộ bảng notifications (ngoài lần đổi ngày)
+    NOTIFICATION_REFRESH_SECONDS: int = 3600
+    # Chu kỳ xử lý các nhân viên vừa thay đổi (làm mới theo phạm vi)
+    NOTIFICATION_POLL_SECONDS: float = 5.0
+
+
+class DashboardConfigs(CommonSettings):
+    # Thời gian tối đa cho mỗi widget dashboard; quá hạn thì widget đó trả giá trị mặc định
+    DASHBOARD_SECTION_TIMEOUT_SECONDS: float = 5.0
+    # Số liệu toàn công ty trên dashboard được dùng lại trong khoảng này, quá hạn
+    # thì vẫn trả bản cũ và làm mới nền. Cũng là độ trễ tối đa để thay đổi hiện ra
+    # ở các worker khác, vì đánh dấu cũ sau khi ghi chỉ áp dụng trong một tiến trình
+    DASHBOARD_SNAPSHOT_TTL_SECONDS: float = 60
+    # Lần làm mới chạy lâu hơn khoảng này không bị hủy, nhưng kết quả bị bỏ
+    DASHBOARD_SNAPSHOT_REFRESH_TIMEOUT_SECONDS: float = 30
+
+
+class SMTPPoolConfigs(CommonSettings):
+    # Số kết nối SMTP giữ sẵn, cũng là số luồng gửi email song song
+    SMTP_POOL_SIZE: int = 5
+    # Gửi đủ số email này trên một kết nối thì đóng và mở kết nối mới (giới hạn của máy chủ)
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    # Kết nối nhàn rỗi lâu hơn ngưỡng này được mở lại thay vì dùng tiếp
+    SMTP_IDLE_TIMEOUT_SECONDS: float = 60
+    SMTP_TIMEOUT_SECONDS: float = 30
+
+
+class SalaryEmailJobConfigs(CommonSettings):
+    # Giới hạn tốc độ gửi email thông báo lương (email/giây, 0 là không giới hạn)
+    SALARY_EMAIL_RATE_PER_SECOND: float = 10
+    # Số lần gửi tối đa mỗi email, lần thử lại thứ n chờ RETRY_BASE * 2^(n-1) giây
+    SALARY_EMAIL_MAX_ATTEMPTS: int = 5
+    SALARY_EMAIL_RETRY_BASE_SECONDS: float = 30
+    SALARY_EMAIL_RETRY_MAX_SECONDS: float = 1800
+    # Số email mỗi lô (cập nhật tiến độ sau mỗi lô)
+    SALARY_EMAIL_BATCH_SIZE: int = 100
+    SALARY_EMAIL_POLL_SECONDS: float = 5.0
+    # Tác vụ "running" không cập nhật HeartbeatAt quá ngưỡng này được worker khác nhận lại
+    SALARY_EMAIL_STALE_SECONDS: int = 300
+    # Gửi kèm phần văn bản thuần (multipart/alternative) bên cạnh HTML
+    SALARY_EMAIL_PLAIN_TEXT: bool = True
+
+
+class PayrollSnapshotConfigs(CommonSettings):
+    # Thư mục chứa snapshot Parquet của salaries/attendance (phân vùng theo tháng)
+    PAYROLL_SNAPSHOT_DIR: str = "snapshots/payroll"
+    # Chu kỳ cập nhật snapshot; 0 là không chạy nền trên instance này. Các worker
+    # dùng chung thư mục nhận lượt chạy qua khóa file, không ghi chồng lên nhau
+    PAYROLL_SNAPSHOT_INTERVAL_SECONDS: int = 3600
+    # Snapshot cũ hơn ngưỡng này thì báo cáo đọc lại từ database
+    PAYROLL_SNAPSHOT_MAX_AGE_SECONDS: int = 86400
+    # Số dòng mỗi lần đọc từ database / mỗi row group khi ghi Parquet
+    PAYROLL_SNAPSHOT_BATCH_SIZE: int = 10000
+
+
 # Khởi tạo config
 # app_conf = AppSettings()
 mysql_conf = MySQLConfigs()
 sqlserver_conf = SQLServerConfigs()
 sqlserver_user_conf = SQLServerUserConfigs()
+password_hash_conf = PasswordHashConfigs()
+search_index_conf = SearchIndexConfigs()
+id_allocator_conf = IdAllocatorConfigs()
+replication_conf = ReplicationConfigs()
+notification_conf = NotificationConfigs()
+dashboard_conf = DashboardConfigs()
+smtp_pool_conf = SMTPPoolConfigs()
+salary_email_conf = SalaryEmailJobConfigs()
+payroll_snapshot_conf = PayrollSnapshotConfigs()
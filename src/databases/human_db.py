@@ -1,11 +1,21 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from src.core.config import sqlserver_conf
+from src.databases.pool import create_pooled_engine, create_pooled_async_engine
 
 DATABASE_URL = sqlserver_conf.SQLSERVER_CONNECTION
+ASYNC_DATABASE_URL = sqlserver_conf.SQLSERVER_ASYNC_CONNECTION
 
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_pooled_engine(
+    "human",
+    DATABASE_URL,
+    fast_executemany=sqlserver_conf.SQLSERVER_FAST_EXECUTEMANY,
+    **sqlserver_conf.engine_options()
+)
+async_engine = create_pooled_async_engine(
+    "human", ASYNC_DATABASE_URL, **sqlserver_conf.engine_options()
+)
 
 
 SessionLocal = sessionmaker(
@@ -17,3 +27,14 @@ SessionLocal = sessionmaker(
 def get_sync_db():
     with SessionLocal() as session:
         yield session
+
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -1,11 +1,16 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from src.core.config import mysql_conf
+from src.databases.pool import create_pooled_engine, create_pooled_async_engine
 
 DATABASE_URL = mysql_conf.MYSQL_CONNECTION
+ASYNC_DATABASE_URL = mysql_conf.MYSQL_ASYNC_CONNECTION
 
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_pooled_engine("payroll", DATABASE_URL, **mysql_conf.engine_options())
+async_engine = create_pooled_async_engine(
+    "payroll", ASYNC_DATABASE_URL, **mysql_conf.engine_options()
+)
 
 
 SessionLocal = sessionmaker(
@@ -16,4 +21,15 @@ SessionLocal = sessionmaker(
 
 def get_sync_db():
     with SessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -0,0 +1,93 @@
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict
+
+
+class _WaitStatsMixin:
+    """
+    Đo thời gian chờ lấy connection ra khỏi pool.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = Lock()
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = perf_counter() - start
+            with self._stats_lock:
+                self._wait_count += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def wait_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "checkouts": self._wait_count,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": (
+                    round(self._wait_total / self._wait_count * 1000, 3)
+                    if self._wait_count
+                    else 0
+                ),
+                "max_wait_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+class InstrumentedQueuePool(_WaitStatsMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_WaitStatsMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Danh sách engine đã đăng ký, dùng cho endpoint thống kê pool
+_engines: Dict[str, Engine] = {}
+
+
+def create_pooled_engine(name: str, url: str, **options) -> Engine:
+    engine = create_engine(url, poolclass=InstrumentedQueuePool, **options)
+    _engines[name] = engine
+    return engine
+
+
+def create_pooled_async_engine(name: str, url: str, **options) -> AsyncEngine:
+    engine = create_async_engine(url, poolclass=InstrumentedAsyncQueuePool, **options)
+    _engines[f"{name}_async"] = engine.sync_engine
+    return engine
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    pool = engine.pool
+    status = {
+        "pool_class": type(pool).__name__,
+        "size": pool.size() if hasattr(pool, "size") else None,
+        "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        "timeout": pool.timeout() if hasattr(pool, "timeout") else None,
+    }
+    if hasattr(pool, "wait_stats"):
+        status.update(pool.wait_stats())
+    return status
+
+
+def all_pool_status() -> Dict[str, Dict[str, Any]]:
+    return {name: pool_status(engine) for name, engine in _engines.items()}
@@ -1,11 +1,16 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from src.core.config import sqlserver_user_conf
+from src.databases.pool import create_pooled_engine, create_pooled_async_engine
 
 DATABASE_URL = sqlserver_user_conf.SQLSERVER_USER_CONNECTION
+ASYNC_DATABASE_URL = sqlserver_user_conf.SQLSERVER_USER_ASYNC_CONNECTION
 
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_pooled_engine("user", DATABASE_URL, **sqlserver_user_conf.engine_options())
+async_engine = create_pooled_async_engine(
+    "user", ASYNC_DATABASE_URL, **sqlserver_user_conf.engine_options()
+)
 
 
 SessionLocal = sessionmaker(
@@ -17,3 +22,14 @@ SessionLocal = sessionmaker(
 def get_sync_db():
     with SessionLocal() as session:
         yield session
+
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
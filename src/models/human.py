@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class DepartmentOut(BaseModel):
@@ -58,6 +58,10 @@ class EmployeeUpdate(BaseModel):
     Status: Optional[str] = None
 
 
+class EmployeeBulkDelete(BaseModel):
+    EmployeeIDs: List[int] = Field(..., min_length=1, max_length=10000)
+
+
 class DepartmentCreate(BaseModel):
     DepartmentName: str
     CreatedAt: datetime
@@ -1,7 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 
 
 class DepartmentOut(BaseModel):
@@ -83,3 +83,7 @@ class SalaryDifferenceWarning(BaseModel):
 class PayrollUpdate(BaseModel):
     Bonus: Optional[Decimal]
     Deductions: Optional[Decimal]
+
+
+class NotificationMarkRead(BaseModel):
+    NotificationIDs: List[int] = Field(..., min_length=1, max_length=1000)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form
-from src.databases.user_db import get_sync_db as get_sync_user_db
-from src.databases.human_db import get_sync_db as get_sync_human_db
-from sqlalchemy.orm import Session
+from src.databases.user_db import get_async_db as get_async_user_db
+from src.databases.human_db import get_async_db as get_async_human_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.utils.auth import (
     authenticate_user,
     create_access_token,
@@ -14,7 +14,8 @@ from src.utils.auth import (
 from src.utils.admin import create_user_account, update_user_account
 from src.models.user import UserCreate, UserUpdate, Role
 
-from src._utils import response
+from src.utils.password import password_hasher
+from src._utils import response, run_sync
 
 admin_router = APIRouter(prefix="", tags=["Admin"])
 
@@ -22,16 +23,23 @@ admin_router = APIRouter(prefix="", tags=["Admin"])
 @admin_router.post(
     "/create_user", description="Tạo tài khoản cho nhân viên bằng tài khoản ADMIN"
 )
-def create_user(
+async def create_user(
     user: UserCreate, 
-    db_user: Session = Depends(get_sync_user_db),
-    db_human: Session = Depends(get_sync_human_db),
+    db_user: AsyncSession = Depends(get_async_user_db),
+    db_human: AsyncSession = Depends(get_async_human_db),
 
     has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
 ):
+    password_hash = await password_hasher.hash_async(user.Password)
     return response(
         message="Tài khoản đã được tạo thành công",
-        data=create_user_account(db_user=db_user, db_human=db_human, user_data=user)
+        data=await run_sync(
+            create_user_account,
+            db_user=db_user,
+            db_human=db_human,
+            user_data=user,
+            password_hash=password_hash,
+        )
     )
 
 
@@ -39,14 +47,24 @@ def create_user(
     "/update_user/{username}",
     description="Cập nhật tài khoản cho nhân viên bằng tài khoản ADMIN",
 )
-def update_user(
+async def update_user(
     username: str, 
     user: UserUpdate, 
-    db_user: Session = Depends(get_sync_user_db),
-    db_human: Session = Depends(get_sync_human_db),
+    db_user: AsyncSession = Depends(get_async_user_db),
+    db_human: AsyncSession = Depends(get_async_human_db),
     has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
 ):
+    password_hash = (
+        await password_hasher.hash_async(user.Password) if user.Password else None
+    )
     return response(
         message="Tài khoản đã được cập nhật thành công",
-        data=update_user_account(db_user=db_user, db_human=db_human, username=username, user_data=user)
+        data=await run_sync(
+            update_user_account,
+            db_user=db_user,
+            db_human=db_human,
+            username=username,
+            user_data=user,
+            password_hash=password_hash,
+        )
     )
@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form
 from src.databases.user_db import get_sync_db as get_sync_user_db
+from src.databases.user_db import get_async_db as get_async_user_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from src._utils import run_sync
 from src.utils.auth import (
-    authenticate_user,
+    authenticate_user_async,
     create_access_token,
     create_refresh_token,
     oauth2_scheme,
     get_current_user,
+    get_user_from_token,
+    load_user,
+    token_claims,
+    CurrentUser,
 )
 from src.models.user import UserResponse
 
@@ -14,19 +21,21 @@ auth_router = APIRouter(prefix="", tags=["Auth"])
 
 
 @auth_router.post("/login")
-def login(
+async def login(
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_sync_user_db),
+    db: AsyncSession = Depends(get_async_user_db),
 ):
-    user = authenticate_user(db, username, password)
+    user = await authenticate_user_async(db, username, password)
     if not user:
         raise HTTPException(
             status_code=401,
             detail="Tên đăng nhập hoặc mật khẩu không hợp lệ"
         )
 
-    access_token = create_access_token(data={"sub": user.Username})
+    # Token mang phiên bản hiện tại của tài khoản (xem revoke_user_tokens)
+    current_user = await run_sync(load_user, db=db, username=user.Username)
+    access_token = create_access_token(data=token_claims(current_user))
     refresh_token = create_refresh_token(data={"sub": user.Username})
 
     return {"access_token": access_token, "refresh_token": refresh_token}
@@ -41,19 +50,18 @@ def refresh(
         detail="Không thể xác thực tài khoản",
         headers={"WWW-Authenticate": "Bearer"}
     )
-    user = get_current_user(db, token)
+    user = get_user_from_token(db, token)
     if not user:
         raise credentials_exception
 
-    access_token = create_access_token(data={"sub": user.Username})
+    access_token = create_access_token(data=token_claims(user))
     refresh_token = create_refresh_token(data={"sub": user.Username})
 
     return {"access_token": access_token, "refresh_token": refresh_token}
 
 
 @auth_router.get("/me", response_model=UserResponse)
-def me(db: Session = Depends(get_sync_user_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(db, token)
+def me(user: CurrentUser = Depends(get_current_user)):
     if not user:
         raise HTTPException(
             status_code=401,
@@ -33,7 +33,6 @@ def get_departments(
 def add_department(
     department: DepartmentCreate,
     hm_db: Session = Depends(get_sync_hm_db),
-    pr_db: Session = Depends(get_sync_pr_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     )
@@ -41,7 +40,6 @@ def add_department(
     return response(
         data=add_and_sync_department(
             session_human=hm_db, 
-            session_payroll=pr_db, 
             department=department
         )
     )
@@ -52,7 +50,6 @@ def update_department(
     department_id: int,
     department: DepartmentUpdate,
     hm_db: Session = Depends(get_sync_hm_db),
-    pr_db: Session = Depends(get_sync_pr_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     )
@@ -60,7 +57,6 @@ def update_department(
     return response(
         data=update_and_sync_department(
             session_human=hm_db,
-            session_payroll=pr_db,
             department_id=department_id,
             department=department,
         )
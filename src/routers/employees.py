@@ -1,19 +1,26 @@
-from fastapi import Depends, Query
+from fastapi import Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.routing import APIRouter
 from src.databases.human_db import get_sync_db as get_sync_hm_db
+from src.databases.human_db import get_async_db as get_async_hm_db
 from src.databases.payroll_db import get_sync_db as get_sync_pr_db
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.schemas.user import User
 from src.utils.employees import (
     get_employees,
     add_and_sync_employee,
+    bulk_add_employees,
+    parse_bulk_employee_payload,
     search_employees_logic,
+    suggest_employees_logic,
     view_employee_details_logic,
     update_and_sync_employee,
     delete_employee_logic,
+    bulk_delete_employees,
 )
-from src.models.human import EmployeeCreate, EmployeeUpdate
-from src._utils import response
+from src.models.human import EmployeeBulkDelete, EmployeeCreate, EmployeeUpdate
+from src._utils import response, run_sync
 from src.utils.auth import has_role
 from src.models.user import Role
 
@@ -23,32 +30,52 @@ employees_router = APIRouter(prefix="", tags=["Employees"])
 
 
 @employees_router.get("")
-def read_employees(
+async def read_employees(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_sync_hm_db),
+    cursor: Optional[str] = Query(None, description="Cursor trang trước/sau (lấy từ metadata)"),
+    db: AsyncSession = Depends(get_async_hm_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     ),
 ):
-    return response(data=get_employees(session=db, page=page, per_page=per_page))
+    data, metadata = await run_sync(
+        get_employees, session=db, page=page, per_page=per_page, cursor=cursor
+    )
+    return response(data=data, metadata=metadata)
 
 
 @employees_router.get("/search")
-def search_employees(
+async def search_employees(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor trang trước/sau (lấy từ metadata)"),
     search_query: str = Query(None),
-    db: Session = Depends(get_sync_hm_db),
+    db: AsyncSession = Depends(get_async_hm_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     ),
 ):
-    return response(
-        data=search_employees_logic(
-            session=db, search_query=search_query, page=page, per_page=per_page
-        )
+    data, metadata = await run_sync(
+        search_employees_logic,
+        session=db,
+        search_query=search_query,
+        page=page,
+        per_page=per_page,
+        cursor=cursor,
     )
+    return response(data=data, metadata=metadata)
+
+
+@employees_router.get("/suggest")
+async def suggest_employees(
+    q: str = Query(..., min_length=1, description="Tên hoặc mã nhân viên đang gõ"),
+    limit: int = Query(10, ge=1, le=50),
+    has_role=Depends(
+        has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
+    ),
+):
+    return response(data=suggest_employees_logic(query=q, limit=limit))
 
 
 @employees_router.post("/add")
@@ -67,12 +94,34 @@ def add_employee(
     )
 
 
+@employees_router.post("/bulk-add")
+async def bulk_add_employee(
+    request: Request,
+    hm_db: Session = Depends(get_sync_hm_db),
+    pr_db: Session = Depends(get_sync_pr_db),
+    has_role=Depends(
+        has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
+    ),
+):
+    """
+    Body là JSON array các nhân viên, hoặc CSV (Content-Type: text/csv)
+    với dòng tiêu đề trùng tên trường của /employees/add.
+    """
+    rows = parse_bulk_employee_payload(
+        await request.body(), request.headers.get("content-type", "")
+    )
+    return response(
+        data=await run_in_threadpool(
+            bulk_add_employees, session_human=hm_db, session_payroll=pr_db, rows=rows
+        )
+    )
+
+
 @employees_router.put("/update/{employee_id}")
 def update_employee(
     employee_id: int,
     update_data: EmployeeUpdate,
     hm_db: Session = Depends(get_sync_hm_db),
-    pr_db: Session = Depends(get_sync_pr_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     ),
@@ -80,7 +129,6 @@ def update_employee(
     return response(
         data=update_and_sync_employee(
             session_human=hm_db,
-            session_payroll=pr_db,
             employee_id=employee_id,
             update_data=update_data,
         )
@@ -91,26 +139,40 @@ def update_employee(
 def delete_employee(
     employee_id: int,
     hm_db: Session = Depends(get_sync_hm_db),
-    pr_db: Session = Depends(get_sync_pr_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     ),
 ):
     return response(
         data=delete_employee_logic(
-            session_human=hm_db, session_payroll=pr_db, employee_id=employee_id
+            session_human=hm_db, employee_id=employee_id
         )
     )
 
 
+@employees_router.post("/bulk-delete")
+def bulk_delete_employee(
+    payload: EmployeeBulkDelete,
+    hm_db: Session = Depends(get_sync_hm_db),
+    has_role=Depends(
+        has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
+    ),
+):
+    return response(
+        data=bulk_delete_employees(session_human=hm_db, employee_ids=payload.EmployeeIDs)
+    )
+
+
 @employees_router.get("/details/{employee_id}")
-def view_employee_details(
+async def view_employee_details(
     employee_id: int,
-    db: Session = Depends(get_sync_hm_db),
+    db: AsyncSession = Depends(get_async_hm_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     )
 ):
     return response(
-        data=view_employee_details_logic(session=db, employee_id=employee_id)
+        data=await run_sync(
+            view_employee_details_logic, session=db, employee_id=employee_id
+        )
     )
@@ -0,0 +1,112 @@
+from fastapi import Depends
+from fastapi.routing import APIRouter
+from sqlalchemy.orm import Session
+
+from src.utils.monitoring import (
+    get_pool_stats_logic,
+    get_password_hash_stats_logic,
+    get_id_allocator_stats_logic,
+    get_replication_status_logic,
+    get_notification_scheduler_stats_logic,
+    get_smtp_pool_stats_logic,
+    get_salary_email_worker_stats_logic,
+    get_dashboard_cache_stats_logic,
+    get_payroll_snapshot_stats_logic,
+)
+from src.databases.human_db import get_sync_db as get_sync_hm_db
+from src.utils.auth import has_role
+from src.models.user import Role
+from src._utils import response
+
+monitoring_router = APIRouter(prefix="", tags=["Monitoring"])
+
+
+@monitoring_router.get(
+    "/pool-stats",
+    description="Thống kê connection pool của các database (số kết nối đang dùng, overflow, thời gian chờ)",
+)
+def get_pool_stats(
+    has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
+):
+    return response(data=get_pool_stats_logic())
+
+
+@monitoring_router.get(
+    "/password-hash-stats",
+    description="Thống kê pool băm mật khẩu (độ sâu hàng đợi, số yêu cầu bị từ chối, độ trễ)",
+)
+def get_password_hash_stats(
+    has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
+):
+    return response(data=get_password_hash_stats_logic())
+
+
+@monitoring_router.get(
+    "/id-allocator",
+    description="Trạng thái khối mã đang giữ của bộ cấp phát ID (mã kế tiếp, số mã còn lại, số lần thuê khối)",
+)
+def get_id_allocator_stats(
+    has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
+):
+    return response(data=get_id_allocator_stats_logic())
+
+
+@monitoring_router.get(
+    "/replication",
+    description="Độ trễ và tồn đọng đồng bộ HUMAN_2025 -> payroll qua outbox (backlog, lag, bản ghi lỗi)",
+)
+def get_replication_status(
+    hm_db: Session = Depends(get_sync_hm_db),
+    has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
+):
+    return response(data=get_replication_status_logic(session_human=hm_db))
+
+
+@monitoring_router.get(
+    "/notifications",
+    description="Trạng thái bộ lập lịch làm mới bảng notifications (lần làm mới gần nhất, số nhân viên chờ tính lại, lỗi)",
+)
+def get_notification_scheduler_stats(
+    has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
+):
+    return response(data=get_notification_scheduler_stats_logic())
+
+
+@monitoring_router.get(
+    "/smtp-pool",
+    description="Thống kê pool kết nối SMTP (số kết nối mở, mở lại, email đã gửi/lỗi)",
+)
+def get_smtp_pool_stats(
+    has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
+):
+    return response(data=get_smtp_pool_stats_logic())
+
+
+@monitoring_router.get(
+    "/salary-email",
+    description="Trạng thái luồng gửi email thông báo lương (tác vụ đang xử lý, tốc độ gửi, số email đã gửi/lỗi)",
+)
+def get_salary_email_worker_stats(
+    has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
+):
+    return response(data=get_salary_email_worker_stats_logic())
+
+
+@monitoring_router.get(
+    "/dashboard-cache",
+    description="Thống kê cache snapshot dashboard (hit/stale/miss, số lần làm mới, tuổi từng snapshot)",
+)
+def get_dashboard_cache_stats(
+    has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
+):
+    return response(data=get_dashboard_cache_stats_logic())
+
+
+@monitoring_router.get(
+    "/payroll-snapshot",
+    description="Trạng thái luồng cập nhật snapshot Parquet bảng lương/chấm công (lần chạy, số tháng đã ghi, lỗi gần nhất)",
+)
+def get_payroll_snapshot_stats(
+    has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
+):
+    return response(data=get_payroll_snapshot_stats_logic())
@@ -1,24 +1,32 @@
 from fastapi import Depends, Query
+from fastapi.responses import HTMLResponse
 from fastapi.routing import APIRouter
 from src.databases.human_db import get_sync_db as get_sync_hm_db
 from src.databases.payroll_db import get_sync_db as get_sync_pr_db
-from src.databases.user_db import get_sync_db as get_sync_user_db
 from sqlalchemy.orm import Session
 from datetime import date
 from typing import Optional
 
-from src.utils.notifications import (
-    upcoming_anniversaries,
-    absent_days_warning,
-    absent_days_warning_personal,
-    salary_gap_warning,
-    salary_gap_warning_personal,
-    send_monthly_salary_notification,
+from src.utils.notifications import upcoming_birthdays, preview_salary_email
+from src.utils.notification_store import (
+    anniversaries_feed,
+    absent_days_feed,
+    absent_days_personal_feed,
+    salary_gap_feed,
+    salary_gap_personal_feed,
+    notification_counts,
+    mark_notifications_read,
 )
+from src.utils.salary_email_jobs import (
+    create_salary_email_job,
+    salary_email_job_status,
+)
+from src.models.payroll import NotificationMarkRead
 from src._utils import response
 from src.utils.auth import has_role
 from src.models.user import Role
-from src.utils.auth import oauth2_scheme
+from src.utils.auth import CurrentUser, get_current_user
+from src.core.config import notification_conf
 
 notifications_router = APIRouter(prefix="", tags=["Notifications"])
 
@@ -27,8 +35,77 @@ notifications_router = APIRouter(prefix="", tags=["Notifications"])
     "/anniversaries",
     description="Lấy thông báo về ngày kỷ niệm của nhân viên sắp tới trong 30 ngày",
 )
-def get_upcoming_anniversaries(db: Session = Depends(get_sync_hm_db)):
-    return response(data=upcoming_anniversaries(session=db))
+def get_upcoming_anniversaries(
+    window_days: int = Query(30, ge=0, le=366, description="Số ngày tới cần xét"),
+    db: Session = Depends(get_sync_hm_db),
+    db_payroll: Session = Depends(get_sync_pr_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    return response(
+        data=anniversaries_feed(
+            session_human=db,
+            session_payroll=db_payroll,
+            user=user,
+            window_days=window_days,
+        )
+    )
+
+
+@notifications_router.get(
+    "/birthdays",
+    description="Lấy danh sách sinh nhật của nhân viên sắp tới trong 30 ngày",
+)
+def get_upcoming_birthdays(
+    window_days: int = Query(30, ge=0, le=366, description="Số ngày tới cần xét"),
+    db: Session = Depends(get_sync_hm_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    return response(data=upcoming_birthdays(session=db, window_days=window_days))
+
+
+@notifications_router.get(
+    "/summary",
+    description="Số thông báo và số chưa đọc theo từng loại của người dùng hiện tại (cho dashboard)",
+)
+def get_notification_summary(
+    db_human: Session = Depends(get_sync_hm_db),
+    db_payroll: Session = Depends(get_sync_pr_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    return response(
+        data=notification_counts(
+            session_human=db_human, session_payroll=db_payroll, user=user
+        )
+    )
+
+
+@notifications_router.post(
+    "/read",
+    description="Đánh dấu đã đọc các thông báo theo NotificationID",
+)
+def mark_read(
+    payload: NotificationMarkRead,
+    db_payroll: Session = Depends(get_sync_pr_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    return response(
+        data=mark_notifications_read(
+            session_payroll=db_payroll,
+            user=user,
+            notification_ids=payload.NotificationIDs,
+        )
+    )
+
+
+@notifications_router.post(
+    "/read-all",
+    description="Đánh dấu đã đọc tất cả thông báo của người dùng hiện tại",
+)
+def mark_all_read(
+    db_payroll: Session = Depends(get_sync_pr_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    return response(data=mark_notifications_read(session_payroll=db_payroll, user=user))
 
 
 @notifications_router.get(
@@ -36,8 +113,13 @@ def get_upcoming_anniversaries(db: Session = Depends(get_sync_hm_db)):
     description="Lấy thông báo về số ngày nghỉ phép của TẤT CẢ nhân viên trong 3 tháng gần đây (cho quản lý dùng)",
 )
 def get_absent_days_warning(
+    windows_month: int = Query(3, ge=0, le=36, description="Số tháng gần đây cần xét"),
+    department_id: Optional[int] = Query(None),
+    employee_id: Optional[int] = Query(None),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=500),
     db: Session = Depends(get_sync_pr_db),
-    has_role=Depends(
+    user: CurrentUser = Depends(
         has_role(
             required_roles=[
                 Role.ADMIN.value,
@@ -47,7 +129,19 @@ def get_absent_days_warning(
         )
     ),
 ):
-    return response(data=absent_days_warning(session=db))
+    data = absent_days_feed(
+        session_payroll=db,
+        user=user,
+        windows_month=windows_month,
+        department_id=department_id,
+        employee_id=employee_id,
+        page=page,
+        per_page=per_page,
+    )
+    return response(
+        data=data,
+        metadata={"page": page, "per_page": per_page, "total": data["count"]},
+    )
 
 
 @notifications_router.get(
@@ -55,14 +149,11 @@ def get_absent_days_warning(
     description="Lấy thông báo về số ngày nghỉ phép của nhân viên trong 3 tháng gần đây",
 )
 def get_absent_days_warning_personal(
-    db_user: Session = Depends(get_sync_user_db),
     db_payroll: Session = Depends(get_sync_pr_db),
-    token: str = Depends(oauth2_scheme),
+    user: CurrentUser = Depends(get_current_user),
 ):
     return response(
-        data=absent_days_warning_personal(
-            db_user=db_user, db_payroll=db_payroll, token=token
-        )
+        data=absent_days_personal_feed(session_payroll=db_payroll, user=user)
     )
 
 
@@ -71,8 +162,15 @@ def get_absent_days_warning_personal(
     description="Lấy thông báo về sự chênh lệch lương giữa 2 tháng gần đây của TẤT CẢ nhân viên",
 )
 def get_salary_gap_warning(
+    allowed_gap_percentage: float = Query(
+        notification_conf.SALARY_GAP_ALLOWED_PERCENTAGE,
+        ge=0,
+        description="Ngưỡng chênh lệch lương (%) để cảnh báo",
+    ),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=500),
     db_payroll: Session = Depends(get_sync_pr_db),
-    has_role=Depends(
+    user: CurrentUser = Depends(
         has_role(
             required_roles=[
                 Role.ADMIN.value,
@@ -82,29 +180,68 @@ def get_salary_gap_warning(
         )
     ),
 ):
-    return response(data=salary_gap_warning(session=db_payroll))
+    data = salary_gap_feed(
+        session_payroll=db_payroll,
+        user=user,
+        allowed_gap_percentage=allowed_gap_percentage,
+        page=page,
+        per_page=per_page,
+    )
+    return response(
+        data=data,
+        metadata={"page": page, "per_page": per_page, "total": data["count"]},
+    )
 
 @notifications_router.get(
     "/salary-gap-warning-personal",
     description="Lấy thông báo về sự chênh lệch lương giữa 2 tháng gần đây của bản thân",
 )
 def get_salary_gap_warning_personal(
-    db_user: Session = Depends(get_sync_user_db),
     db_payroll: Session = Depends(get_sync_pr_db),
-    token: str = Depends(oauth2_scheme),
+    user: CurrentUser = Depends(get_current_user),
 ):
     return response(
-        data=salary_gap_warning_personal(
-            db_user=db_user, db_payroll=db_payroll, token=token
-        )
+        data=salary_gap_personal_feed(session_payroll=db_payroll, user=user)
     )
 
 @notifications_router.post(
     "/email-salary-notification",
-    description="Gửi thông báo lương cho tất cả nhân viên",
+    description="Xếp hàng tác vụ gửi thông báo lương cho tất cả nhân viên, trả về JobID để theo dõi tiến độ",
 )
 def send_salary_email(
     month_str: Optional[str] = Query(None, description="Tháng cần gửi thông báo lương (định dạng YYYY-MM hoặc YYYY-MM-DD)"),
+    db_payroll: Session = Depends(get_sync_pr_db),
+    user: CurrentUser = Depends(
+        has_role(
+            required_roles=[
+                Role.ADMIN.value,
+                Role.PAYROLL_MANAGER.value,
+            ]
+        )
+    ),
+):
+    job, created = create_salary_email_job(
+        session_payroll=db_payroll, user=user, month_str=month_str
+    )
+    return response(
+        code=202,
+        message=(
+            "Đã xếp hàng tác vụ gửi thông báo lương"
+            if created
+            else "Tháng này đang có tác vụ gửi thông báo lương chưa hoàn thành"
+        ),
+        data=job,
+    )
+
+
+@notifications_router.get(
+    "/email-salary-notification/preview",
+    description="Xem trước email thông báo lương của một nhân viên (không gửi); as_html=true trả về trang HTML",
+)
+def preview_salary_email_route(
+    employee_id: int = Query(..., description="Mã nhân viên"),
+    month_str: Optional[str] = Query(None, description="Tháng (định dạng YYYY-MM hoặc YYYY-MM-DD)"),
+    as_html: bool = Query(False, description="Trả về nội dung HTML để xem trực tiếp trên trình duyệt"),
     db_human: Session = Depends(get_sync_hm_db),
     db_payroll: Session = Depends(get_sync_pr_db),
     has_role=Depends(
@@ -116,7 +253,33 @@ def send_salary_email(
         )
     ),
 ):
-    result = send_monthly_salary_notification(db_human, db_payroll, month_str)
+    email = preview_salary_email(
+        db_human=db_human,
+        db_payroll=db_payroll,
+        employee_id=employee_id,
+        month_str=month_str,
+    )
+    if as_html:
+        return HTMLResponse(content=email["body_html"])
+    return response(data=email)
+
+
+@notifications_router.get(
+    "/email-salary-notification/{job_id}",
+    description="Trạng thái và tiến độ tác vụ gửi thông báo lương (đã gửi, lỗi, bỏ qua, đang chờ gửi lại)",
+)
+def get_salary_email_job(
+    job_id: int,
+    db_payroll: Session = Depends(get_sync_pr_db),
+    has_role=Depends(
+        has_role(
+            required_roles=[
+                Role.ADMIN.value,
+                Role.PAYROLL_MANAGER.value,
+            ]
+        )
+    ),
+):
     return response(
-        data=result
-    )
\ No newline at end of file
+        data=salary_email_job_status(session_payroll=db_payroll, job_id=job_id)
+    )
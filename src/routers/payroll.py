@@ -4,19 +4,24 @@ from fastapi.routing import APIRouter
 from typing import Optional, List
 from datetime import date
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..schemas.user import User
 from src.models.payroll import PayrollUpdate
 from src.databases.human_db import get_sync_db as get_sync_hm_db
 from src.databases.payroll_db import get_sync_db as get_sync_pr_db
+from src.databases.payroll_db import get_async_db as get_async_pr_db
 
 from ..utils.payroll import (
     get_payroll,
     get_attendance_records,
     update_payroll,
-    search_payroll_logic
+    search_payroll_logic,
+    export_salaries,
+    export_attendance,
 )
-from .._utils import response
+from ..utils.exports import NDJSON, export_response
+from .._utils import response, run_sync
 from src.utils.auth import has_role
 from src.models.user import Role
 
@@ -25,41 +30,69 @@ payroll_router = APIRouter(prefix="", tags=["Payroll"])
 
 
 @payroll_router.get("")
-def read_payroll(
+async def read_payroll(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
-    pr_db: Session = Depends(get_sync_pr_db),
+    cursor: Optional[str] = Query(None, description="Cursor trang trước/sau (lấy từ metadata)"),
+    pr_db: AsyncSession = Depends(get_async_pr_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.PAYROLL_MANAGER.value])
     )
 ):
-    return response(
-        data=get_payroll(
-            session=pr_db, 
-            page=page, 
-            per_page=per_page
-        )
+    data, metadata = await run_sync(
+        get_payroll,
+        session=pr_db,
+        page=page,
+        per_page=per_page,
+        cursor=cursor,
     )
+    return response(data=data, metadata=metadata)
 
 
 @payroll_router.get("/search")
-def search_payroll(
+async def search_payroll(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor trang trước/sau (lấy từ metadata)"),
     search_query: str = Query(None),
-    pr_db: Session = Depends(get_sync_pr_db),
+    pr_db: AsyncSession = Depends(get_async_pr_db),
+    has_role=Depends(
+        has_role(required_roles=[Role.ADMIN.value, Role.PAYROLL_MANAGER.value])
+    )
+):
+    data, metadata = await run_sync(
+        search_payroll_logic,
+        session=pr_db,
+        search_query=search_query,
+        page=page,
+        per_page=per_page,
+        cursor=cursor,
+    )
+    return response(data=data, metadata=metadata)
+
+
+@payroll_router.get(
+    "/export",
+    description="Xuất toàn bộ bảng lương theo bộ lọc dạng NDJSON hoặc CSV (stream, không phân trang)",
+)
+def export_payroll(
+    month_from: Optional[str] = Query(None, description="Từ tháng, định dạng YYYY-MM"),
+    month_to: Optional[str] = Query(None, description="Đến tháng (bao gồm), định dạng YYYY-MM"),
+    department_id: Optional[int] = Query(None),
+    employee_id: Optional[int] = Query(None),
+    export_format: str = Query(NDJSON, alias="format", description="ndjson hoặc csv"),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.PAYROLL_MANAGER.value])
     )
 ):
-    return response(
-        data=search_payroll_logic(
-            session=pr_db, 
-            search_query=search_query,
-            page=page, 
-            per_page=per_page
-        )
+    chunks = export_salaries(
+        month_from=month_from,
+        month_to=month_to,
+        department_id=department_id,
+        employee_id=employee_id,
+        export_format=export_format,
     )
+    return export_response(chunks, "salaries", export_format)
 
 
 @payroll_router.put("/update/{payroll_id}")
@@ -77,23 +110,49 @@ def update_payroll_router(
         update_data=update_data)
 
 @payroll_router.get("/attendance")
-def read_attendance(
+async def read_attendance(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor trang trước/sau (lấy từ metadata)"),
     search_date: date = Query(None),
     employee_id: int = Query(None),
-    pr_db: Session = Depends(get_sync_pr_db),
+    pr_db: AsyncSession = Depends(get_async_pr_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.PAYROLL_MANAGER.value])
     )
 ):
-    return response(
-        data=get_attendance_records(
-            session=pr_db, 
-            page=page, 
-            per_page=per_page, 
-            search_date=search_date, 
-            employee_id=employee_id
-            )
+    data, metadata = await run_sync(
+        get_attendance_records,
+        session=pr_db,
+        page=page,
+        per_page=per_page,
+        search_date=search_date,
+        employee_id=employee_id,
+        cursor=cursor,
     )
+    return response(data=data, metadata=metadata)
+
+
 
+@payroll_router.get(
+    "/attendance/export",
+    description="Xuất toàn bộ dữ liệu chấm công theo bộ lọc dạng NDJSON hoặc CSV (stream, không phân trang)",
+)
+def export_attendance_router(
+    month_from: Optional[str] = Query(None, description="Từ tháng, định dạng YYYY-MM"),
+    month_to: Optional[str] = Query(None, description="Đến tháng (bao gồm), định dạng YYYY-MM"),
+    department_id: Optional[int] = Query(None),
+    employee_id: Optional[int] = Query(None),
+    export_format: str = Query(NDJSON, alias="format", description="ndjson hoặc csv"),
+    has_role=Depends(
+        has_role(required_roles=[Role.ADMIN.value, Role.PAYROLL_MANAGER.value])
+    )
+):
+    chunks = export_attendance(
+        month_from=month_from,
+        month_to=month_to,
+        department_id=department_id,
+        employee_id=employee_id,
+        export_format=export_format,
+    )
+    return export_response(chunks, "attendance", export_format)
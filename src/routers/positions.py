@@ -43,7 +43,6 @@ def get_numbers_of_position_by_department(
 def add_position(
     position: PositionCreate,
     hm_db: Session = Depends(get_sync_hm_db),
-    pr_db: Session = Depends(get_sync_pr_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     )
@@ -51,7 +50,6 @@ def add_position(
     return response(
         data=add_and_sync_position(
             session_human=hm_db, 
-            session_payroll=pr_db, 
             position=position
         )
     )
@@ -62,7 +60,6 @@ def update_position(
     position_id: int,
     position: PositionUpdate,
     hm_db: Session = Depends(get_sync_hm_db),
-    pr_db: Session = Depends(get_sync_pr_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     )
@@ -70,7 +67,6 @@ def update_position(
     return response(
         data=update_and_sync_position(
             session_human=hm_db,
-            session_payroll=pr_db,
             position_id=position_id,
             position=position
         )
@@ -2,13 +2,14 @@ from fastapi import Depends, Query
 from fastapi.routing import APIRouter
 from src.databases.human_db import get_sync_db as get_sync_hm_db
 from src.databases.payroll_db import get_sync_db as get_sync_pr_db
-from src.databases.user_db import get_sync_db as get_sync_user_db
+from src.databases.user_db import get_async_db as get_async_user_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import date
 from typing import Optional
 from src.utils.auth import has_role
 from src.models.user import Role
-from src.utils.auth import oauth2_scheme
+from src.utils.auth import CurrentUser, get_current_user
 
 from src.utils.profile import read_profile_logic, change_password_logic
 
@@ -20,30 +21,27 @@ profile_router = APIRouter(prefix="", tags=["Profile"])
 
 @profile_router.get("/")
 def get_profile(
-    db_user: Session = Depends(get_sync_user_db),
     db_human: Session = Depends(get_sync_hm_db),
     db_payroll: Session = Depends(get_sync_pr_db),
-    token: str = Depends(oauth2_scheme),
+    user: CurrentUser = Depends(get_current_user),
 ):
     return response(
-        data=read_profile_logic(
-            db_user=db_user, db_human=db_human, db_payroll=db_payroll, token=token
-        )
+        data=read_profile_logic(db_human=db_human, db_payroll=db_payroll, user=user)
     )
 
 
 @profile_router.put("/change_password")
-def change_password(
+async def change_password(
     old_password: str,    
     new_password: str,
-    session: Session = Depends(get_sync_user_db),
-    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_user_db),
+    user: CurrentUser = Depends(get_current_user),
 ):
     return response(
         message="Mật khẩu đã được cập nhật thành công",
-        data=change_password_logic(
+        data=await change_password_logic(
             session=session,
-            token=token,
+            current_user=user,
             old_password=old_password,
             new_password=new_password,
         ),
@@ -1,17 +1,25 @@
-from fastapi import Depends, Query
+from fastapi import Depends, Query, Response
 from fastapi.routing import APIRouter
-from src.databases.human_db import get_sync_db as get_sync_hm_db
-from src.databases.payroll_db import get_sync_db as get_sync_pr_db
-from sqlalchemy.orm import Session
+from src.databases.human_db import get_async_db as get_async_hm_db
+from src.databases.payroll_db import get_async_db as get_async_pr_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 from typing import Optional
+import asyncio
 
 from src.utils.reports import (
     get_hr_report_logic,
     get_payroll_report_logic,
+    get_payroll_report_snapshot_logic,
     get_dividend_report_logic,
 )
-from src._utils import response
+from src.utils.payroll_snapshot import (
+    export_snapshot_table,
+    payroll_snapshot,
+    refresh_snapshot,
+)
+from src.utils.notifications import parse_salary_month
+from src._utils import response, run_sync
 from src.utils.auth import has_role 
 from src.models.user import Role
 
@@ -19,34 +27,101 @@ reports_router = APIRouter(prefix="", tags=["Reports"])
 
 
 @reports_router.get("/hr")
-def get_hr_report_endpoint(
-    db: Session = Depends(get_sync_hm_db),
+async def get_hr_report_endpoint(
+    db: AsyncSession = Depends(get_async_hm_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     )
 ):
-    return response(data=get_hr_report_logic(session=db))
+    return response(data=await run_sync(get_hr_report_logic, session=db))
 
 
 @reports_router.get("/payroll")
-def get_payroll_report(
+async def get_payroll_report(
     month: Optional[date] = Query(
         None, description="Tháng báo cáo (format: YYYY-MM)"
     ),
-    db: Session = Depends(get_sync_pr_db),
+    realtime: bool = Query(
+        False, description="Đọc trực tiếp từ database thay vì snapshot Parquet"
+    ),
+    db: AsyncSession = Depends(get_async_pr_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.PAYROLL_MANAGER.value])
     )
 ):
-    return response(data=get_payroll_report_logic(session=db, month=month))
+    # Snapshot còn mới thì đọc dạng cột, không quét bảng salaries trên MySQL
+    if not realtime and payroll_snapshot.is_fresh():
+        return response(
+            data=await asyncio.to_thread(get_payroll_report_snapshot_logic, month),
+            metadata={"source": "snapshot", "snapshot_at": payroll_snapshot.snapshot_at()},
+        )
+    return response(
+        data=await run_sync(get_payroll_report_logic, session=db, month=month),
+        metadata={"source": "database"},
+    )
 
 
 @reports_router.get("/dividend")
-def get_dividend_report_endpoint(
+async def get_dividend_report_endpoint(
     year: Optional[int] = Query(None, description="Năm báo cáo"),
-    db: Session = Depends(get_sync_hm_db),
+    db: AsyncSession = Depends(get_async_hm_db),
     has_role=Depends(
         has_role(required_roles=[Role.ADMIN.value, Role.HR_MANAGER.value])
     )
 ):
-    return response(data=get_dividend_report_logic(session=db, year=year))
+    return response(
+        data=await run_sync(get_dividend_report_logic, session=db, year=year)
+    )
+
+
+@reports_router.get(
+    "/snapshot",
+    description="Trạng thái snapshot Parquet của bảng lương/chấm công (thời điểm cập nhật, số tháng, số dòng)",
+)
+def get_payroll_snapshot_status(
+    has_role=Depends(
+        has_role(required_roles=[Role.ADMIN.value, Role.PAYROLL_MANAGER.value])
+    )
+):
+    return response(data=payroll_snapshot.stats())
+
+
+@reports_router.post(
+    "/snapshot/refresh",
+    description="Cập nhật snapshot ngay (chỉ ghi lại các tháng mới hoặc đã thay đổi)",
+)
+def refresh_payroll_snapshot(
+    has_role=Depends(has_role(required_roles=[Role.ADMIN.value]))
+):
+    return response(
+        data=refresh_snapshot(),
+        message="Đã cập nhật snapshot dữ liệu lương",
+    )
+
+
+@reports_router.get(
+    "/snapshot/{table_name}",
+    description="Tải một bảng snapshot (salaries, attendance, employees, departments) dạng Parquet theo bộ lọc",
+)
+def download_payroll_snapshot(
+    table_name: str,
+    month_from: Optional[str] = Query(None, description="Từ tháng, định dạng YYYY-MM"),
+    month_to: Optional[str] = Query(None, description="Đến tháng (bao gồm), định dạng YYYY-MM"),
+    employee_id: Optional[int] = Query(None),
+    columns: Optional[str] = Query(None, description="Danh sách cột cách nhau bởi dấu phẩy"),
+    has_role=Depends(
+        has_role(required_roles=[Role.ADMIN.value, Role.PAYROLL_MANAGER.value])
+    )
+):
+    content = export_snapshot_table(
+        table_name,
+        month_from=parse_salary_month(month_from) if month_from else None,
+        month_to=parse_salary_month(month_to) if month_to else None,
+        employee_id=employee_id,
+        columns=[name.strip() for name in columns.split(",")] if columns else None,
+    )
+    return Response(
+        content=content,
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": f'attachment; filename="{table_name}.parquet"'},
+    )
@@ -1,8 +1,9 @@
 from sqlalchemy import (
     Column, Integer, String, Date, ForeignKey, Numeric, DateTime,
-    text, NVARCHAR
+    text, NVARCHAR, Index
 )
 from sqlalchemy.orm import relationship, DeclarativeBase
+from datetime import datetime
 
 class Base(DeclarativeBase):
     pass
@@ -59,4 +60,27 @@ class Dividend(Base):
     DividendDate = Column(Date, nullable=False)
     CreatedAt = Column(DateTime, server_default=text("GETDATE()"))
 
-    employee = relationship("Employee", back_populates="dividends")
\ No newline at end of file
+    employee = relationship("Employee", back_populates="dividends")
+
+class IdAllocation(Base):
+    __tablename__ = "IdAllocations"
+
+    EntityName = Column(NVARCHAR(50), primary_key=True)
+    HighWaterMark = Column(Integer, nullable=False)
+    UpdatedAt = Column(DateTime, server_default=text("GETDATE()"))
+
+
+class ReplicationOutbox(Base):
+    __tablename__ = "ReplicationOutbox"
+
+    OutboxID = Column(Integer, primary_key=True, autoincrement=True)
+    EntityType = Column(NVARCHAR(50), nullable=False)
+    EntityID = Column(Integer, nullable=False)
+    Operation = Column(NVARCHAR(10), nullable=False)
+    Payload = Column(NVARCHAR(None))
+    CreatedAt = Column(DateTime, nullable=False, default=datetime.now)
+    ProcessedAt = Column(DateTime)
+    Attempts = Column(Integer, nullable=False, default=0)
+    LastError = Column(NVARCHAR(1000))
+
+    __table_args__ = (Index("IX_ReplicationOutbox_Pending", "ProcessedAt", "OutboxID"),)
@@ -1,5 +1,6 @@
 from sqlalchemy import (
-    Column, Integer, String, Date, ForeignKey, DECIMAL, DateTime, func
+    Column, Integer, String, Date, ForeignKey, DECIMAL, DateTime, func, Index, Text,
+    UniqueConstraint
 )
 from sqlalchemy.orm import relationship, declarative_base
 
@@ -51,6 +52,10 @@ class Attendance(Base):
 
     employee = relationship("Employee", back_populates="attendances")
 
+    __table_args__ = (
+        Index("ix_attendance_month_employee", "AttendanceMonth", "EmployeeID"),
+    )
+
 
 class Salary(Base):
     __tablename__ = 'salaries'
@@ -64,4 +69,93 @@ class Salary(Base):
     NetSalary = Column(DECIMAL(12, 2), nullable=False)
     CreatedAt = Column(DateTime, server_default=func.now())
 
-    employee = relationship("Employee", back_populates="salaries")
\ No newline at end of file
+    employee = relationship("Employee", back_populates="salaries")
+
+
+class Notification(Base):
+    """
+    Thông báo đã tính sẵn (kỷ niệm, nghỉ quá phép, chênh lệch lương); được
+    làm mới bởi bộ lập lịch và các luồng ghi, RefKey phân biệt các thông báo
+    cùng loại của một nhân viên.
+    """
+    __tablename__ = 'notifications'
+
+    NotificationID = Column(Integer, primary_key=True, autoincrement=True)
+    Kind = Column(String(30), nullable=False)
+    EmployeeID = Column(Integer, nullable=False)
+    RefKey = Column(String(40), nullable=False)
+    EventDate = Column(Date, nullable=False)
+    Payload = Column(Text, nullable=False)
+    UpdatedAt = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("Kind", "EmployeeID", "RefKey", name="uq_notifications_kind_employee_ref"),
+        Index("ix_notifications_employee", "EmployeeID"),
+    )
+
+
+class NotificationRead(Base):
+    __tablename__ = 'notification_reads'
+
+    NotificationID = Column(Integer, primary_key=True)
+    Username = Column(String(50), primary_key=True)
+    ReadAt = Column(DateTime, nullable=False)
+
+
+class SalaryEmailJob(Base):
+    """
+    Tác vụ gửi email thông báo lương của một tháng, xử lý nền bởi
+    SalaryEmailWorker; HeartbeatAt dùng để nhận lại tác vụ khi worker dừng giữa chừng.
+    """
+    __tablename__ = 'salary_email_jobs'
+
+    JobID = Column(Integer, primary_key=True, autoincrement=True)
+    SalaryMonth = Column(Date, nullable=False)
+    # Bằng SalaryMonth khi tác vụ chưa xong, NULL khi đã xong: khóa duy nhất trên
+    # cột này đảm bảo mỗi tháng chỉ có một tác vụ đang chờ/đang chạy
+    ActiveMonth = Column(Date)
+    Status = Column(String(20), nullable=False)
+    CreatedBy = Column(String(50))
+    CreatedAt = Column(DateTime, nullable=False)
+    StartedAt = Column(DateTime)
+    HeartbeatAt = Column(DateTime)
+    # Mã của lần nhận tác vụ hiện tại; worker chỉ cập nhật tác vụ khi còn giữ mã này
+    ClaimToken = Column(String(36))
+    FinishedAt = Column(DateTime)
+    Total = Column(Integer, nullable=False, default=0)
+    Sent = Column(Integer, nullable=False, default=0)
+    Failed = Column(Integer, nullable=False, default=0)
+    Skipped = Column(Integer, nullable=False, default=0)
+    LastError = Column(String(1000))
+
+    __table_args__ = (
+        Index("ix_salary_email_jobs_status", "Status", "JobID"),
+        UniqueConstraint("ActiveMonth", name="uq_salary_email_jobs_active_month"),
+    )
+
+
+class SalaryEmailLedger(Base):
+    """
+    Sổ gửi email lương theo (tháng, nhân viên): chạy lại tác vụ cùng tháng bỏ
+    qua các email đã gửi thành công.
+    """
+    __tablename__ = 'salary_email_ledger'
+
+    LedgerID = Column(Integer, primary_key=True, autoincrement=True)
+    SalaryMonth = Column(Date, nullable=False)
+    EmployeeID = Column(Integer, nullable=False)
+    JobID = Column(Integer, nullable=False)
+    Email = Column(String(100), nullable=False)
+    Status = Column(String(20), nullable=False)
+    Attempts = Column(Integer, nullable=False, default=0)
+    NextAttemptAt = Column(DateTime)
+    # Email đang gửi (SENDING) thuộc lần nhận tác vụ nào, nhận lúc nào
+    ClaimToken = Column(String(36))
+    ClaimedAt = Column(DateTime)
+    SentAt = Column(DateTime)
+    LastError = Column(String(1000))
+
+    __table_args__ = (
+        UniqueConstraint("SalaryMonth", "EmployeeID", name="uq_salary_email_ledger_month_employee"),
+        Index("ix_salary_email_ledger_job", "JobID", "Status"),
+    )
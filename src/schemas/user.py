@@ -20,3 +20,12 @@ class User(Base):
     Username: Mapped[str] = mapped_column(String(50), primary_key=True)
     Password: Mapped[str] = mapped_column(String(255), nullable=False)
     Role: Mapped[str] = mapped_column(String(50))
+
+
+class UserTokenVersion(Base):
+    __tablename__ = 'UserTokenVersions'
+
+    # Tăng mỗi khi Role/Employee_id đổi; access token mang phiên bản cũ bị từ chối
+    Username: Mapped[str] = mapped_column(String(50), primary_key=True)
+    Version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    UpdatedAt: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
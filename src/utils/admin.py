@@ -7,18 +7,23 @@ from passlib.context import CryptContext
 from jose import jwt, JWTError
 from pydantic import BaseModel
 from datetime import datetime, timedelta, UTC
+from typing import Optional
 
 from src.models.user import UserCreate, UserUpdate
 from src.schemas.human import Employee as HmEmployee
-from src._utils import hash_password
+from src.utils.auth import invalidate_user_cache, revoke_user_tokens
 
 
 def create_user_account(
-    db_user: Session, db_human: Session, user_data: UserCreate
+    db_user: Session, db_human: Session, user_data: UserCreate, password_hash: str
 ):
+    """
+    password_hash: mật khẩu đã băm sẵn (password_hasher.hash_async ở router),
+    để lỗi 429 của pool băm không bị biến thành 500 và không giữ luồng threadpool.
+    """
     user = User(
         Username=user_data.Username,
-        Password=hash_password(user_data.Password),
+        Password=password_hash,
         Role=user_data.Role.value if hasattr(user_data.Role, 'value') else user_data.Role,
         Employee_id=user_data.Employee_id,
     )
@@ -50,6 +55,7 @@ def create_user_account(
         raise HTTPException(
             status_code=500, detail=f"Có lỗi khi tạo tài khoản: {str(e)}"
         )
+    invalidate_user_cache(user.Username)
     return {
         "username": user.Username,
         "role": user.Role,
@@ -58,17 +64,26 @@ def create_user_account(
 
 
 def update_user_account(
-    db_user: Session, db_human: Session, username: str, user_data: UserUpdate
+    db_user: Session,
+    db_human: Session,
+    username: str,
+    user_data: UserUpdate,
+    password_hash: Optional[str] = None,
 ):
+    """
+    password_hash: mật khẩu mới đã băm sẵn khi user_data.Password có giá trị.
+    """
     user = db_user.query(User).filter(User.Username == username).first()
     if not user:
         raise HTTPException(
             status_code=404, detail="Không tìm thấy tài khoản cần cập nhật"
         )
 
+    old_claims = (user.Role, user.Employee_id)
+
     try:
-        if user_data.Password:
-            user.Password = hash_password(user_data.Password)
+        if password_hash:
+            user.Password = password_hash
         if user_data.Role:
             user.Role = user_data.Role.value if hasattr(user_data.Role, 'value') else user_data.Role
         if user_data.Employee_id:
@@ -82,13 +97,22 @@ def update_user_account(
                     status_code=404, detail="Id nhân viên không tồn tại"
                 )
             user.Employee_id = user_data.Employee_id
+        # Role/Employee_id nằm trong access token: tăng phiên bản token cùng giao dịch
+        # để các token đã phát hành bị từ chối trên mọi worker
+        if (user.Role, user.Employee_id) != old_claims:
+            revoke_user_tokens(db_user, username)
         db_user.commit()
+    except HTTPException:
+        db_user.rollback()
+        raise
     except Exception as e:
         db_user.rollback()
         raise HTTPException(
             status_code=500, detail=f"Có lỗi khi cập nhật tài khoản: {str(e)}"
         )
-    
+    finally:
+        invalidate_user_cache(username)
+
     return {
         "username": user.Username,
         "role": user.Role,
@@ -1,18 +1,24 @@
-from src.schemas.user import User
+from src.schemas.user import User, UserTokenVersion
 from sqlalchemy.orm import Session
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from src.databases.user_db import get_sync_db as get_sync_user_db
-from passlib.context import CryptContext
+from src.databases.user_db import get_async_db as get_async_user_db
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime, timedelta, UTC
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from src._utils import run_sync
+from src.utils.password import password_hasher
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 SECRET_KEY = "gi-cung-duoc"
 ALGORITHM = "HS256"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def authenticate_user(db: Session, username: str, password: str):
@@ -25,7 +31,16 @@ def authenticate_user(db: Session, username: str, password: str):
 
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
+
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str):
+    user = await run_sync(get_user, db=db, username=username)
+    if not user:
+        return False
+    if not await password_hasher.verify_async(password, user.Password):
+        return False
+    return user
 
 
 def get_user(db: Session, username: str):
@@ -37,10 +52,100 @@ class TokenData(BaseModel):
     username: str | None = None
 
 
-def get_current_user(
-    db: Session = Depends(get_sync_user_db),
-    token: str = Depends(oauth2_scheme)
-):
+class CurrentUser(BaseModel):
+    """
+    Thông tin người dùng đã xác thực, dùng chung cho mọi helper trong một request.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    Username: str
+    Role: str | None = None
+    Employee_id: int | None = None
+    TokenVersion: int = 0
+
+
+ACCESS_TOKEN_EXPIRE_MINUTES = 720
+
+
+# Phiên bản token của từng tài khoản lưu ở database Users (bảng UserTokenVersions,
+# tạo khi khởi động qua create_tables). Khi Role/Employee_id thay đổi, phiên bản
+# tăng và access token mang phiên bản cũ bị từ chối. Request chỉ đọc phiên bản qua
+# token_version_cache, nên worker khác nhận thay đổi chậm nhất
+# TOKEN_VERSION_CACHE_TTL_SECONDS; Role/Employee_id lấy từ claim đã ký trong token.
+TOKEN_VERSION_CACHE_TTL_SECONDS = 60
+TOKEN_VERSION_CACHE_MAX_SIZE = 4096
+
+
+class TokenVersionCache:
+    """
+    Cache phiên bản token theo tài khoản (TTL + LRU), dùng chung giữa các request.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._items: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, username: str) -> int | None:
+        with self._lock:
+            item = self._items.get(username)
+            if item is None:
+                return None
+            expires_at, version = item
+            if expires_at < monotonic():
+                del self._items[username]
+                return None
+            self._items.move_to_end(username)
+            return version
+
+    def set(self, username: str, version: int) -> None:
+        with self._lock:
+            self._items[username] = (monotonic() + self.ttl_seconds, version)
+            self._items.move_to_end(username)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, username: str) -> None:
+        with self._lock:
+            self._items.pop(username, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+token_version_cache = TokenVersionCache(
+    TOKEN_VERSION_CACHE_TTL_SECONDS, TOKEN_VERSION_CACHE_MAX_SIZE
+)
+
+
+def invalidate_user_cache(username: str) -> None:
+    token_version_cache.invalidate(username)
+
+
+def get_token_version(db: Session, username: str) -> int:
+    version = db.execute(
+        select(UserTokenVersion.Version).where(UserTokenVersion.Username == username)
+    ).scalar()
+    return version or 0
+
+
+def revoke_user_tokens(db: Session, username: str) -> None:
+    """
+    Tăng phiên bản token của tài khoản; ghi cùng giao dịch của nơi gọi (chưa commit).
+    """
+    result = db.execute(
+        update(UserTokenVersion)
+        .where(UserTokenVersion.Username == username)
+        .values(Version=UserTokenVersion.Version + 1)
+    )
+    if not result.rowcount:
+        db.add(UserTokenVersion(Username=username, Version=1))
+
+
+def decode_token(token: str) -> dict:
     credentials_exception = HTTPException(
         status_code=401,
         detail="Không thể xác thực tài khoản",
@@ -52,20 +157,94 @@ def get_current_user(
         username: str = payload.get("sub")
         if username is None or username == "":
             raise credentials_exception
-        token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
 
-    user = get_user(db, token_data.username)
+    return payload
+
+
+def _revoked() -> HTTPException:
+    return HTTPException(
+        status_code=401,
+        detail="Token đã bị thu hồi, vui lòng đăng nhập lại",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def load_user(db: Session, username: str) -> CurrentUser:
+    """
+    Đọc thông tin người dùng từ database để cấp token (đăng nhập, làm mới token).
+    """
+    db_user = get_user(db, username)
+    if db_user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Không thể xác thực tài khoản",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    version = get_token_version(db, username)
+    token_version_cache.set(username, version)
+    return CurrentUser(
+        Username=db_user.Username,
+        Role=db_user.Role,
+        Employee_id=db_user.Employee_id,
+        TokenVersion=version,
+    )
+
+
+def get_user_from_token(db: Session, token: str) -> CurrentUser:
+    # Dùng khi cấp token mới: đọc thẳng database để token mang Role/phiên bản hiện tại
+    payload = decode_token(token)
+    return load_user(db, payload["sub"])
+
+
+def user_from_claims(payload: dict) -> CurrentUser:
+    # Token phát hành trước khi có claim role/ver không đủ thông tin phân quyền
+    if "ver" not in payload:
+        raise _revoked()
+    return CurrentUser(
+        Username=payload["sub"],
+        Role=payload.get("role"),
+        Employee_id=payload.get("employee_id"),
+        TokenVersion=payload["ver"],
+    )
+
+
+async def get_current_user(
+    request: Request,
+    db: AsyncSession = Depends(get_async_user_db),
+    token: str = Depends(oauth2_scheme)
+) -> CurrentUser:
+    # Ghi nhớ người dùng trên request để các dependency/helper sau dùng lại
+    user = getattr(request.state, "current_user", None)
     if user is None:
-        raise credentials_exception
+        user = user_from_claims(decode_token(token))
+        # Chỉ một truy vấn theo khóa chính khi cache hết hạn; Role lấy từ claim đã ký
+        version = token_version_cache.get(user.Username)
+        if version is None:
+            version = await run_sync(get_token_version, db=db, username=user.Username)
+            token_version_cache.set(user.Username, version)
+        if user.TokenVersion != version:
+            raise _revoked()
+        request.state.current_user = user
     return user
 
 
+def token_claims(user: CurrentUser) -> dict:
+    return {
+        "sub": user.Username,
+        "role": user.Role,
+        "employee_id": user.Employee_id,
+        "ver": user.TokenVersion,
+    }
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.now(UTC) + timedelta(minutes=720)
-    to_encode.update({"exp": expire})
+    now = datetime.now(UTC)
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -80,7 +259,7 @@ def create_refresh_token(data: dict):
 
 
 def has_role(required_roles: list[str]):
-    def check_role(user: User = Depends(get_current_user)):
+    async def check_role(user: CurrentUser = Depends(get_current_user)):
         if user.Role not in required_roles:
             raise HTTPException(
                 status_code=403,
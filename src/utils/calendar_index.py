@@ -0,0 +1,175 @@
+from sqlalchemy.orm import Session
+
+import asyncio
+from bisect import bisect_left, insort
+from calendar import isleap
+from dataclasses import dataclass
+from datetime import date, timedelta
+from threading import RLock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.core.config import search_index_conf
+from src.databases.human_db import SessionLocal as HumanSessionLocal
+from ..schemas.human import Employee as HmEmployee
+
+# Khóa ngày-tháng dạng MMDD (29/02 -> 229), sắp xếp đúng thứ tự trong năm
+FEB_28 = 228
+FEB_29 = 229
+
+
+def month_day_key(value: date) -> int:
+    return value.month * 100 + value.day
+
+
+def occurrence_date(year: int, key: int) -> date:
+    """
+    Ngày của khóa MMDD trong năm year; 29/02 rơi vào 28/02 ở năm không nhuận.
+    """
+    month, day = divmod(key, 100)
+    if key == FEB_29 and not isleap(year):
+        day = 28
+    return date(year, month, day)
+
+
+def _year_segments(start: date, end: date) -> Iterator[Tuple[int, int, int]]:
+    """
+    Tách khoảng [start, end] thành các đoạn khóa MMDD liên tục theo từng năm.
+    """
+    for year in range(start.year, end.year + 1):
+        lo = month_day_key(start) if year == start.year else month_day_key(date(year, 1, 1))
+        hi = month_day_key(end) if year == end.year else month_day_key(date(year, 12, 31))
+        # Năm không nhuận: người sinh/vào làm ngày 29/02 được tính vào 28/02
+        if hi == FEB_28 and not isleap(year):
+            hi = FEB_29
+        yield year, lo, hi
+
+
+def _discard(keys: List[Tuple[int, int]], item: Tuple[int, int]) -> None:
+    i = bisect_left(keys, item)
+    if i < len(keys) and keys[i] == item:
+        del keys[i]
+
+
+@dataclass
+class CalendarEntry:
+    EmployeeID: int
+    FullName: str
+    HireDate: Optional[date]
+    DateOfBirth: Optional[date]
+
+
+class CalendarIndex:
+    """
+    Chỉ mục ngày kỷ niệm vào làm và sinh nhật nhân viên trong bộ nhớ.
+
+    Mỗi loại ngày là một mảng (MMDD, EmployeeID) đã sắp xếp, nên câu hỏi
+    "ai có ngày này trong N ngày tới" chỉ cần bisect hai đầu cho mỗi năm
+    mà khoảng đi qua rồi cắt list: O(log n + k).
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self.ready = False
+        self._entries: Dict[int, CalendarEntry] = {}
+        self._hire_keys: List[Tuple[int, int]] = []
+        self._birth_keys: List[Tuple[int, int]] = []
+
+    def rebuild(self, session: Session) -> None:
+        employees = session.query(
+            HmEmployee.EmployeeID,
+            HmEmployee.FullName,
+            HmEmployee.HireDate,
+            HmEmployee.DateOfBirth,
+        ).all()
+
+        entries = {row.EmployeeID: CalendarEntry(*row) for row in employees}
+        hire_keys = sorted(
+            (month_day_key(e.HireDate), e.EmployeeID) for e in entries.values() if e.HireDate
+        )
+        birth_keys = sorted(
+            (month_day_key(e.DateOfBirth), e.EmployeeID)
+            for e in entries.values()
+            if e.DateOfBirth
+        )
+
+        with self._lock:
+            self._entries = entries
+            self._hire_keys = hire_keys
+            self._birth_keys = birth_keys
+            self.ready = True
+
+    def upsert(
+        self,
+        employee_id: int,
+        full_name: str,
+        hire_date: Optional[date],
+        date_of_birth: Optional[date],
+    ) -> None:
+        with self._lock:
+            self._remove(employee_id)
+            self._entries[employee_id] = CalendarEntry(
+                employee_id, full_name, hire_date, date_of_birth
+            )
+            if hire_date:
+                insort(self._hire_keys, (month_day_key(hire_date), employee_id))
+            if date_of_birth:
+                insort(self._birth_keys, (month_day_key(date_of_birth), employee_id))
+
+    def remove(self, employee_id: int) -> None:
+        with self._lock:
+            self._remove(employee_id)
+
+    def _remove(self, employee_id: int) -> None:
+        entry = self._entries.pop(employee_id, None)
+        if entry is None:
+            return
+        if entry.HireDate:
+            _discard(self._hire_keys, (month_day_key(entry.HireDate), employee_id))
+        if entry.DateOfBirth:
+            _discard(self._birth_keys, (month_day_key(entry.DateOfBirth), employee_id))
+
+    def upcoming_hire_dates(self, start: date, window_days: int) -> List[Tuple[date, CalendarEntry]]:
+        return self._upcoming("_hire_keys", start, window_days)
+
+    def upcoming_birthdays(self, start: date, window_days: int) -> List[Tuple[date, CalendarEntry]]:
+        return self._upcoming("_birth_keys", start, window_days)
+
+    def _upcoming(
+        self, keys_attr: str, start: date, window_days: int
+    ) -> List[Tuple[date, CalendarEntry]]:
+        """
+        (ngày sắp tới, nhân viên) trong [start, start + window_days], theo thứ tự ngày.
+        """
+        end = start + timedelta(days=window_days)
+        hits = []
+        with self._lock:
+            # Lấy mảng trong khóa: rebuild thay cả mảng lẫn _entries cùng lúc
+            keys = getattr(self, keys_attr)
+            for year, lo, hi in _year_segments(start, end):
+                i = bisect_left(keys, (lo,))
+                j = bisect_left(keys, (hi + 1,))
+                hits.extend(
+                    (occurrence_date(year, key), self._entries[employee_id])
+                    for key, employee_id in keys[i:j]
+                )
+        return hits
+
+
+calendar_index = CalendarIndex()
+
+
+def build_calendar_index() -> None:
+    with HumanSessionLocal() as session:
+        calendar_index.rebuild(session)
+
+
+async def run_calendar_index_refresher() -> None:
+    """
+    Dựng chỉ mục khi khởi động rồi nạp lại định kỳ, cùng chu kỳ với chỉ mục tìm kiếm.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(build_calendar_index)
+        except Exception as e:
+            print(f"Lỗi khi dựng chỉ mục ngày kỷ niệm/sinh nhật: {str(e)}")
+        await asyncio.sleep(search_index_conf.EMPLOYEE_INDEX_REFRESH_SECONDS)
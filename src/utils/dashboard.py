@@ -1,19 +1,15 @@
-from sqlalchemy import delete, func, desc
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy.future import select
+from sqlalchemy import func, desc
+from sqlalchemy.orm import Session
 
-from fastapi import HTTPException
+from typing import Optional, Dict, Any, Tuple
 
-from typing import Optional, List, Dict, Any
-from datetime import date, datetime, timedelta
-
-from .auth import get_current_user
+from .auth import CurrentUser
+from .dashboard_cache import ATTENDANCE, DEPARTMENTS, EMPLOYEES, SALARIES
+from .dashboard_runner import HUMAN, PAYROLL, DashboardSection, run_dashboard
 
 from ..schemas.human import (
     Department as HmDepartment,
     Employee as HmEmployee,
-    Dividend as HmDividend,
-    Position as HmPosition,
 )
 from ..schemas.payroll import (
     Department as PrDepartment,
@@ -23,58 +19,49 @@ from ..schemas.payroll import (
     Position as PrPosition,
 )
 
-from ..utils.notifications import (
-    upcoming_anniversaries,
-    absent_days_warning,
-    absent_days_warning_personal,
-    salary_gap_warning,
-    salary_gap_warning_personal,
-)
+from ..models.user import Role
+from ..utils.notifications import ROLE_NOTIFICATIONS
+from ..utils.notification_store import notification_counts
 
 
-def admin_dashboard_data_logic(
-    session_human: Session, session_payroll: Session, session_user: Session, token: str
-):
-    try:
-        total_employees = session_human.query(
-            func.count(HmEmployee.EmployeeID)
-        ).scalar()
+# Mỗi widget chạy với session riêng (xem dashboard_runner); session của
+# database không khai báo trong DashboardSection là None. Các widget số liệu
+# toàn công ty (shared) dùng chung snapshot trong dashboard_cache.
+
 
-        number_of_departments = session_human.query(
+def total_employees_section(user: CurrentUser, session_human: Session, session_payroll: Optional[Session]):
+    return {
+        "total_employees": session_human.query(func.count(HmEmployee.EmployeeID)).scalar()
+    }
+
+
+def number_of_departments_section(user: CurrentUser, session_human: Session, session_payroll: Optional[Session]):
+    return {
+        "number_of_departments": session_human.query(
             func.count(HmDepartment.DepartmentID)
         ).scalar()
+    }
 
-        payroll_total = session_payroll.query(func.sum(PrSalary.NetSalary)).scalar()
-
-        number_of_notifications = (
-            int(upcoming_anniversaries(session_human)["count"])
-            + int(absent_days_warning(session_payroll)["count"])
-            + int(
-                absent_days_warning_personal(session_user, session_payroll, token)[
-                    "count"
-                ]
-            )
-            + int(salary_gap_warning(session_payroll)["count"])
-            + int(
-                salary_gap_warning_personal(session_user, session_payroll, token)[
-                    "count"
-                ]
-            )
-        )
 
-        distribution_query = (
-            session_human.query(
-                HmDepartment.DepartmentID,
-                HmDepartment.DepartmentName,
-                func.count(HmEmployee.EmployeeID).label("Employee_count"),
-            )
-            .join(HmEmployee, HmDepartment.DepartmentID == HmEmployee.DepartmentID)
-            .group_by(HmDepartment.DepartmentID, HmDepartment.DepartmentName)
-        )
+def payroll_total_section(user: CurrentUser, session_human: Optional[Session], session_payroll: Session):
+    payroll_total = session_payroll.query(func.sum(PrSalary.NetSalary)).scalar()
+    return {"payroll_total": float(payroll_total) if payroll_total else 0}
 
-        results = distribution_query.order_by(desc("Employee_count")).all()
 
-        department_distribution = [
+def department_distribution_section(user: CurrentUser, session_human: Session, session_payroll: Optional[Session]):
+    results = (
+        session_human.query(
+            HmDepartment.DepartmentID,
+            HmDepartment.DepartmentName,
+            func.count(HmEmployee.EmployeeID).label("Employee_count"),
+        )
+        .join(HmEmployee, HmDepartment.DepartmentID == HmEmployee.DepartmentID)
+        .group_by(HmDepartment.DepartmentID, HmDepartment.DepartmentName)
+        .order_by(desc("Employee_count"))
+        .all()
+    )
+    return {
+        "department_distribution": [
             {
                 "DepartmentID": dept_id,
                 "DepartmentName": dept_name,
@@ -82,19 +69,22 @@ def admin_dashboard_data_logic(
             }
             for dept_id, dept_name, emp_count in results
         ]
+    }
 
-        attendance_query = (
-            session_payroll.query(
-                PrAttendance.AttendanceMonth,
-                func.sum(PrAttendance.AbsentDays).label("AbsentDays"),
-                func.sum(PrAttendance.LeaveDays).label("LeaveDays"),
-                func.sum(PrAttendance.WorkDays).label("WorkDays"),
-            )
-            .group_by(PrAttendance.AttendanceMonth)
-            .all()
-        )
 
-        attendance_overview = [
+def attendance_overview_section(user: CurrentUser, session_human: Optional[Session], session_payroll: Session):
+    attendance_query = (
+        session_payroll.query(
+            PrAttendance.AttendanceMonth,
+            func.sum(PrAttendance.AbsentDays).label("AbsentDays"),
+            func.sum(PrAttendance.LeaveDays).label("LeaveDays"),
+            func.sum(PrAttendance.WorkDays).label("WorkDays"),
+        )
+        .group_by(PrAttendance.AttendanceMonth)
+        .all()
+    )
+    return {
+        "attendance_overview": [
             {
                 "AttendanceMonth": attendance.AttendanceMonth,
                 "AbsentDays": attendance.AbsentDays,
@@ -103,249 +93,159 @@ def admin_dashboard_data_logic(
             }
             for attendance in attendance_query
         ]
-        return {
-            "total_employees": total_employees,
-            "number_of_departments": number_of_departments,
-            "payroll_total": float(payroll_total) if payroll_total else 0,
-            "number_of_notifications": number_of_notifications,
-            "department_distribution": department_distribution,
-            "attendance_overview": attendance_overview,
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-def hr_dashboard_data_logic(
-    session_human: Session, session_payroll: Session, session_user: Session, token: str
-):
-    try:
-        user = get_current_user(session_user, token)
-
-        total_employees = session_human.query(
-            func.count(HmEmployee.EmployeeID)
-        ).scalar()
+    }
 
-        number_of_departments = session_human.query(
-            func.count(HmDepartment.DepartmentID)
-        ).scalar()
 
-        last_month_payroll = (
-            session_payroll.query(PrSalary)
-            .filter(PrSalary.EmployeeID == user.Employee_id)
-            .order_by(PrSalary.SalaryMonth.desc())
-            .first()
-        )
+def _last_month_payroll(session_payroll: Session, employee_id: Optional[int]):
+    return (
+        session_payroll.query(PrSalary)
+        .filter(PrSalary.EmployeeID == employee_id)
+        .order_by(PrSalary.SalaryMonth.desc())
+        .first()
+    )
 
-        number_of_notifications = (
-            int(upcoming_anniversaries(session_human)["count"])
-            + int(absent_days_warning(session_payroll)["count"])
-            + int(
-                absent_days_warning_personal(session_user, session_payroll, token)[
-                    "count"
-                ]
-            )
-            + int(
-                salary_gap_warning_personal(session_user, session_payroll, token)[
-                    "count"
-                ]
-            )
-        )
-        distribution_query = (
-            session_human.query(
-                HmDepartment.DepartmentID,
-                HmDepartment.DepartmentName,
-                func.count(HmEmployee.EmployeeID).label("Employee_count"),
-            )
-            .join(HmEmployee, HmDepartment.DepartmentID == HmEmployee.DepartmentID)
-            .group_by(HmDepartment.DepartmentID, HmDepartment.DepartmentName)
-        )
-
-        results = distribution_query.order_by(desc("Employee_count")).all()
-
-        department_distribution = [
-            {
-                "DepartmentID": dept_id,
-                "DepartmentName": dept_name,
-                "Employee_count": emp_count,
-            }
-            for dept_id, dept_name, emp_count in results
-        ]
 
-        attendance_query = (
-            session_payroll.query(
-                PrAttendance.AttendanceMonth,
-                func.sum(PrAttendance.AbsentDays).label("AbsentDays"),
-                func.sum(PrAttendance.LeaveDays).label("LeaveDays"),
-                func.sum(PrAttendance.WorkDays).label("WorkDays"),
-            )
-            .group_by(PrAttendance.AttendanceMonth)
-            .all()
-        )
-
-        attendance_overview = [
-            {
-                "AttendanceMonth": attendance.AttendanceMonth,
-                "AbsentDays": attendance.AbsentDays,
-                "LeaveDays": attendance.LeaveDays,
-                "WorkDays": attendance.WorkDays,
-            }
-            for attendance in attendance_query
-        ]
-        return {
-            "total_employees": total_employees,
-            "number_of_departments": number_of_departments,
-            "last_month_payroll": (
-                float(last_month_payroll.NetSalary) if last_month_payroll else None
-            ),
-            "number_of_notifications": number_of_notifications,
-            "department_distribution": department_distribution,
-            "attendance_overview": attendance_overview,
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-def payroll_dashboard_data_logic(
-    session_human: Session, session_payroll: Session, session_user: Session, token: str
-):
-    try:
-        user = get_current_user(session_user, token)
-        employee = (
-            session_payroll.query(PrEmployee)
-            .filter(PrEmployee.EmployeeID == user.Employee_id)
-            .first()
+def last_month_payroll_section(user: CurrentUser, session_human: Optional[Session], session_payroll: Session):
+    last_month_payroll = _last_month_payroll(session_payroll, user.Employee_id)
+    return {
+        "last_month_payroll": (
+            float(last_month_payroll.NetSalary) if last_month_payroll else None
         )
+    }
 
-        payroll_total = session_payroll.query(func.sum(PrSalary.NetSalary)).scalar()
-
-        number_of_notifications = (
-            int(upcoming_anniversaries(session_human)["count"])
-            + int(
-                salary_gap_warning_personal(session_user, session_payroll, token)[
-                    "count"
-                ]
-            )
-            + int(
-                absent_days_warning_personal(session_user, session_payroll, token)[
-                    "count"
-                ]
-            )
-            + int(salary_gap_warning(session_payroll)["count"])
-        )
-        current_department = (
-            session_payroll.query(PrDepartment)
-            .filter(PrDepartment.DepartmentID == employee.DepartmentID)
-            .first()
-        )
 
-        current_position = (
-            session_payroll.query(PrPosition)
-            .filter(PrPosition.PositionID == employee.PositionID)
-            .first()
+def notifications_section(role: str, total_key: str, unread_key: str) -> DashboardSection:
+    def section(user: CurrentUser, session_human: Session, session_payroll: Session):
+        notifications = notification_counts(
+            session_human,
+            session_payroll,
+            user,
+            kinds=ROLE_NOTIFICATIONS[role],
         )
-
-        salary_query = (
-            session_payroll.query(
-                PrSalary.SalaryMonth, func.sum(PrSalary.NetSalary).label("TotalSalary")
-            )
-            .group_by(PrSalary.SalaryMonth)
-            .all()
+        return {total_key: notifications["total"], unread_key: notifications["unread"]}
+
+    return DashboardSection(
+        "notifications",
+        section,
+        (HUMAN, PAYROLL),
+        {total_key: None, unread_key: None},
+    )
+
+
+def _department_and_position(session_payroll: Session, department_id, position_id) -> Tuple[Any, Any]:
+    current_department = (
+        session_payroll.query(PrDepartment)
+        .filter(PrDepartment.DepartmentID == department_id)
+        .first()
+    )
+    current_position = (
+        session_payroll.query(PrPosition)
+        .filter(PrPosition.PositionID == position_id)
+        .first()
+    )
+    return current_department, current_position
+
+
+def payroll_profile_section(user: CurrentUser, session_human: Optional[Session], session_payroll: Session):
+    employee = (
+        session_payroll.query(PrEmployee)
+        .filter(PrEmployee.EmployeeID == user.Employee_id)
+        .first()
+    )
+    current_department, current_position = _department_and_position(
+        session_payroll, employee.DepartmentID, employee.PositionID
+    )
+    return {
+        "EmployeeID": employee.EmployeeID if employee.EmployeeID else None,
+        "current_department": (
+            current_department.DepartmentName if current_department else None
+        ),
+        "current_position": (
+            current_position.PositionName if current_position else None
+        ),
+    }
+
+
+def salary_distribution_section(user: CurrentUser, session_human: Optional[Session], session_payroll: Session):
+    salary_query = (
+        session_payroll.query(
+            PrSalary.SalaryMonth, func.sum(PrSalary.NetSalary).label("TotalSalary")
         )
-
-        salary_distribution = [
+        .group_by(PrSalary.SalaryMonth)
+        .all()
+    )
+    return {
+        "salary_distribution": [
             {
                 "SalaryMonth": salary.SalaryMonth,
                 "TotalSalary": salary.TotalSalary,
             }
             for salary in salary_query
         ]
-        return {
-            "EmployeeID": employee.EmployeeID if employee.EmployeeID else None,
-            "payroll_total": float(payroll_total) if payroll_total else 0,
-            "current_department": (
-                current_department.DepartmentName if current_department else None
-            ),
-            "current_position": (
-                current_position.PositionName if current_position else None
-            ),
-            "number_of_notifications": number_of_notifications,
-            "salary_distribution": salary_distribution,
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-def employee_dashboard_data_logic(
-    session_human: Session, session_payroll: Session, session_user: Session, token: str
-):
-    try:
-        user = get_current_user(session_user, token)
-        employee = (
-            session_human.query(HmEmployee)
-            .filter(HmEmployee.EmployeeID == user.Employee_id)
-            .first()
+    }
+
+
+def employee_profile_section(user: CurrentUser, session_human: Session, session_payroll: Session):
+    employee = (
+        session_human.query(HmEmployee)
+        .filter(HmEmployee.EmployeeID == user.Employee_id)
+        .first()
+    )
+    current_department, current_position = _department_and_position(
+        session_payroll, employee.DepartmentID, employee.PositionID
+    )
+    return {
+        "EmployeeID": employee.EmployeeID if employee.EmployeeID else None,
+        "CurrentDepartment": (
+            current_department.DepartmentName if current_department else None
+        ),
+        "CurrentPosition": (
+            current_position.PositionName if current_position else None
+        ),
+    }
+
+
+def employee_last_month_payroll_section(user: CurrentUser, session_human: Optional[Session], session_payroll: Session):
+    last_month_payroll = _last_month_payroll(session_payroll, user.Employee_id)
+    return {
+        "LastMonthPayroll": (
+            last_month_payroll.NetSalary if last_month_payroll else None
         )
+    }
 
-        last_month_payroll = (
-            session_payroll.query(PrSalary)
-            .filter(PrSalary.EmployeeID == employee.EmployeeID)
-            .order_by(PrSalary.SalaryMonth.desc())
-            .first()
-        )
-
-        number_of_notifications = (
-            int(upcoming_anniversaries(session_human)["count"])
-            + int(
-                absent_days_warning_personal(session_user, session_payroll, token)[
-                    "count"
-                ]
-            )
-            + int(
-                salary_gap_warning_personal(session_user, session_payroll, token)[
-                    "count"
-                ]
-            )
-        )
-        current_department = (
-            session_payroll.query(PrDepartment)
-            .filter(PrDepartment.DepartmentID == employee.DepartmentID)
-            .first()
-        )
 
-        current_position = (
-            session_payroll.query(PrPosition)
-            .filter(PrPosition.PositionID == employee.PositionID)
-            .first()
+def employee_salary_distribution_section(user: CurrentUser, session_human: Optional[Session], session_payroll: Session):
+    salary_query = (
+        session_payroll.query(
+            PrSalary.EmployeeID,
+            PrSalary.SalaryMonth,
+            func.sum(PrSalary.NetSalary).label("TotalSalary"),
         )
-
-        salary_query = (
-            session_payroll.query(
-                PrSalary.EmployeeID,
-                PrSalary.SalaryMonth,
-                func.sum(PrSalary.NetSalary).label("TotalSalary"),
-            )
-            .filter(PrSalary.EmployeeID == employee.EmployeeID)
-            .group_by(PrSalary.EmployeeID, PrSalary.SalaryMonth)
-            .all()
-        )
-
-        salary_distribution = [
+        .filter(PrSalary.EmployeeID == user.Employee_id)
+        .group_by(PrSalary.EmployeeID, PrSalary.SalaryMonth)
+        .all()
+    )
+    return {
+        "SalaryDistribution": [
             {
                 "SalaryMonth": salary.SalaryMonth,
                 "TotalSalary": salary.TotalSalary,
             }
             for salary in salary_query
         ]
-
-        attendance_query = (
-            session_payroll.query(PrAttendance)
-            .filter(PrAttendance.EmployeeID == employee.EmployeeID)
-            .order_by(PrAttendance.AttendanceMonth.desc())
-            .limit(3)
-            .all()
-        )
-
-        attendance_overview = [
+    }
+
+
+def employee_attendance_overview_section(user: CurrentUser, session_human: Optional[Session], session_payroll: Session):
+    attendance_query = (
+        session_payroll.query(PrAttendance)
+        .filter(PrAttendance.EmployeeID == user.Employee_id)
+        .order_by(PrAttendance.AttendanceMonth.desc())
+        .limit(3)
+        .all()
+    )
+    return {
+        "AttendanceOverview": [
             {
                 "AttendanceMonth": attendance.AttendanceMonth,
                 "AbsentDays": attendance.AbsentDays,
@@ -354,21 +254,89 @@ def employee_dashboard_data_logic(
             }
             for attendance in attendance_query
         ]
+    }
+
+
+TOTAL_EMPLOYEES = DashboardSection(
+    "total_employees", total_employees_section, (HUMAN,), {"total_employees": None},
+    shared=True, tags=(EMPLOYEES,),
+)
+NUMBER_OF_DEPARTMENTS = DashboardSection(
+    "number_of_departments", number_of_departments_section, (HUMAN,), {"number_of_departments": None},
+    shared=True, tags=(DEPARTMENTS,),
+)
+PAYROLL_TOTAL = DashboardSection(
+    "payroll_total", payroll_total_section, (PAYROLL,), {"payroll_total": None},
+    shared=True, tags=(SALARIES,),
+)
+DEPARTMENT_DISTRIBUTION = DashboardSection(
+    "department_distribution", department_distribution_section, (HUMAN,), {"department_distribution": []},
+    shared=True, tags=(EMPLOYEES, DEPARTMENTS),
+)
+ATTENDANCE_OVERVIEW = DashboardSection(
+    "attendance_overview", attendance_overview_section, (PAYROLL,), {"attendance_overview": []},
+    shared=True, tags=(ATTENDANCE,),
+)
+SALARY_DISTRIBUTION = DashboardSection(
+    "salary_distribution", salary_distribution_section, (PAYROLL,), {"salary_distribution": []},
+    shared=True, tags=(SALARIES,),
+)
 
-        return {
-            "EmployeeID": employee.EmployeeID if employee.EmployeeID else None,
-            "LastMonthPayroll": (
-                last_month_payroll.NetSalary if last_month_payroll else None
-            ),
-            "CurrentDepartment": (
-                current_department.DepartmentName if current_department else None
-            ),
-            "CurrentPosition": (
-                current_position.PositionName if current_position else None
-            ),
-            "NumberOfNotifications": number_of_notifications,
-            "SalaryDistribution": salary_distribution,
-            "AttendanceOverview": attendance_overview,
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+ADMIN_DASHBOARD = [
+    TOTAL_EMPLOYEES,
+    NUMBER_OF_DEPARTMENTS,
+    PAYROLL_TOTAL,
+    notifications_section(Role.ADMIN.value, "number_of_notifications", "number_of_unread_notifications"),
+    DEPARTMENT_DISTRIBUTION,
+    ATTENDANCE_OVERVIEW,
+]
+
+HR_DASHBOARD = [
+    TOTAL_EMPLOYEES,
+    NUMBER_OF_DEPARTMENTS,
+    DashboardSection("last_month_payroll", last_month_payroll_section, (PAYROLL,), {"last_month_payroll": None}),
+    notifications_section(Role.HR_MANAGER.value, "number_of_notifications", "number_of_unread_notifications"),
+    DEPARTMENT_DISTRIBUTION,
+    ATTENDANCE_OVERVIEW,
+]
+
+PAYROLL_DASHBOARD = [
+    DashboardSection(
+        "profile",
+        payroll_profile_section,
+        (PAYROLL,),
+        {"EmployeeID": None, "current_department": None, "current_position": None},
+    ),
+    PAYROLL_TOTAL,
+    notifications_section(Role.PAYROLL_MANAGER.value, "number_of_notifications", "number_of_unread_notifications"),
+    SALARY_DISTRIBUTION,
+]
+
+EMPLOYEE_DASHBOARD = [
+    DashboardSection(
+        "profile",
+        employee_profile_section,
+        (HUMAN, PAYROLL),
+        {"EmployeeID": None, "CurrentDepartment": None, "CurrentPosition": None},
+    ),
+    DashboardSection("last_month_payroll", employee_last_month_payroll_section, (PAYROLL,), {"LastMonthPayroll": None}),
+    notifications_section(Role.EMPLOYEE.value, "NumberOfNotifications", "NumberOfUnreadNotifications"),
+    DashboardSection("salary_distribution", employee_salary_distribution_section, (PAYROLL,), {"SalaryDistribution": []}),
+    DashboardSection("attendance_overview", employee_attendance_overview_section, (PAYROLL,), {"AttendanceOverview": []}),
+]
+
+
+async def admin_dashboard_data_logic(user: CurrentUser) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return await run_dashboard(ADMIN_DASHBOARD, user)
+
+
+async def hr_dashboard_data_logic(user: CurrentUser) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return await run_dashboard(HR_DASHBOARD, user)
+
+
+async def payroll_dashboard_data_logic(user: CurrentUser) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return await run_dashboard(PAYROLL_DASHBOARD, user)
+
+
+async def employee_dashboard_data_logic(user: CurrentUser) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return await run_dashboard(EMPLOYEE_DASHBOARD, user)
@@ -0,0 +1,185 @@
+import asyncio
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from src.core.config import dashboard_conf
+
+# Nhãn dữ liệu nguồn của các widget dùng chung; luồng ghi báo nhãn đã thay đổi
+EMPLOYEES = "employees"
+DEPARTMENTS = "departments"
+SALARIES = "salaries"
+ATTENDANCE = "attendance"
+
+
+class _Snapshot:
+    __slots__ = ("values", "computed_at", "generation")
+
+    def __init__(self, values: Dict[str, Any], generation: int):
+        self.values = values
+        self.computed_at = monotonic()
+        self.generation = generation
+
+
+class DashboardSnapshotCache:
+    """
+    Cache dùng chung cho các widget dashboard giống nhau với mọi người dùng
+    (số liệu toàn công ty), theo kiểu stale-while-revalidate.
+
+    - Snapshot còn hạn (dưới ttl_seconds và chưa bị invalidate): trả ngay.
+    - Snapshot cũ: vẫn trả ngay và khởi động một lần làm mới nền duy nhất cho
+      widget đó; các request đồng thời không tính lại trùng.
+    - Chưa có snapshot: request đầu tiên tính, các request khác chờ cùng kết quả.
+
+    Mỗi widget gắn các nhãn dữ liệu nguồn; invalidate(nhãn) tăng generation của
+    các widget liên quan trong tiến trình này. Lần làm mới bắt đầu trước khi ghi vẫn được lưu nhưng
+    bị coi là cũ, request sau sẽ làm mới lại.
+    """
+
+    def __init__(self, ttl_seconds: float, refresh_timeout: float):
+        self.ttl_seconds = ttl_seconds
+        self.refresh_timeout = refresh_timeout
+        self._lock = Lock()
+        self._tags: Dict[str, frozenset] = {}
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._generations: Dict[str, int] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._invalidations = 0
+        self._last_error: Optional[str] = None
+
+    def _is_fresh(self, key: str, snapshot: _Snapshot) -> bool:
+        return (
+            snapshot.generation == self._generations.get(key, 0)
+            and monotonic() - snapshot.computed_at < self.ttl_seconds
+        )
+
+    async def _refresh(
+        self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        with self._lock:
+            generation = self._generations.get(key, 0)
+        started = monotonic()
+        try:
+            # Không dùng wait_for: CancelledError rơi vào giữa lúc driver đang chạy
+            # truy vấn có thể trả kết nối hỏng về pool. Widget luôn chạy hết và giữ
+            # chỗ làm mới tới khi xong, nên không có lần tính trùng chồng lên
+            values = await compute()
+            elapsed = monotonic() - started
+            if elapsed > self.refresh_timeout:
+                # Kết quả về quá muộn bị bỏ, snapshot cũ được giữ
+                raise TimeoutError(
+                    f"làm mới mất {elapsed:.1f}s, quá {self.refresh_timeout}s"
+                )
+            with self._lock:
+                self._snapshots[key] = _Snapshot(values, generation)
+                self._refreshes += 1
+            return values
+        except Exception as e:
+            with self._lock:
+                self._last_error = f"{datetime.now().isoformat()} {key}: {str(e)[:500]}"
+            raise
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
+
+    def _discard_result(self, task: asyncio.Task) -> None:
+        # Lỗi đã ghi vào last_error; snapshot cũ được giữ cho lần sau
+        if not task.cancelled():
+            task.exception()
+
+    def _start_refresh(
+        self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> asyncio.Task:
+        # Chỉ gọi trong event loop; mỗi widget tối đa một lần làm mới đang chạy
+        with self._lock:
+            task = self._refreshing.get(key)
+            if task is None:
+                task = asyncio.create_task(self._refresh(key, compute))
+                task.add_done_callback(self._discard_result)
+                self._refreshing[key] = task
+            return task
+
+    def lookup(
+        self,
+        key: str,
+        tags: Iterable[str],
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any], Optional[asyncio.Task]]:
+        """
+        Có snapshot: (giá trị, trạng thái cache, None), snapshot cũ thì làm mới nền.
+        Chưa có: (None, trạng thái cache, task đang tính) để nơi gọi chờ với
+        timeout của mình; task vẫn chạy tiếp và lưu snapshot khi xong.
+        """
+        with self._lock:
+            self._tags[key] = frozenset(tags)
+            snapshot = self._snapshots.get(key)
+            fresh = snapshot is not None and self._is_fresh(key, snapshot)
+            if fresh:
+                self._hits += 1
+            elif snapshot is not None:
+                self._stale_hits += 1
+            else:
+                self._misses += 1
+
+        if snapshot is None:
+            return None, {"cache": "miss"}, self._start_refresh(key, compute)
+        if not fresh:
+            self._start_refresh(key, compute)
+        return (
+            snapshot.values,
+            {
+                "cache": "hit" if fresh else "stale",
+                "age_seconds": round(monotonic() - snapshot.computed_at, 2),
+            },
+            None,
+        )
+
+    def invalidate(self, *tags: str) -> None:
+        """
+        Gọi sau khi ghi dữ liệu (được gọi từ luồng đồng bộ của router).
+
+        Chỉ có tác dụng trong tiến trình hiện tại: các worker uvicorn khác (và
+        instance khác) vẫn giữ snapshot cũ tới khi quá ttl_seconds, request đầu
+        tiên sau đó vẫn nhận bản cũ và khởi động lần làm mới.
+        """
+        changed = set(tags)
+        with self._lock:
+            for key, section_tags in self._tags.items():
+                if section_tags & changed:
+                    self._generations[key] = self._generations.get(key, 0) + 1
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "refreshes": self._refreshes,
+                "invalidations": self._invalidations,
+                "refreshing": sorted(self._refreshing),
+                "snapshots": {
+                    key: {
+                        "age_seconds": round(monotonic() - snapshot.computed_at, 2),
+                        "fresh": self._is_fresh(key, snapshot),
+                    }
+                    for key, snapshot in self._snapshots.items()
+                },
+                "last_error": self._last_error,
+            }
+
+
+dashboard_cache = DashboardSnapshotCache(
+    ttl_seconds=dashboard_conf.DASHBOARD_SNAPSHOT_TTL_SECONDS,
+    refresh_timeout=dashboard_conf.DASHBOARD_SNAPSHOT_REFRESH_TIMEOUT_SECONDS,
+)
+
+
+def invalidate_dashboard(*tags: str) -> None:
+    dashboard_cache.invalidate(*tags)
@@ -0,0 +1,136 @@
+import asyncio
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from functools import partial
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src._utils import run_sync
+from src.core.config import dashboard_conf
+from src.databases.human_db import AsyncSessionLocal as HumanAsyncSessionLocal
+from src.databases.payroll_db import AsyncSessionLocal as PayrollAsyncSessionLocal
+from .auth import CurrentUser
+from .dashboard_cache import dashboard_cache
+
+HUMAN = "human"
+PAYROLL = "payroll"
+
+SESSION_FACTORIES = {
+    HUMAN: ("session_human", HumanAsyncSessionLocal),
+    PAYROLL: ("session_payroll", PayrollAsyncSessionLocal),
+}
+
+
+@dataclass(frozen=True)
+class DashboardSection:
+    """
+    Một widget của dashboard: fn(user, session_human, session_payroll) trả về
+    dict các trường ghép vào data; database nào không khai báo thì truyền None.
+    Khi lỗi hoặc quá thời gian, các trường nhận giá trị trong default.
+
+    Widget shared (số liệu toàn công ty, giống nhau với mọi người dùng) được
+    phục vụ từ dashboard_cache; tags là nhãn dữ liệu nguồn để invalidate khi ghi.
+    """
+
+    name: str
+    fn: Callable[..., Dict[str, Any]]
+    databases: Tuple[str, ...]
+    default: Dict[str, Any] = field(default_factory=dict)
+    shared: bool = False
+    tags: Tuple[str, ...] = ()
+
+
+async def _execute(section: DashboardSection, user: CurrentUser) -> Dict[str, Any]:
+    # Mỗi widget một session riêng (một kết nối riêng trong pool) để chạy song song
+    async with AsyncExitStack() as stack:
+        sessions = {"session_human": None, "session_payroll": None}
+        for database in section.databases:
+            argument, factory = SESSION_FACTORIES[database]
+            sessions[argument] = await stack.enter_async_context(factory())
+        return await run_sync(section.fn, user=user, **sessions)
+
+
+# Widget riêng đã quá hạn, đang chạy nốt ở nền, theo tên widget (giữ tham chiếu để
+# task không bị thu hồi). Trong lúc đó widget bị bỏ qua ở các request sau, nên mỗi
+# widget giữ tối đa một kết nối cho các lần chạy quá hạn, pool không bị dồn cạn
+_background: Dict[str, asyncio.Task] = {}
+
+
+def _discard_result(name: str, task: asyncio.Task) -> None:
+    # Lấy kết quả để asyncio không cảnh báo exception chưa được đọc
+    if _background.get(name) is task:
+        del _background[name]
+    if not task.cancelled():
+        task.exception()
+
+
+async def _run_section(
+    section: DashboardSection, user: CurrentUser, timeout: float
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    start = perf_counter()
+    cache_status: Dict[str, Any] = {}
+    if section.shared:
+        values, cache_status, task = dashboard_cache.lookup(
+            section.name, section.tags, lambda: _execute(section, user)
+        )
+        if task is None:
+            status = {"status": "ok", **cache_status}
+            status["elapsed_ms"] = round((perf_counter() - start) * 1000, 2)
+            return values, status
+    elif section.name in _background:
+        status = {"status": "skipped", "elapsed_ms": 0.0}
+        return section.default, status
+    else:
+        task = asyncio.create_task(_execute(section, user))
+
+    # Không dùng wait_for: wait_for hủy widget khi quá hạn
+    done, _ = await asyncio.wait({task}, timeout=timeout)
+    if not done:
+        # Không hủy task: CancelledError rơi vào giữa lúc driver đang chạy truy vấn
+        # có thể trả kết nối hỏng về pool. Widget chạy nốt ở nền; widget dùng chung
+        # lưu vào cache cho request sau, widget riêng bỏ kết quả
+        if not section.shared:
+            _background[section.name] = task
+            task.add_done_callback(partial(_discard_result, section.name))
+        values = section.default
+        status = {"status": "timeout", **cache_status}
+    elif task.exception() is not None:
+        error = task.exception()
+        values = section.default
+        status = {"status": "error", "error": str(error), **cache_status}
+        print(f"Lỗi khi lấy dữ liệu dashboard ({section.name}): {str(error)}")
+    else:
+        values = task.result()
+        status = {"status": "ok", **cache_status}
+    status["elapsed_ms"] = round((perf_counter() - start) * 1000, 2)
+    return values, status
+
+
+async def run_dashboard(
+    sections: List[DashboardSection],
+    user: CurrentUser,
+    timeout: Optional[float] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Chạy đồng thời các widget độc lập và ghép kết quả theo thứ tự khai báo.
+    Widget lỗi hoặc quá timeout giây chỉ làm mất phần dữ liệu của nó; trạng thái
+    và thời gian từng widget trả về trong metadata.
+    """
+    timeout = timeout if timeout is not None else dashboard_conf.DASHBOARD_SECTION_TIMEOUT_SECONDS
+    start = perf_counter()
+    results = await asyncio.gather(
+        *(_run_section(section, user, timeout) for section in sections)
+    )
+
+    data: Dict[str, Any] = {}
+    section_status: Dict[str, Any] = {}
+    for section, (values, status) in zip(sections, results):
+        data.update(values)
+        section_status[section.name] = status
+
+    metadata = {
+        "elapsed_ms": round((perf_counter() - start) * 1000, 2),
+        "degraded": [name for name, status in section_status.items() if status["status"] != "ok"],
+        "sections": section_status,
+    }
+    return data, metadata
@@ -8,6 +8,10 @@ from typing import Optional, List
 from datetime import date, datetime, timedelta
 
 from ..models.human import DepartmentCreate, DepartmentUpdate
+from .search_index import employee_search_index
+from .id_allocator import DEPARTMENT, id_allocator
+from .replication import DELETE, UPSERT, enqueue_change
+from .dashboard_cache import DEPARTMENTS, EMPLOYEES, invalidate_dashboard
 
 from ..schemas.human import (
     Department as HmDepartment,
@@ -58,38 +62,9 @@ def read_departments(session: Session):
 
 
 def add_and_sync_department(
-    session_human: Session, session_payroll: Session, department: DepartmentCreate
+    session_human: Session, department: DepartmentCreate
 ):
-    max_id_human = (
-        session_human.query(HmDepartment.DepartmentID)
-        .order_by(HmDepartment.DepartmentID.desc())
-        .first()
-    )
-    max_id_payroll = (
-        session_payroll.query(PrDepartment.DepartmentID)
-        .order_by(PrDepartment.DepartmentID.desc())
-        .first()
-    )
-
-    max_id = max(
-        max_id_human[0] if max_id_human else 0,
-        max_id_payroll[0] if max_id_payroll else 0,
-    )
-
-    department_id = max_id + 1
-
-    if session_human.query(HmDepartment).filter_by(DepartmentID=department_id).first():
-        raise HTTPException(
-            status_code=400, detail="DepartmentID đã tồn tại trong HUMAN_2025"
-        )
-    if (
-        session_payroll.query(PrDepartment)
-        .filter_by(DepartmentID=department_id)
-        .first()
-    ):
-        raise HTTPException(
-            status_code=400, detail="DepartmentID đã tồn tại trong payroll"
-        )
+    department_id = id_allocator.next_id(DEPARTMENT)
 
     try:
         new_human_dept = HmDepartment(
@@ -99,14 +74,11 @@ def add_and_sync_department(
             UpdatedAt=department.UpdatedAt,
         )
         session_human.add(new_human_dept)
+        enqueue_change(session_human, DEPARTMENT, department_id, UPSERT, new_human_dept)
         session_human.commit()
 
-        new_payroll_dept = PrDepartment(
-            DepartmentID=department_id,
-            DepartmentName=department.DepartmentName,
-        )
-        session_payroll.add(new_payroll_dept)
-        session_payroll.commit()
+        employee_search_index.set_department(department_id, department.DepartmentName)
+        invalidate_dashboard(DEPARTMENTS)
 
         return {
             "message": "Phòng ban đã được thêm và đồng bộ thành công.",
@@ -114,39 +86,27 @@ def add_and_sync_department(
         }
     except Exception as e:
         session_human.rollback()
-        session_payroll.rollback()
         raise HTTPException(status_code=500, detail=f"Lỗi khi thêm phòng ban: {str(e)}")
 
 
 def update_and_sync_department(
     session_human: Session,
-    session_payroll: Session,
     department_id: int,
     department: DepartmentUpdate,
 ):
     human_dept = (
         session_human.query(HmDepartment).filter_by(DepartmentID=department_id).first()
     )
-    payroll_dept = (
-        session_payroll.query(PrDepartment)
-        .filter_by(DepartmentID=department_id)
-        .first()
-    )
 
-    if not human_dept or not payroll_dept:
-        missing = []
-        if not human_dept:
-            missing.append("HUMAN_2025")
-        if not payroll_dept:
-            missing.append("payroll")
+    if not human_dept:
         raise HTTPException(
-            status_code=404,
-            detail=f"Phòng ban không tồn tại trong: {', '.join(missing)}",
+            status_code=404, detail="Phòng ban không tồn tại trong: HUMAN_2025"
         )
 
     try:
         for field, value in department.model_dump(exclude_unset=True).items():
             setattr(human_dept, field, value)
+        enqueue_change(session_human, DEPARTMENT, department_id, UPSERT, human_dept)
         session_human.commit()
     except Exception as e:
         session_human.rollback()
@@ -154,17 +114,8 @@ def update_and_sync_department(
             status_code=500, detail=f"Lỗi cập nhật trong HUMAN_2025: {str(e)}"
         )
 
-    try:
-        for field in ["DepartmentName", "UpdatedAt"]:
-            if field in department.model_dump(exclude_unset=True):
-                setattr(payroll_dept, field, getattr(human_dept, field))
-        session_payroll.commit()
-    except Exception as e:
-        session_payroll.rollback()
-        session_human.rollback()
-        raise HTTPException(
-            status_code=500, detail=f"Lỗi cập nhật trong payroll: {str(e)}"
-        )
+    employee_search_index.set_department(department_id, human_dept.DepartmentName)
+    invalidate_dashboard(DEPARTMENTS)
 
     return {
         "message": "Phòng ban đã được cập nhật và đồng bộ thành công.",
@@ -178,30 +129,22 @@ def delete_and_sync_department(
     human_dept = (
         session_human.query(HmDepartment).filter_by(DepartmentID=department_id).first()
     )
-    payroll_dept = (
-        session_payroll.query(PrDepartment)
-        .filter_by(DepartmentID=department_id)
-        .first()
-    )
 
-    if not human_dept or not payroll_dept:
-        missing = []
-        if not human_dept:
-            missing.append("HUMAN_2025")
-        if not payroll_dept:
-            missing.append("payroll")
+    if not human_dept:
         raise HTTPException(
-            status_code=404,
-            detail=f"Phòng ban không tồn tại trong: {', '.join(missing)}",
+            status_code=404, detail="Phòng ban không tồn tại trong: HUMAN_2025"
         )
 
     try:
+        # Vẫn kiểm tra nhân viên bên payroll để worker không vướng khóa ngoại khi xóa
         human_employees = (
-            session_human.query(HmEmployee).filter_by(DepartmentID=department_id).all()
+            session_human.query(HmEmployee.EmployeeID, HmEmployee.FullName)
+            .filter(HmEmployee.DepartmentID == department_id)
+            .all()
         )
         payroll_employees = (
-            session_payroll.query(PrEmployee)
-            .filter_by(DepartmentID=department_id)
+            session_payroll.query(PrEmployee.EmployeeID, PrEmployee.FullName)
+            .filter(PrEmployee.DepartmentID == department_id)
             .all()
         )
 
@@ -235,14 +178,12 @@ def delete_and_sync_department(
                 detail={"message": error_message, "employees": employee_list},
             )
 
-        if human_dept:
-            session_human.delete(human_dept)
-
-        if payroll_dept:
-            session_payroll.delete(payroll_dept)
-
+        session_human.execute(delete(HmDepartment).where(HmDepartment.DepartmentID == department_id))
+        enqueue_change(session_human, DEPARTMENT, department_id, DELETE)
         session_human.commit()
-        session_payroll.commit()
+
+        employee_search_index.remove_department(department_id)
+        invalidate_dashboard(DEPARTMENTS, EMPLOYEES)
 
         return {
             "message": f"Phòng ban {department_id} đã được xóa thành công khỏi cả hai hệ thống.",
@@ -253,5 +194,4 @@ def delete_and_sync_department(
         raise
     except Exception as e:
         session_human.rollback()
-        session_payroll.rollback()
         raise HTTPException(status_code=500, detail=f"Lỗi khi xóa phòng ban: {str(e)}")
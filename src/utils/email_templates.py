@@ -0,0 +1,142 @@
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+from markupsafe import Markup, escape
+
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+
+def format_vnd(value, suffix: str = " VNĐ") -> str:
+    if value is None:
+        return "0" + suffix
+
+    amount = int(value)
+    formatted = "{:,}".format(amount).replace(",", ".")
+
+    return formatted + suffix
+
+
+# Template được biên dịch một lần khi nạp module; auto_reload=False để không
+# kiểm tra thời gian sửa file mỗi lần render
+email_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    undefined=StrictUndefined,
+    auto_reload=False,
+    keep_trailing_newline=True,
+)
+
+SALARY_HTML = email_env.get_template("salary_notification.html")
+SALARY_TEXT = email_env.get_template("salary_notification.txt")
+# Phần dùng chung của email lương, chỉ phụ thuộc tháng
+SALARY_FRAGMENTS = {
+    name: email_env.get_template(f"_salary_{name}.html")
+    for name in ("style", "header", "closing", "footer")
+}
+# Trường riêng của từng nhân viên; template chỉ được in thẳng các trường này
+# (không lọc/so sánh), vì chúng được ghép vào khung dựng sẵn
+EMPLOYEE_FIELDS = (
+    "employee_id",
+    "full_name",
+    "department_name",
+    "position_name",
+    "base_salary",
+    "bonus",
+    "deductions",
+    "net_salary",
+)
+_SLOT = "\x00"
+
+
+def _skeleton(template, context: Dict[str, Any]) -> Tuple[List[str], List[int]]:
+    """
+    Render template một lần với ô giữ chỗ cho các trường riêng, tách thành
+    (các đoạn tĩnh, vị trí trong EMPLOYEE_FIELDS của trường nằm giữa hai đoạn).
+    """
+    placeholders = {name: Markup(f"{_SLOT}{name}{_SLOT}") for name in EMPLOYEE_FIELDS}
+    parts = template.render({**context, **placeholders}).split(_SLOT)
+    return parts[0::2], [EMPLOYEE_FIELDS.index(name) for name in parts[1::2]]
+
+
+def _fill(skeleton: Tuple[List[str], List[int]], values: Tuple[str, ...]) -> str:
+    # Ghép bằng join: nhanh hơn str.format trên khung dài có dấu tiếng Việt
+    static, fields = skeleton
+    out = [static[0]]
+    for field, text in zip(fields, static[1:]):
+        out.append(values[field])
+        out.append(text)
+    return "".join(out)
+
+
+class SalaryEmailRenderer:
+    """
+    Dựng email thông báo lương của một tháng.
+
+    Template được render một lần khi tạo renderer thành khung tĩnh (CSS, tiêu
+    đề, lời kết, chân trang và cả phần bảng); mỗi nhân viên chỉ escape các
+    giá trị của mình và ghép vào khung, không chạy lại Jinja2.
+    """
+
+    def __init__(self, month: date, plain_text: bool = True):
+        self.month_label = f"{month.month}/{month.year}"
+        self.subject = f"Thông báo lương tháng {self.month_label}"
+        self.plain_text = plain_text
+        shared = {"month_label": self.month_label}
+        self._shared: Dict[str, Any] = {
+            **shared,
+            **{
+                name: Markup(template.render(shared).strip())
+                for name, template in SALARY_FRAGMENTS.items()
+            },
+        }
+        self._html = _skeleton(SALARY_HTML, self._shared)
+        self._text = _skeleton(SALARY_TEXT, self._shared) if plain_text else None
+        # Tên phòng ban/chức vụ lặp lại giữa các nhân viên: escape một lần
+        self._escaped: Dict[str, str] = {}
+
+    def _escape_label(self, value: str) -> str:
+        escaped = self._escaped.get(value)
+        if escaped is None:
+            escaped = self._escaped[value] = escape(value)
+        return escaped
+
+    def render(
+        self,
+        employee_id: int,
+        full_name: str,
+        department_name: str,
+        position_name: str,
+        salary: Any,
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Trả về (HTML, văn bản thuần hoặc None nếu tắt phần văn bản thuần).
+        """
+        # Số tiền (format_vnd) và mã nhân viên chỉ gồm chữ số, dấu chấm và "VNĐ",
+        # nên chỉ các trường chữ cần escape trong HTML
+        amounts = (
+            format_vnd(salary.BaseSalary),
+            format_vnd(salary.Bonus),
+            format_vnd(salary.Deductions),
+            format_vnd(salary.NetSalary),
+        )
+        body_html = _fill(
+            self._html,
+            (
+                str(employee_id),
+                escape(full_name),
+                self._escape_label(department_name),
+                self._escape_label(position_name),
+                *amounts,
+            ),
+        )
+        body_text = (
+            _fill(
+                self._text,
+                (str(employee_id), full_name, department_name, position_name, *amounts),
+            )
+            if self.plain_text
+            else None
+        )
+        return body_html, body_text
@@ -1,9 +1,13 @@
-from sqlalchemy import delete, func
+from sqlalchemy import delete, func, insert
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.future import select
 
 from fastapi import HTTPException
+from pydantic import ValidationError
 
+import csv
+import io
+import json
 from typing import Optional, List
 from datetime import date, datetime, timedelta
 
@@ -21,25 +25,51 @@ from ..schemas.payroll import (
 )
 
 from ..models.human import EmployeeCreate, EmployeeUpdate
+from .pagination import keyset_paginate, offset_paginate
+from .search_index import employee_search_index
+from .calendar_index import calendar_index
+from .notification_store import notification_scheduler
+from .notifications import ANNIVERSARIES
+from .id_allocator import EMPLOYEE, id_allocator
+from .replication import DELETE, UPSERT, enqueue_change, enqueue_changes, outbox_row
+from .dashboard_cache import EMPLOYEES, invalidate_dashboard
+
+EMPLOYEE_SORT_KEYS = [(HmEmployee.EmployeeID, False)]
+
+RESERVED_ID_DETAIL = (
+    "EmployeeID nằm trong dải mã hệ thống đã cấp, hãy bỏ trống để hệ thống tự cấp mã"
+)
 
 
 def get_employees(
-    session: Session, page: int = 1, per_page: int = 10
-) -> List[HmEmployee]:
+    session: Session, page: int = 1, per_page: int = 10, cursor: Optional[str] = None
+):
     query = session.query(HmEmployee).options(
         joinedload(HmEmployee.department), joinedload(HmEmployee.position)
     )
 
-    offset = (page - 1) * per_page
-
-    results = query.order_by(HmEmployee.EmployeeID).offset(offset).limit(per_page).all()
-
-    return results
+    return keyset_paginate(
+        query, EMPLOYEE_SORT_KEYS, page=page, per_page=per_page, cursor=cursor
+    )
 
 
 def search_employees_logic(
-    session: Session, search_query: str = None, page: int = 1, per_page: int = 10
+    session: Session,
+    search_query: str = None,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
 ):
+    if search_query and employee_search_index.ready:
+        return offset_paginate(
+            lambda limit, offset: _search_from_index(
+                session, search_query, limit, offset
+            ),
+            page=page,
+            per_page=per_page,
+            cursor=cursor,
+        )
+
     query = (
         session.query(HmEmployee)
         .join(HmDepartment, HmEmployee.DepartmentID == HmDepartment.DepartmentID)
@@ -62,16 +92,55 @@ def search_employees_logic(
                 | (HmPosition.PositionName.ilike(f"%{search_query}%"))
             )
 
-    offset = (page - 1) * per_page
-    results = query.order_by(HmEmployee.EmployeeID).offset(offset).limit(per_page).all()
+    return keyset_paginate(
+        query, EMPLOYEE_SORT_KEYS, page=page, per_page=per_page, cursor=cursor
+    )
+
+
+def _search_from_index(session: Session, search_query: str, limit: int, offset: int):
+    employee_ids, total = employee_search_index.search(
+        search_query, limit=limit, offset=offset
+    )
+    if not employee_ids:
+        return [], total
 
-    return results
+    employees = (
+        session.query(HmEmployee)
+        .options(joinedload(HmEmployee.department), joinedload(HmEmployee.position))
+        .filter(HmEmployee.EmployeeID.in_(employee_ids))
+        .all()
+    )
+    by_id = {emp.EmployeeID: emp for emp in employees}
+
+    return [by_id[emp_id] for emp_id in employee_ids if emp_id in by_id], total
+
+
+def suggest_employees_logic(query: str, limit: int = 10):
+    if not employee_search_index.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Chỉ mục nhân viên đang được khởi tạo, vui lòng thử lại sau",
+            headers={"Retry-After": "5"},
+        )
+
+    return [
+        {
+            "EmployeeID": doc.EmployeeID,
+            "FullName": doc.FullName,
+            "DepartmentID": doc.DepartmentID,
+            "DepartmentName": employee_search_index.department_name(doc.DepartmentID),
+            "PositionID": doc.PositionID,
+            "PositionName": employee_search_index.position_name(doc.PositionID),
+        }
+        for doc in employee_search_index.suggest(query, limit=limit)
+    ]
 
 
 def add_and_sync_employee(
     session_human: Session, session_payroll: Session, employee: EmployeeCreate
 ):
-    if employee.EmployeeID is not None:
+    explicit_id = employee.EmployeeID is not None
+    if explicit_id:
         exists_human = (
             session_human.query(HmEmployee)
             .filter_by(EmployeeID=employee.EmployeeID)
@@ -93,40 +162,11 @@ def add_and_sync_employee(
                 status_code=400,
                 detail=f"EmployeeID đã tồn tại trong: {', '.join(source)}",
             )
+        # Mã <= mốc có thể nằm trong khối mã một worker khác đang giữ
+        if not id_allocator.reserve(EMPLOYEE, [employee.EmployeeID]):
+            raise HTTPException(status_code=400, detail=RESERVED_ID_DETAIL)
     else:
-        max_id_human = (
-            session_human.query(HmEmployee.EmployeeID)
-            .order_by(HmEmployee.EmployeeID.desc())
-            .first()
-        )
-        max_id_payroll = (
-            session_payroll.query(PrEmployee.EmployeeID)
-            .order_by(PrEmployee.EmployeeID.desc())
-            .first()
-        )
-
-        max_id = max(
-            max_id_human[0] if max_id_human else 0,
-            max_id_payroll[0] if max_id_payroll else 0,
-        )
-        employee.EmployeeID = max_id + 1
-
-    if (
-        session_human.query(HmEmployee)
-        .filter_by(EmployeeID=employee.EmployeeID)
-        .first()
-    ):
-        raise HTTPException(
-            status_code=400, detail="EmployeeID đã tồn tại trong HUMAN_2025"
-        )
-    if (
-        session_payroll.query(PrEmployee)
-        .filter_by(EmployeeID=employee.EmployeeID)
-        .first()
-    ):
-        raise HTTPException(
-            status_code=400, detail="EmployeeID đã tồn tại trong payroll"
-        )
+        employee.EmployeeID = id_allocator.next_id(EMPLOYEE)
 
     try:
         new_human_emp = HmEmployee(
@@ -142,17 +182,25 @@ def add_and_sync_employee(
             Status=employee.Status,
         )
         session_human.add(new_human_emp)
+        enqueue_change(
+            session_human, EMPLOYEE, employee.EmployeeID, UPSERT, new_human_emp
+        )
         session_human.commit()
 
-        new_payroll_emp = PrEmployee(
-            EmployeeID=employee.EmployeeID,
-            FullName=employee.FullName,
-            DepartmentID=employee.DepartmentID,
-            PositionID=employee.PositionID,
-            Status=employee.Status,
+        employee_search_index.upsert(
+            employee.EmployeeID,
+            employee.FullName,
+            employee.DepartmentID,
+            employee.PositionID,
+        )
+        calendar_index.upsert(
+            employee.EmployeeID,
+            employee.FullName,
+            employee.HireDate,
+            employee.DateOfBirth,
         )
-        session_payroll.add(new_payroll_emp)
-        session_payroll.commit()
+        notification_scheduler.mark_dirty(ANNIVERSARIES, [employee.EmployeeID])
+        invalidate_dashboard(EMPLOYEES)
 
         return {
             "message": "Nhân viên đã được thêm và đồng bộ thành công.",
@@ -161,37 +209,28 @@ def add_and_sync_employee(
 
     except Exception as e:
         session_human.rollback()
-        session_payroll.rollback()
         raise HTTPException(status_code=500, detail=f"Lỗi khi thêm nhân viên: {str(e)}")
 
 
 def update_and_sync_employee(
     session_human: Session,
-    session_payroll: Session,
     employee_id: int,
     update_data: EmployeeUpdate,
 ):
     human_emp = (
         session_human.query(HmEmployee).filter_by(EmployeeID=employee_id).first()
     )
-    payroll_emp = (
-        session_payroll.query(PrEmployee).filter_by(EmployeeID=employee_id).first()
-    )
 
-    if not human_emp or not payroll_emp:
-        missing = []
-        if not human_emp:
-            missing.append("HUMAN_2025")
-        if not payroll_emp:
-            missing.append("payroll")
+    if not human_emp:
         raise HTTPException(
-            status_code=404,
-            detail=f"Nhân viên không tồn tại trong: {', '.join(missing)}",
+            status_code=404, detail="Nhân viên không tồn tại trong: HUMAN_2025"
         )
 
     try:
         for field, value in update_data.model_dump(exclude_unset=True).items():
             setattr(human_emp, field, value)
+        # payroll chỉ nhận FullName, DepartmentID, PositionID, Status qua outbox
+        enqueue_change(session_human, EMPLOYEE, employee_id, UPSERT, human_emp)
         session_human.commit()
     except Exception as e:
         session_human.rollback()
@@ -199,70 +238,48 @@ def update_and_sync_employee(
             status_code=500, detail=f"Lỗi cập nhật trong HUMAN_2025: {str(e)}"
         )
 
-    try:
-        #  chỉ cập nhật 3 trường là DepartmentID, PositionID, Status
-        for field in ["DepartmentID", "PositionID", "Status"]:
-            if field in update_data.model_dump(exclude_unset=True):
-                setattr(payroll_emp, field, getattr(human_emp, field))
-        session_payroll.commit()
-    except Exception as e:
-        session_payroll.rollback()
-        session_human.rollback()
-        raise HTTPException(
-            status_code=500, detail=f"Lỗi cập nhật trong payroll: {str(e)}"
-        )
+    employee_search_index.update_assignment(
+        employee_id, human_emp.DepartmentID, human_emp.PositionID
+    )
+    invalidate_dashboard(EMPLOYEES)
 
     return {"message": "Cập nhật và đồng bộ nhân viên thành công."}
 
 
-def delete_employee_logic(
-    session_human: Session, session_payroll: Session, employee_id: int
-):
+def _delete_employees(session_human: Session, employee_ids: List[int]) -> None:
+    """
+    Xóa cổ tức và nhân viên bằng câu DELETE theo tập (mỗi lô BULK_CHUNK_SIZE mã),
+    kèm outbox để worker xóa lương, chấm công và nhân viên bên payroll.
+    """
+    for chunk in _chunks(employee_ids):
+        session_human.execute(delete(HmDividend).where(HmDividend.EmployeeID.in_(chunk)))
+        session_human.execute(delete(HmEmployee).where(HmEmployee.EmployeeID.in_(chunk)))
+        enqueue_changes(
+            session_human,
+            [outbox_row(EMPLOYEE, employee_id, DELETE) for employee_id in chunk],
+        )
+
+
+def delete_employee_logic(session_human: Session, employee_id: int):
     # Kiểm tra nhân viên có tồn tại không
-    human_emp = (
-        session_human.query(HmEmployee).filter_by(EmployeeID=employee_id).first()
-    )
-    payroll_emp = (
-        session_payroll.query(PrEmployee).filter_by(EmployeeID=employee_id).first()
+    exists = (
+        session_human.query(HmEmployee.EmployeeID)
+        .filter(HmEmployee.EmployeeID == employee_id)
+        .first()
     )
 
-    if not human_emp and not payroll_emp:
+    if not exists:
         raise HTTPException(
-            status_code=404, detail="Nhân viên không tồn tại trong cả hai hệ thống."
+            status_code=404, detail="Nhân viên không tồn tại trong HUMAN_2025."
         )
 
     try:
-        if human_emp:
-            dividends = (
-                session_human.query(HmDividend)
-                .filter(HmDividend.EmployeeID == employee_id)
-                .all()
-            )
-            for dividend in dividends:
-                session_human.delete(dividend)
-
-            session_human.delete(human_emp)
-            session_human.commit()
-
-        if payroll_emp:
-            salaries = (
-                session_payroll.query(PrSalary)
-                .filter(PrSalary.EmployeeID == employee_id)
-                .all()
-            )
-            for salary in salaries:
-                session_payroll.delete(salary)
-
-            attendances = (
-                session_payroll.query(PrAttendance)
-                .filter(PrAttendance.EmployeeID == employee_id)
-                .all()
-            )
-            for attendance in attendances:
-                session_payroll.delete(attendance)
+        _delete_employees(session_human, [employee_id])
+        session_human.commit()
 
-            session_payroll.delete(payroll_emp)
-            session_payroll.commit()
+        employee_search_index.remove(employee_id)
+        calendar_index.remove(employee_id)
+        invalidate_dashboard(EMPLOYEES)
 
         return {
             "message": "Thông tin nhân viên đã được xóa thành công khỏi cả hai hệ thống."
@@ -270,10 +287,40 @@ def delete_employee_logic(
 
     except Exception as e:
         session_human.rollback()
-        session_payroll.rollback()
         raise HTTPException(status_code=500, detail=f"Lỗi khi xóa nhân viên: {str(e)}")
 
 
+def bulk_delete_employees(session_human: Session, employee_ids: List[int]):
+    """
+    Xóa nhiều nhân viên với số câu lệnh cố định cho mỗi lô mã, không nạp bản ghi vào session.
+    """
+    employee_ids = list(dict.fromkeys(employee_ids))
+    found = _existing_values(session_human, HmEmployee.EmployeeID, employee_ids)
+    deleted = [employee_id for employee_id in employee_ids if employee_id in found]
+    not_found = [employee_id for employee_id in employee_ids if employee_id not in found]
+
+    if deleted:
+        try:
+            _delete_employees(session_human, deleted)
+            session_human.commit()
+        except Exception as e:
+            session_human.rollback()
+            raise HTTPException(
+                status_code=500, detail=f"Lỗi khi xóa nhân viên hàng loạt: {str(e)}"
+            )
+
+        for employee_id in deleted:
+            employee_search_index.remove(employee_id)
+            calendar_index.remove(employee_id)
+        invalidate_dashboard(EMPLOYEES)
+
+    return {
+        "message": f"Đã xóa {len(deleted)}/{len(employee_ids)} nhân viên.",
+        "deleted": deleted,
+        "not_found": not_found,
+    }
+
+
 def view_employee_details_logic(session: Session, employee_id: int):
     # if not employee_id:
     #     raise HTTPException(status_code=400, detail="EmployeeID trống")
@@ -307,3 +354,180 @@ def view_employee_details_logic(session: Session, employee_id: int):
         "PositionName": employee.position.PositionName if employee.position else None,
         "Status": employee.Status,
     }
+
+
+# Số dòng tối đa mỗi lần thêm hàng loạt và kích thước lô khi truy vấn/ghi
+BULK_ADD_MAX_ROWS = 10000
+BULK_CHUNK_SIZE = 1000
+
+
+def parse_bulk_employee_payload(body: bytes, content_type: str) -> List[dict]:
+    """
+    Đọc danh sách nhân viên từ body dạng JSON array hoặc CSV (có dòng tiêu đề).
+    """
+    try:
+        text = body.decode("utf-8-sig")
+        if "csv" in (content_type or ""):
+            rows = [
+                {key: (value if value != "" else None) for key, value in row.items()}
+                for row in csv.DictReader(io.StringIO(text))
+            ]
+        else:
+            rows = json.loads(text)
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Dữ liệu không hợp lệ: {str(e)}")
+
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise HTTPException(
+            status_code=400, detail="Dữ liệu phải là một mảng các nhân viên"
+        )
+    if not rows:
+        raise HTTPException(status_code=400, detail="Danh sách nhân viên trống")
+    if len(rows) > BULK_ADD_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Mỗi lần chỉ được thêm tối đa {BULK_ADD_MAX_ROWS} nhân viên",
+        )
+    return rows
+
+
+def _chunks(items: List, size: int = BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _existing_values(session: Session, column, values) -> set:
+    values = list(values)
+    found = set()
+    for chunk in _chunks(values):
+        found.update(v for (v,) in session.query(column).filter(column.in_(chunk)))
+    return found
+
+
+def bulk_add_employees(
+    session_human: Session, session_payroll: Session, rows: List[dict]
+):
+    """
+    Thêm nhiều nhân viên vào HUMAN_2025 trong một lần; payroll nhận các nhân
+    viên này qua outbox (worker đồng bộ), không được ghi trực tiếp.
+
+    Kiểm tra trùng mã/email bằng vài truy vấn IN theo lô thay vì từng dòng,
+    cấp mã mới theo khối từ id_allocator,
+    ghi nhân viên và outbox đồng bộ payroll bằng executemany (SQL Server dùng
+    fast_executemany) trong cùng một transaction, rồi trả về kết quả
+    cho từng dòng. Dòng lỗi bị bỏ qua, các dòng hợp lệ vẫn được thêm.
+    """
+    results = [{"row": i + 1, "status": "error"} for i in range(len(rows))]
+    valid: List[tuple[int, EmployeeCreate]] = []
+
+    for i, row in enumerate(rows):
+        try:
+            valid.append((i, EmployeeCreate.model_validate(row)))
+        except ValidationError as e:
+            results[i]["detail"] = [
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}"
+                for err in e.errors()
+            ]
+
+    def reject(i: int, detail: str):
+        results[i]["detail"] = detail
+
+    # Trùng lặp ngay trong dữ liệu gửi lên
+    seen_ids, seen_emails, unique = set(), set(), []
+    for i, emp in valid:
+        email = emp.Email.lower()
+        if emp.EmployeeID is not None and emp.EmployeeID in seen_ids:
+            reject(i, f"EmployeeID {emp.EmployeeID} bị lặp trong dữ liệu gửi lên")
+        elif email in seen_emails:
+            reject(i, f"Email {emp.Email} bị lặp trong dữ liệu gửi lên")
+        else:
+            if emp.EmployeeID is not None:
+                seen_ids.add(emp.EmployeeID)
+            seen_emails.add(email)
+            unique.append((i, emp))
+
+    # Kiểm tra theo tập với database
+    human_ids = _existing_values(session_human, HmEmployee.EmployeeID, seen_ids)
+    payroll_ids = _existing_values(session_payroll, PrEmployee.EmployeeID, seen_ids)
+    taken_emails = {
+        email.lower()
+        for email in _existing_values(
+            session_human, HmEmployee.Email, {emp.Email for _, emp in unique}
+        )
+    }
+    department_ids = {
+        v for (v,) in session_human.query(HmDepartment.DepartmentID)
+    }
+    position_ids = {v for (v,) in session_human.query(HmPosition.PositionID)}
+
+    accepted: List[tuple[int, EmployeeCreate]] = []
+    for i, emp in unique:
+        if emp.EmployeeID in human_ids or emp.EmployeeID in payroll_ids:
+            source = [
+                name
+                for name, ids in (("HUMAN_2025", human_ids), ("payroll", payroll_ids))
+                if emp.EmployeeID in ids
+            ]
+            reject(i, f"EmployeeID đã tồn tại trong: {', '.join(source)}")
+        elif emp.Email.lower() in taken_emails:
+            reject(i, f"Email {emp.Email} đã tồn tại trong HUMAN_2025")
+        elif emp.DepartmentID not in department_ids:
+            reject(i, f"DepartmentID {emp.DepartmentID} không tồn tại")
+        elif emp.PositionID not in position_ids:
+            reject(i, f"PositionID {emp.PositionID} không tồn tại")
+        else:
+            accepted.append((i, emp))
+
+    # Mã chỉ định sẵn phải lớn hơn mốc cấp phát; mã còn lại được cấp theo khối
+    explicit_ids = [emp.EmployeeID for _, emp in accepted if emp.EmployeeID is not None]
+    if explicit_ids:
+        reserved = set(id_allocator.reserve(EMPLOYEE, explicit_ids))
+        for i, emp in accepted:
+            if emp.EmployeeID is not None and emp.EmployeeID not in reserved:
+                reject(i, RESERVED_ID_DETAIL)
+        accepted = [
+            (i, emp)
+            for i, emp in accepted
+            if emp.EmployeeID is None or emp.EmployeeID in reserved
+        ]
+
+    if accepted:
+        missing = [emp for _, emp in accepted if emp.EmployeeID is None]
+        new_ids = id_allocator.next_ids(EMPLOYEE, len(missing))
+        for emp, new_id in zip(missing, new_ids):
+            emp.EmployeeID = new_id
+
+        human_rows = [emp.model_dump() for _, emp in accepted]
+        try:
+            for chunk in _chunks(human_rows):
+                session_human.execute(insert(HmEmployee), chunk)
+                enqueue_changes(
+                    session_human,
+                    [outbox_row(EMPLOYEE, row["EmployeeID"], UPSERT, row) for row in chunk],
+                )
+            session_human.commit()
+        except Exception as e:
+            session_human.rollback()
+            raise HTTPException(
+                status_code=500, detail=f"Lỗi khi thêm nhân viên hàng loạt: {str(e)}"
+            )
+
+        for i, emp in accepted:
+            results[i] = {"row": i + 1, "status": "created", "EmployeeID": emp.EmployeeID}
+            employee_search_index.upsert(
+                emp.EmployeeID, emp.FullName, emp.DepartmentID, emp.PositionID
+            )
+            calendar_index.upsert(
+                emp.EmployeeID, emp.FullName, emp.HireDate, emp.DateOfBirth
+            )
+        notification_scheduler.mark_dirty(
+            ANNIVERSARIES, [emp.EmployeeID for _, emp in accepted]
+        )
+        invalidate_dashboard(EMPLOYEES)
+
+    return {
+        "message": f"Đã thêm {len(accepted)}/{len(rows)} nhân viên.",
+        "created": len(accepted),
+        "failed": len(rows) - len(accepted),
+        "results": results,
+    }
@@ -0,0 +1,64 @@
+import csv
+import io
+from typing import Callable, Iterator
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+
+from src._utils import dumps_json
+
+NDJSON = "ndjson"
+CSV = "csv"
+EXPORT_FORMATS = (NDJSON, CSV)
+MEDIA_TYPES = {
+    NDJSON: "application/x-ndjson",
+    CSV: "text/csv; charset=utf-8",
+}
+
+# Số dòng mỗi lần lấy từ server-side cursor, cũng là số dòng mỗi chunk gửi đi
+EXPORT_YIELD_PER = 1000
+
+
+def _csv_chunk(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def stream_export(
+    session_factory: Callable[[], Session],
+    statement: Select,
+    export_format: str,
+    yield_per: int = EXPORT_YIELD_PER,
+) -> Iterator[bytes]:
+    """
+    Chạy statement với server-side cursor (yield_per) và trả về từng chunk
+    NDJSON/CSV; bộ nhớ chỉ giữ một lô yield_per dòng dù kết quả lớn đến đâu.
+
+    Session mở trong generator vì session của Depends đã đóng trước khi
+    StreamingResponse gửi xong dữ liệu.
+    """
+    with session_factory() as session:
+        result = session.execute(statement.execution_options(yield_per=yield_per))
+        columns = list(result.keys())
+        if export_format == CSV:
+            # BOM để Excel đọc đúng tiếng Việt
+            yield b"\xef\xbb\xbf" + _csv_chunk([columns])
+        for rows in result.partitions():
+            if export_format == CSV:
+                yield _csv_chunk(rows)
+            else:
+                yield b"".join(
+                    dumps_json(dict(zip(columns, row))) + b"\n" for row in rows
+                )
+
+
+def export_response(chunks: Iterator[bytes], filename: str, export_format: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"'
+        },
+    )
@@ -0,0 +1,183 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List
+
+from src.core.config import id_allocator_conf
+from src.databases.human_db import SessionLocal as HumanSessionLocal, engine as human_engine
+from src.databases.payroll_db import SessionLocal as PayrollSessionLocal
+from ..schemas.human import (
+    Department as HmDepartment,
+    Employee as HmEmployee,
+    IdAllocation,
+    Position as HmPosition,
+)
+from ..schemas.payroll import (
+    Department as PrDepartment,
+    Employee as PrEmployee,
+    Position as PrPosition,
+)
+
+
+class IdBlockAllocator:
+    """
+    Cấp mã cho các đối tượng được đồng bộ giữa HUMAN_2025 và payroll.
+
+    Mỗi worker thuê trước một khối block_size mã bằng một câu UPDATE trên bảng
+    IdAllocations (HUMAN_2025), rồi cấp dần trong bộ nhớ. Chỉ khi hết khối mới
+    cần ghi database, và không bao giờ phải đọc bảng nhân viên/phòng ban/chức vụ.
+    Lần đầu một loại chưa có mốc, mốc được khởi tạo từ max(id) của cả hai database.
+    Mã còn thừa trong khối khi worker dừng sẽ bị bỏ qua (có khoảng trống).
+
+    Mã được chỉ định sẵn chỉ hợp lệ khi lớn hơn mốc (reserve): mã <= mốc có thể
+    nằm trong khối một worker khác đang giữ trong bộ nhớ.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], block_size: int):
+        self.session_factory = session_factory
+        self.block_size = block_size
+        self._seeders: Dict[str, Callable[[], int]] = {}
+        self._blocks: Dict[str, List[int]] = {}
+        self._locks: Dict[str, Lock] = {}
+        self._leases: Dict[str, int] = {}
+
+    def register(self, entity: str, seeder: Callable[[], int]) -> None:
+        self._seeders[entity] = seeder
+        # [mã kế tiếp, mã cuối khối]; khối rỗng khi mã kế tiếp > mã cuối
+        self._blocks[entity] = [1, 0]
+        self._locks[entity] = Lock()
+        self._leases[entity] = 0
+
+    def next_id(self, entity: str) -> int:
+        return self.next_ids(entity, 1)[0]
+
+    def next_ids(self, entity: str, count: int) -> List[int]:
+        """
+        Cấp count mã theo khối (liên tiếp trong cùng một khối).
+        """
+        ids: List[int] = []
+        with self._locks[entity]:
+            block = self._blocks[entity]
+            while len(ids) < count:
+                if block[0] > block[1]:
+                    block[0], block[1] = self._lease(entity, max(self.block_size, count - len(ids)))
+                take = min(count - len(ids), block[1] - block[0] + 1)
+                ids.extend(range(block[0], block[0] + take))
+                block[0] += take
+        return ids
+
+    def reserve(self, entity: str, ids: Iterable[int]) -> List[int]:
+        """
+        Giữ các mã được chỉ định sẵn (không qua bộ cấp phát): chỉ nhận các mã lớn
+        hơn mốc và đẩy mốc lên mã lớn nhất trong số đó, nên không khối nào đã hoặc
+        sẽ được thuê chứa các mã này. Trả về các mã được nhận, theo thứ tự tăng dần.
+        """
+        ids = sorted(set(ids))
+        while ids:
+            with self.session_factory() as session:
+                high = session.execute(
+                    select(IdAllocation.HighWaterMark).where(IdAllocation.EntityName == entity)
+                ).scalar()
+                if high is None:
+                    # Chưa worker nào thuê khối của loại này
+                    high = self._seeders[entity]()
+                    accepted = [i for i in ids if i > high]
+                    session.add(
+                        IdAllocation(EntityName=entity, HighWaterMark=max(accepted or [high]))
+                    )
+                    try:
+                        session.commit()
+                    except IntegrityError:
+                        session.rollback()
+                        continue
+                    return accepted
+
+                accepted = [i for i in ids if i > high]
+                if not accepted:
+                    return []
+                # So sánh-và-đặt: worker khác vừa thuê khối thì đọc lại mốc
+                result = session.execute(
+                    update(IdAllocation)
+                    .where(IdAllocation.EntityName == entity)
+                    .where(IdAllocation.HighWaterMark == high)
+                    .values(HighWaterMark=accepted[-1], UpdatedAt=func.now())
+                )
+                session.commit()
+                if result.rowcount:
+                    return accepted
+        return []
+
+    def _lease(self, entity: str, size: int) -> tuple[int, int]:
+        while True:
+            with self.session_factory() as session:
+                # UPDATE giữ khóa dòng tới khi commit nên các worker không thuê trùng khối
+                result = session.execute(
+                    update(IdAllocation)
+                    .where(IdAllocation.EntityName == entity)
+                    .values(
+                        HighWaterMark=IdAllocation.HighWaterMark + size,
+                        UpdatedAt=func.now(),
+                    )
+                )
+                if result.rowcount:
+                    high = session.execute(
+                        select(IdAllocation.HighWaterMark).where(
+                            IdAllocation.EntityName == entity
+                        )
+                    ).scalar_one()
+                    session.commit()
+                else:
+                    high = self._seeders[entity]() + size
+                    session.add(IdAllocation(EntityName=entity, HighWaterMark=high))
+                    try:
+                        session.commit()
+                    except IntegrityError:
+                        # Worker khác vừa khởi tạo mốc, thuê lại theo cách thông thường
+                        session.rollback()
+                        continue
+
+            self._leases[entity] += 1
+            return high - size + 1, high
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "block_size": self.block_size,
+            "entities": {
+                entity: {
+                    "next_id": block[0] if block[0] <= block[1] else None,
+                    "block_end": block[1] or None,
+                    "remaining": max(block[1] - block[0] + 1, 0),
+                    "leases": self._leases[entity],
+                }
+                for entity, block in self._blocks.items()
+            },
+        }
+
+
+def ensure_id_allocation_table() -> None:
+    IdAllocation.__table__.create(human_engine, checkfirst=True)
+
+
+def _max_id(human_column, payroll_column) -> Callable[[], int]:
+    def seeder() -> int:
+        with HumanSessionLocal() as session_human, PayrollSessionLocal() as session_payroll:
+            return max(
+                session_human.query(func.max(human_column)).scalar() or 0,
+                session_payroll.query(func.max(payroll_column)).scalar() or 0,
+            )
+
+    return seeder
+
+
+EMPLOYEE = "Employee"
+DEPARTMENT = "Department"
+POSITION = "Position"
+
+id_allocator = IdBlockAllocator(HumanSessionLocal, id_allocator_conf.ID_BLOCK_SIZE)
+id_allocator.register(EMPLOYEE, _max_id(HmEmployee.EmployeeID, PrEmployee.EmployeeID))
+id_allocator.register(
+    DEPARTMENT, _max_id(HmDepartment.DepartmentID, PrDepartment.DepartmentID)
+)
+id_allocator.register(POSITION, _max_id(HmPosition.PositionID, PrPosition.PositionID))
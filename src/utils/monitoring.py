@@ -0,0 +1,49 @@
+from sqlalchemy.orm import Session
+
+from typing import Any, Dict
+
+from src.databases.pool import all_pool_status
+from src.utils.password import password_hasher
+from src.utils.id_allocator import id_allocator
+from src.utils.replication import replication_status
+from src.utils.notification_store import notification_scheduler
+from src.utils.notifications import smtp_pool
+from src.utils.salary_email_jobs import salary_email_worker
+from src.utils.dashboard_cache import dashboard_cache
+from src.utils.payroll_snapshot import payroll_snapshot
+
+
+def get_pool_stats_logic() -> Dict[str, Any]:
+    return all_pool_status()
+
+
+def get_password_hash_stats_logic() -> Dict[str, Any]:
+    return password_hasher.stats()
+
+
+def get_id_allocator_stats_logic() -> Dict[str, Any]:
+    return id_allocator.stats()
+
+
+def get_replication_status_logic(session_human: Session) -> Dict[str, Any]:
+    return replication_status(session_human)
+
+
+def get_notification_scheduler_stats_logic() -> Dict[str, Any]:
+    return notification_scheduler.stats()
+
+
+def get_smtp_pool_stats_logic() -> Dict[str, Any]:
+    return smtp_pool.stats()
+
+
+def get_salary_email_worker_stats_logic() -> Dict[str, Any]:
+    return salary_email_worker.stats()
+
+
+def get_dashboard_cache_stats_logic() -> Dict[str, Any]:
+    return dashboard_cache.stats()
+
+
+def get_payroll_snapshot_stats_logic() -> Dict[str, Any]:
+    return payroll_snapshot.stats()
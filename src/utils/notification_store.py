@@ -0,0 +1,549 @@
+from sqlalchemy import and_, case, delete, func, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from fastapi import HTTPException
+
+import asyncio
+import json
+from datetime import date, datetime
+from threading import Lock
+from time import monotonic
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.core.config import notification_conf
+from src.databases.human_db import SessionLocal as HumanSessionLocal
+from src.databases.payroll_db import (
+    SessionLocal as PayrollSessionLocal,
+    engine as payroll_engine,
+)
+from ..schemas.payroll import (
+    Attendance as PrAttendance,
+    Employee as PrEmployee,
+    Notification,
+    NotificationRead,
+)
+from .auth import CurrentUser
+from .notifications import (
+    ABSENCE_WINDOW_MONTHS,
+    ABSENT_DAYS,
+    ABSENT_DAYS_PERSONAL,
+    ANNIVERSARIES,
+    ANNIVERSARY_WINDOW_DAYS,
+    ROLE_NOTIFICATIONS,
+    SALARY_GAP,
+    SALARY_GAP_PERSONAL,
+    absent_days_item,
+    absent_days_query,
+    absent_days_warning,
+    absent_days_warning_personal,
+    anniversary_hits,
+    anniversary_item,
+    notification_summary,
+    salary_gap_item,
+    salary_gap_query,
+    salary_gap_warning,
+    salary_gap_warning_personal,
+    upcoming_anniversaries,
+)
+
+# Các loại thông báo được lưu sẵn; loại "cá nhân" là lọc theo EmployeeID trên cùng loại
+STORED_KINDS = [ANNIVERSARIES, ABSENT_DAYS, SALARY_GAP]
+PERSONAL_KINDS = {ABSENT_DAYS_PERSONAL: ABSENT_DAYS, SALARY_GAP_PERSONAL: SALARY_GAP}
+# Thứ tự trả về giống các API tính trực tiếp
+KIND_ORDER = {
+    ANNIVERSARIES: (Notification.EventDate, Notification.EmployeeID),
+    ABSENT_DAYS: (Notification.EventDate.desc(), Notification.EmployeeID),
+    SALARY_GAP: (Notification.EmployeeID,),
+}
+CHUNK_SIZE = 1000
+
+
+def _chunks(values: List[int]) -> Iterable[List[int]]:
+    for i in range(0, len(values), CHUNK_SIZE):
+        yield values[i : i + CHUNK_SIZE]
+
+
+def ensure_notification_tables() -> None:
+    Notification.__table__.create(payroll_engine, checkfirst=True)
+    NotificationRead.__table__.create(payroll_engine, checkfirst=True)
+
+
+def _compute(
+    session_human: Session,
+    session_payroll: Session,
+    kind: str,
+    employee_ids: Optional[List[int]] = None,
+) -> Dict[Tuple[int, str], Tuple[date, Dict[str, Any]]]:
+    """
+    Tính lại thông báo của một loại với tham số mặc định:
+    (EmployeeID, RefKey) -> (EventDate, nội dung như API trả về).
+    """
+    if kind == ANNIVERSARIES:
+        wanted = set(employee_ids) if employee_ids is not None else None
+        return {
+            (emp.EmployeeID, anniversary_date.isoformat()): (
+                anniversary_date,
+                anniversary_item(anniversary_date, emp, milestone),
+            )
+            for anniversary_date, emp, milestone in anniversary_hits(
+                session_human, ANNIVERSARY_WINDOW_DAYS
+            )
+            if wanted is None or emp.EmployeeID in wanted
+        }
+
+    if kind == ABSENT_DAYS:
+        query = absent_days_query(session_payroll, ABSENCE_WINDOW_MONTHS).order_by(None)
+        if employee_ids is not None:
+            query = query.filter(PrAttendance.EmployeeID.in_(employee_ids))
+        return {
+            (row.EmployeeID, str(row.AttendanceID)): (
+                row.AttendanceMonth,
+                absent_days_item(row),
+            )
+            for row in query
+        }
+
+    pct = notification_conf.SALARY_GAP_ALLOWED_PERCENTAGE
+    if employee_ids is None:
+        rows = salary_gap_query(session_payroll, pct).order_by(None).all()
+    else:
+        # Lọc từng nhân viên trước khi tính LEAD; luồng ghi chỉ đánh dấu vài nhân viên
+        rows = [
+            row
+            for employee_id in employee_ids
+            for row in salary_gap_query(session_payroll, pct, employee_id)
+        ]
+    return {
+        (row.EmployeeID, row.CurrentMonth.isoformat()): (
+            row.CurrentMonth,
+            salary_gap_item(row),
+        )
+        for row in rows
+    }
+
+
+def _delete_notifications(session_payroll: Session, notification_ids: List[int]) -> None:
+    for chunk in _chunks(notification_ids):
+        session_payroll.execute(
+            delete(NotificationRead).where(NotificationRead.NotificationID.in_(chunk))
+        )
+        session_payroll.execute(
+            delete(Notification).where(Notification.NotificationID.in_(chunk))
+        )
+
+
+def refresh_notifications(
+    session_human: Session,
+    session_payroll: Session,
+    kind: str,
+    employee_ids: Optional[List[int]] = None,
+) -> Dict[str, int]:
+    """
+    Đồng bộ bảng notifications của một loại (toàn bộ, hoặc chỉ employee_ids)
+    với kết quả tính lại. Thông báo không đổi giữ nguyên NotificationID nên
+    trạng thái đã đọc của người dùng không mất.
+    """
+    fresh = {
+        key: (event_date, json.dumps(item, ensure_ascii=False, default=float))
+        for key, (event_date, item) in _compute(
+            session_human, session_payroll, kind, employee_ids
+        ).items()
+    }
+
+    query = session_payroll.query(
+        Notification.NotificationID,
+        Notification.EmployeeID,
+        Notification.RefKey,
+        Notification.Payload,
+    ).filter(Notification.Kind == kind)
+    if employee_ids is not None:
+        query = query.filter(Notification.EmployeeID.in_(employee_ids))
+    existing = {(row.EmployeeID, row.RefKey): row for row in query}
+
+    now = datetime.now()
+    stale = [row.NotificationID for key, row in existing.items() if key not in fresh]
+    changed = [
+        {
+            "NotificationID": existing[key].NotificationID,
+            "EventDate": event_date,
+            "Payload": payload,
+            "UpdatedAt": now,
+        }
+        for key, (event_date, payload) in fresh.items()
+        if key in existing and existing[key].Payload != payload
+    ]
+    new = [
+        {
+            "Kind": kind,
+            "EmployeeID": employee_id,
+            "RefKey": ref_key,
+            "EventDate": event_date,
+            "Payload": payload,
+            "UpdatedAt": now,
+        }
+        for (employee_id, ref_key), (event_date, payload) in fresh.items()
+        if (employee_id, ref_key) not in existing
+    ]
+
+    try:
+        _delete_notifications(session_payroll, stale)
+        if changed:
+            session_payroll.execute(update(Notification), changed)
+        if new:
+            session_payroll.execute(insert(Notification), new)
+        session_payroll.commit()
+    except Exception:
+        session_payroll.rollback()
+        raise
+
+    return {"inserted": len(new), "updated": len(changed), "deleted": len(stale)}
+
+
+class NotificationScheduler:
+    """
+    Làm mới bảng notifications trong tiến trình.
+
+    - Tính lại toàn bộ khi khởi động, khi sang ngày mới (cửa sổ kỷ niệm và
+      nghỉ phép dịch theo ngày) và sau mỗi refresh_seconds.
+    - Giữa các lần đó chỉ tính lại cho các nhân viên mà luồng ghi đã đánh dấu
+      qua mark_dirty.
+    """
+
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self.ready = False
+        self._lock = Lock()
+        self._pending: Dict[str, Set[int]] = {}
+        self._refreshed_on: Optional[date] = None
+        self._refreshed_at = 0.0
+        self._full_refreshes = 0
+        self._scoped_refreshes = 0
+        self._last_run_at: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+
+    def mark_dirty(self, kind: str, employee_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._pending.setdefault(kind, set()).update(employee_ids)
+
+    def _full_refresh_due(self) -> bool:
+        return (
+            not self.ready
+            or self._refreshed_on != date.today()
+            or monotonic() - self._refreshed_at >= self.refresh_seconds
+        )
+
+    def run_once(self) -> None:
+        with HumanSessionLocal() as session_human, PayrollSessionLocal() as session_payroll:
+            if self._full_refresh_due():
+                # Lần tính toàn bộ đã bao gồm các nhân viên đang chờ
+                with self._lock:
+                    self._pending = {}
+                for kind in STORED_KINDS:
+                    refresh_notifications(session_human, session_payroll, kind)
+                with self._lock:
+                    self.ready = True
+                    self._refreshed_on = date.today()
+                    self._refreshed_at = monotonic()
+                    self._full_refreshes += 1
+                    self._last_run_at = datetime.now()
+                return
+
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for kind, employee_ids in pending.items():
+                try:
+                    refresh_notifications(
+                        session_human, session_payroll, kind, sorted(employee_ids)
+                    )
+                except Exception:
+                    self.mark_dirty(kind, employee_ids)
+                    raise
+            if pending:
+                with self._lock:
+                    self._scoped_refreshes += 1
+                    self._last_run_at = datetime.now()
+
+    def record_error(self, error: Exception) -> None:
+        with self._lock:
+            self._last_error = f"{datetime.now().isoformat()}: {str(error)[:500]}"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "refresh_seconds": self.refresh_seconds,
+                "refreshed_on": self._refreshed_on,
+                "full_refreshes": self._full_refreshes,
+                "scoped_refreshes": self._scoped_refreshes,
+                "pending": {kind: len(ids) for kind, ids in self._pending.items()},
+                "last_run_at": self._last_run_at,
+                "last_error": self._last_error,
+            }
+
+
+notification_scheduler = NotificationScheduler(
+    refresh_seconds=notification_conf.NOTIFICATION_REFRESH_SECONDS
+)
+
+
+async def run_notification_scheduler() -> None:
+    while True:
+        try:
+            await asyncio.to_thread(notification_scheduler.run_once)
+        except IntegrityError as e:
+            # Worker khác vừa ghi cùng thông báo; lần chạy sau sẽ đồng bộ lại
+            notification_scheduler.record_error(e)
+        except Exception as e:
+            notification_scheduler.record_error(e)
+            print(f"Lỗi khi làm mới bảng thông báo: {str(e)}")
+        await asyncio.sleep(notification_conf.NOTIFICATION_POLL_SECONDS)
+
+
+def _kind_condition(kind: str, user: CurrentUser):
+    if kind in PERSONAL_KINDS:
+        return and_(
+            Notification.Kind == PERSONAL_KINDS[kind],
+            Notification.EmployeeID == user.Employee_id,
+        )
+    return Notification.Kind == kind
+
+
+def _read_join(user: CurrentUser):
+    return and_(
+        NotificationRead.NotificationID == Notification.NotificationID,
+        NotificationRead.Username == user.Username,
+    )
+
+
+def stored_notifications(
+    session_payroll: Session,
+    kind: str,
+    user: CurrentUser,
+    employee_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    page: Optional[int] = None,
+    per_page: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Đọc thông báo đã lưu kèm NotificationID và trạng thái đã đọc của user.
+    """
+    query = (
+        session_payroll.query(
+            Notification.NotificationID, Notification.Payload, NotificationRead.ReadAt
+        )
+        .outerjoin(NotificationRead, _read_join(user))
+        .filter(_kind_condition(kind, user))
+    )
+    if employee_id is not None:
+        query = query.filter(Notification.EmployeeID == employee_id)
+    if department_id is not None:
+        query = query.join(
+            PrEmployee, PrEmployee.EmployeeID == Notification.EmployeeID
+        ).filter(PrEmployee.DepartmentID == department_id)
+
+    total = query.count()
+    query = query.order_by(*KIND_ORDER[PERSONAL_KINDS.get(kind, kind)])
+    if page is not None:
+        query = query.offset((page - 1) * per_page).limit(per_page)
+
+    items = [
+        {
+            **json.loads(row.Payload),
+            "NotificationID": row.NotificationID,
+            "IsRead": row.ReadAt is not None,
+        }
+        for row in query
+    ]
+    return items, total
+
+
+def anniversaries_feed(
+    session_human: Session,
+    session_payroll: Session,
+    user: CurrentUser,
+    window_days: int = ANNIVERSARY_WINDOW_DAYS,
+):
+    if window_days != ANNIVERSARY_WINDOW_DAYS or not notification_scheduler.ready:
+        return upcoming_anniversaries(session_human, window_days)
+
+    items, total = stored_notifications(session_payroll, ANNIVERSARIES, user)
+    return {
+        "count": total,
+        "upcoming_anniversaries": items if items else "Không có thông báo",
+    }
+
+
+def absent_days_feed(
+    session_payroll: Session,
+    user: CurrentUser,
+    windows_month: int = ABSENCE_WINDOW_MONTHS,
+    department_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    page: int = 1,
+    per_page: int = 50,
+):
+    if windows_month != ABSENCE_WINDOW_MONTHS or not notification_scheduler.ready:
+        return absent_days_warning(
+            session_payroll, windows_month, department_id, employee_id, page, per_page
+        )
+
+    items, total = stored_notifications(
+        session_payroll, ABSENT_DAYS, user, employee_id, department_id, page, per_page
+    )
+    return {
+        "count": total,
+        "absent_days_warning": items if items else "Không có thông báo",
+    }
+
+
+def absent_days_personal_feed(session_payroll: Session, user: CurrentUser):
+    if not notification_scheduler.ready:
+        return absent_days_warning_personal(session_payroll, user)
+
+    items, total = stored_notifications(session_payroll, ABSENT_DAYS_PERSONAL, user)
+    return {
+        "count": total,
+        "absent_days_warning": items if items else "Không có thông báo",
+    }
+
+
+def salary_gap_feed(
+    session_payroll: Session,
+    user: CurrentUser,
+    allowed_gap_percentage: float = notification_conf.SALARY_GAP_ALLOWED_PERCENTAGE,
+    page: int = 1,
+    per_page: int = 50,
+):
+    if (
+        allowed_gap_percentage != notification_conf.SALARY_GAP_ALLOWED_PERCENTAGE
+        or not notification_scheduler.ready
+    ):
+        return salary_gap_warning(session_payroll, allowed_gap_percentage, page, per_page)
+
+    items, total = stored_notifications(
+        session_payroll, SALARY_GAP, user, page=page, per_page=per_page
+    )
+    return {
+        "count": total,
+        "salary_gap_warning": items if items else "Không có thông báo",
+    }
+
+
+def salary_gap_personal_feed(session_payroll: Session, user: CurrentUser):
+    if not notification_scheduler.ready:
+        return salary_gap_warning_personal(session_payroll, user)
+
+    items, total = stored_notifications(session_payroll, SALARY_GAP_PERSONAL, user)
+    for item in items:
+        item["EmployeeName"] = item["EmployeeName"] or user.Username
+    return {
+        "count": total,
+        "salary_gap_warning": items if items else "Không có thông báo",
+    }
+
+
+def notification_counts(
+    session_human: Session,
+    session_payroll: Session,
+    user: CurrentUser,
+    kinds: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Số thông báo và số chưa đọc theo từng loại, một truy vấn GROUP BY trên
+    bảng notifications. Khi bảng chưa được làm mới lần nào trong tiến trình
+    thì đếm trực tiếp (chưa có trạng thái đọc).
+    """
+    kinds = kinds if kinds is not None else ROLE_NOTIFICATIONS.get(user.Role, [])
+    if not notification_scheduler.ready:
+        summary = notification_summary(session_human, session_payroll, user, kinds)
+        summary["unread"] = summary["total"]
+        summary["unread_counts"] = dict(summary["counts"])
+        return summary
+
+    read = NotificationRead.NotificationID.isnot(None)
+    mine = Notification.EmployeeID == user.Employee_id
+    rows = (
+        session_payroll.query(
+            Notification.Kind,
+            func.count(),
+            func.count(NotificationRead.NotificationID),
+            func.coalesce(func.sum(case((mine, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((and_(mine, read), 1), else_=0)), 0),
+        )
+        .outerjoin(NotificationRead, _read_join(user))
+        .filter(Notification.Kind.in_({PERSONAL_KINDS.get(k, k) for k in kinds}))
+        .group_by(Notification.Kind)
+        .all()
+    )
+    by_kind = {row[0]: row[1:] for row in rows}
+
+    counts: Dict[str, int] = {}
+    unread_counts: Dict[str, int] = {}
+    for kind in kinds:
+        total, total_read, personal, personal_read = by_kind.get(
+            PERSONAL_KINDS.get(kind, kind), (0, 0, 0, 0)
+        )
+        if kind in PERSONAL_KINDS:
+            counts[kind], unread_counts[kind] = personal, personal - personal_read
+        else:
+            counts[kind], unread_counts[kind] = total, total - total_read
+
+    return {
+        "total": sum(counts.values()),
+        "unread": sum(unread_counts.values()),
+        "counts": counts,
+        "unread_counts": unread_counts,
+    }
+
+
+def mark_notifications_read(
+    session_payroll: Session,
+    user: CurrentUser,
+    notification_ids: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Đánh dấu đã đọc các thông báo user được xem (theo vai trò);
+    notification_ids=None nghĩa là tất cả.
+    """
+    kinds = ROLE_NOTIFICATIONS.get(user.Role, [])
+    unread_ids: List[int] = []
+    if kinds:
+        query = (
+            session_payroll.query(Notification.NotificationID)
+            .outerjoin(NotificationRead, _read_join(user))
+            .filter(
+                or_(*[_kind_condition(kind, user) for kind in kinds]),
+                NotificationRead.NotificationID.is_(None),
+            )
+        )
+        if notification_ids is not None:
+            query = query.filter(Notification.NotificationID.in_(notification_ids))
+        unread_ids = [notification_id for (notification_id,) in query]
+
+    if unread_ids:
+        now = datetime.now()
+        try:
+            for chunk in _chunks(unread_ids):
+                session_payroll.execute(
+                    insert(NotificationRead),
+                    [
+                        {
+                            "NotificationID": notification_id,
+                            "Username": user.Username,
+                            "ReadAt": now,
+                        }
+                        for notification_id in chunk
+                    ],
+                )
+            session_payroll.commit()
+        except Exception as e:
+            session_payroll.rollback()
+            raise HTTPException(
+                status_code=500, detail=f"Lỗi khi đánh dấu đã đọc: {str(e)}"
+            )
+
+    return {
+        "message": f"Đã đánh dấu {len(unread_ids)} thông báo là đã đọc.",
+        "marked": len(unread_ids),
+    }
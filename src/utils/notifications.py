@@ -1,17 +1,14 @@
-from sqlalchemy import func, desc, extract
+from sqlalchemy import case, func, desc, extract
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, status
 
 from datetime import date, datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from decimal import Decimal
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 from dotenv import load_dotenv
-import concurrent.futures
-from time import time
 
 from ..schemas.human import (
     Department as HmDepartment,
@@ -27,7 +24,12 @@ from ..schemas.payroll import (
 )
 
 from ..schemas.user import User
-from src.utils.auth import get_current_user
+from src.utils.auth import CurrentUser
+from src.models.user import Role
+from src.core.config import notification_conf, salary_email_conf, smtp_pool_conf
+from .calendar_index import calendar_index
+from .email_templates import SalaryEmailRenderer
+from .smtp_pool import SMTPConnectionPool
 
 # Tải biến môi trường
 load_dotenv()
@@ -39,40 +41,58 @@ EMAIL_USERNAME = os.getenv("EMAIL_USERNAME", "")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD", "")
 EMAIL_FROM = os.getenv("EMAIL_FROM", "noreply@company.com")
 
-# Số worker threads tối đa cho gửi email (tăng hoặc giảm dựa trên tài nguyên hệ thống)
-MAX_WORKER_THREADS = 5
+# Số worker threads tối đa cho gửi email, mỗi luồng giữ một kết nối trong smtp_pool
+MAX_WORKER_THREADS = smtp_pool_conf.SMTP_POOL_SIZE
+
+smtp_pool = SMTPConnectionPool(
+    EMAIL_HOST,
+    EMAIL_PORT,
+    EMAIL_USERNAME,
+    EMAIL_PASSWORD,
+    size=MAX_WORKER_THREADS,
+    max_messages=smtp_pool_conf.SMTP_MAX_MESSAGES_PER_CONNECTION,
+    idle_timeout=smtp_pool_conf.SMTP_IDLE_TIMEOUT_SECONDS,
+    timeout=smtp_pool_conf.SMTP_TIMEOUT_SECONDS,
+)
 
 
-def upcoming_anniversaries(session: Session, window_days: int = 30):
-    today = datetime.today().date()
-    upcoming = []
+# Các mốc thâm niên (năm) được thông báo
+MILESTONE_YEARS = (1, 5, 10, 15, 20, 25, 30)
+# Khoảng mặc định: kỷ niệm trong 30 ngày tới, nghỉ quá phép trong 3 tháng gần đây
+ANNIVERSARY_WINDOW_DAYS = 30
+ABSENCE_WINDOW_MONTHS = 3
 
-    employees = session.query(HmEmployee).all()
 
-    for emp in employees:
-        if not emp.HireDate:
-            continue
+def _ensure_calendar_index(session: Session) -> None:
+    # Lần gọi đầu trước khi tác vụ nền dựng xong: dựng bằng session hiện có
+    if not calendar_index.ready:
+        calendar_index.rebuild(session)
 
-        hire_date = emp.HireDate
 
-        for milestone in [1, 5, 10, 15, 20, 25, 30]:
-            anniversary_date = hire_date.replace(year=hire_date.year + milestone)
-            delta = (anniversary_date - today).days
+def anniversary_hits(session: Session, window_days: int):
+    _ensure_calendar_index(session)
+    today = datetime.today().date()
+    for anniversary_date, emp in calendar_index.upcoming_hire_dates(today, window_days):
+        milestone = anniversary_date.year - emp.HireDate.year
+        if milestone in MILESTONE_YEARS:
+            yield anniversary_date, emp, milestone
 
-            upcoming_milestone = milestone + 5 if milestone % 5 == 0 else 5
 
-            if 0 <= delta <= window_days:
-                upcoming.append(
-                    {
-                        "EmployeeID": emp.EmployeeID,
-                        "FullName": emp.FullName,
-                        "MilestoneYears": milestone,
-                        "JoinDate": hire_date.strftime("%Y-%m-%d"),
-                        "AnniversaryDate": anniversary_date.strftime("%Y-%m-%d"),
-                        "UpcomingMilestone": upcoming_milestone,
-                    }
-                )
-                break
+def anniversary_item(anniversary_date: date, emp, milestone: int) -> Dict[str, Any]:
+    return {
+        "EmployeeID": emp.EmployeeID,
+        "FullName": emp.FullName,
+        "MilestoneYears": milestone,
+        "JoinDate": emp.HireDate.strftime("%Y-%m-%d"),
+        "AnniversaryDate": anniversary_date.strftime("%Y-%m-%d"),
+        "UpcomingMilestone": milestone + 5 if milestone % 5 == 0 else 5,
+    }
+
+
+def upcoming_anniversaries(session: Session, window_days: int = ANNIVERSARY_WINDOW_DAYS):
+    upcoming = [
+        anniversary_item(*hit) for hit in anniversary_hits(session, window_days)
+    ]
 
     return {
         "count": len(upcoming),
@@ -80,74 +100,103 @@ def upcoming_anniversaries(session: Session, window_days: int = 30):
     }
 
 
-def absent_days_warning(session: Session, windows_month: int = 3):
+def upcoming_birthdays(session: Session, window_days: int = 30):
+    _ensure_calendar_index(session)
     today = datetime.today().date()
-    warnings = []
-
-    attendance = session.query(PrAttendance).all()
-
-    for att in attendance:
-        absent_days = att.AbsentDays
-        leave_days = att.LeaveDays
-
-        month_notification = today.month - att.AttendanceMonth.month
-
-        if absent_days > leave_days and month_notification <= windows_month:
-            warnings.append(
-                {
-                    "EmployeeID": att.EmployeeID,
-                    "AllowedLeaveDays": leave_days,
-                    "TakenLeaveDays": absent_days,
-                    "ExcessDays": absent_days - leave_days,
-                    "AttendanceMonth": att.AttendanceMonth.strftime("%Y-%m-%d"),
-                }
-            )
+    upcoming = [
+        {
+            "EmployeeID": emp.EmployeeID,
+            "FullName": emp.FullName,
+            "DateOfBirth": emp.DateOfBirth.strftime("%Y-%m-%d"),
+            "BirthdayDate": birthday.strftime("%Y-%m-%d"),
+            "Age": birthday.year - emp.DateOfBirth.year,
+        }
+        for birthday, emp in calendar_index.upcoming_birthdays(today, window_days)
+    ]
 
     return {
-        "count": len(warnings),
-        "absent_days_warning": warnings if warnings else "Không có thông báo",
+        "count": len(upcoming),
+        "upcoming_birthdays": upcoming if upcoming else "Không có thông báo",
     }
 
 
-def absent_days_warning_personal(
-    db_user: Session, db_payroll: Session, token: str, windows_month: int = 3
-):
-    user = get_current_user(db_user, token)
+def absence_window_start(today: date, windows_month: int) -> date:
+    """
+    Ngày đầu tháng cách tháng hiện tại windows_month tháng, tính cả năm
+    (ví dụ tháng 2/2025 lùi 3 tháng -> 2024-11-01).
+    """
+    month_index = today.year * 12 + (today.month - 1) - windows_month
+    return date(month_index // 12, month_index % 12 + 1, 1)
 
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Không thể xác thực tài khoản",
-        headers={"WWW-Authenticate": "Bearer"},
+
+def absent_days_query(
+    session: Session,
+    windows_month: int,
+    department_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+):
+    # Lọc theo khoảng ngày trên AttendanceMonth để dùng được chỉ mục, chỉ trả về dòng vượt ngưỡng
+    query = session.query(
+        PrAttendance.AttendanceID,
+        PrAttendance.EmployeeID,
+        PrAttendance.LeaveDays,
+        PrAttendance.AbsentDays,
+        PrAttendance.AttendanceMonth,
+    ).filter(
+        PrAttendance.AttendanceMonth
+        >= absence_window_start(datetime.today().date(), windows_month),
+        PrAttendance.AbsentDays > PrAttendance.LeaveDays,
+    )
+    if employee_id is not None:
+        query = query.filter(PrAttendance.EmployeeID == employee_id)
+    if department_id is not None:
+        query = query.join(
+            PrEmployee, PrEmployee.EmployeeID == PrAttendance.EmployeeID
+        ).filter(PrEmployee.DepartmentID == department_id)
+
+    return query.order_by(
+        PrAttendance.AttendanceMonth.desc(), PrAttendance.EmployeeID
     )
 
-    if not user:
-        raise credentials_exception
 
-    today = datetime.today().date()
-    warnings = []
+def absent_days_item(row) -> Dict[str, Any]:
+    return {
+        "EmployeeID": row.EmployeeID,
+        "AllowedLeaveDays": row.LeaveDays,
+        "TakenLeaveDays": row.AbsentDays,
+        "ExcessDays": row.AbsentDays - row.LeaveDays,
+        "AttendanceMonth": row.AttendanceMonth.strftime("%Y-%m-%d"),
+    }
 
-    attendance = (
-        db_payroll.query(PrAttendance)
-        .filter(PrAttendance.EmployeeID == user.Employee_id)
-        .all()
-    )
 
-    for att in attendance:
-        absent_days = att.AbsentDays
-        leave_days = att.LeaveDays
+def absent_days_warning(
+    session: Session,
+    windows_month: int = ABSENCE_WINDOW_MONTHS,
+    department_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    page: int = 1,
+    per_page: int = 50,
+):
+    query = absent_days_query(session, windows_month, department_id, employee_id)
+    total = query.order_by(None).count()
+    rows = query.offset((page - 1) * per_page).limit(per_page).all()
+    warnings = [absent_days_item(row) for row in rows]
+
+    return {
+        "count": total,
+        "absent_days_warning": warnings if warnings else "Không có thông báo",
+    }
 
-        month_notification = today.month - att.AttendanceMonth.month
 
-        if absent_days > leave_days and month_notification <= windows_month:
-            warnings.append(
-                {
-                    "EmployeeID": att.EmployeeID,
-                    "AllowedLeaveDays": leave_days,
-                    "TakenLeaveDays": absent_days,
-                    "ExcessDays": absent_days - leave_days,
-                    "AttendanceMonth": att.AttendanceMonth.strftime("%Y-%m-%d"),
-                }
-            )
+def absent_days_warning_personal(
+    db_payroll: Session, user: CurrentUser, windows_month: int = ABSENCE_WINDOW_MONTHS
+):
+    warnings = [
+        absent_days_item(row)
+        for row in absent_days_query(
+            db_payroll, windows_month, employee_id=user.Employee_id
+        )
+    ]
 
     return {
         "count": len(warnings),
@@ -155,106 +204,209 @@ def absent_days_warning_personal(
     }
 
 
-def salary_gap_warning(session: Session, allowed_gap_percentage: int = 30):
-    warnings = []
+def salary_gap_query(
+    session: Session, allowed_gap_percentage: float, employee_id: Optional[int] = None
+):
+    """
+    Một truy vấn duy nhất: LEAD theo từng nhân viên lấy lương tháng liền trước
+    của bản ghi mới nhất, rồi lọc chênh lệch ngay trong SQL.
+    """
+    salary_order = (PrSalary.SalaryMonth.desc(), PrSalary.SalaryID.desc())
+    ranked = session.query(
+        PrSalary.EmployeeID.label("EmployeeID"),
+        PrSalary.NetSalary.label("CurrentSalary"),
+        PrSalary.SalaryMonth.label("CurrentMonth"),
+        func.lead(PrSalary.NetSalary, type_=PrSalary.NetSalary.type)
+        .over(partition_by=PrSalary.EmployeeID, order_by=salary_order)
+        .label("PreviousSalary"),
+        func.lead(PrSalary.SalaryMonth, type_=PrSalary.SalaryMonth.type)
+        .over(partition_by=PrSalary.EmployeeID, order_by=salary_order)
+        .label("PreviousMonth"),
+        func.row_number()
+        .over(partition_by=PrSalary.EmployeeID, order_by=salary_order)
+        .label("rn"),
+    )
+    if employee_id is not None:
+        ranked = ranked.filter(PrSalary.EmployeeID == employee_id)
+    ranked = ranked.subquery()
+
+    return (
+        session.query(ranked, PrEmployee.FullName)
+        .outerjoin(PrEmployee, PrEmployee.EmployeeID == ranked.c.EmployeeID)
+        .filter(
+            ranked.c.rn == 1,
+            ranked.c.PreviousSalary > 0,
+            func.abs(ranked.c.CurrentSalary - ranked.c.PreviousSalary) * 100
+            >= ranked.c.PreviousSalary * allowed_gap_percentage,
+        )
+        .order_by(ranked.c.EmployeeID)
+    )
 
-    employees = session.query(PrEmployee).options(joinedload(PrEmployee.salaries)).all()
 
-    for employee in employees:
-        salaries = (
-            session.query(PrSalary)
-            .filter(PrSalary.EmployeeID == employee.EmployeeID)
-            .order_by(PrSalary.SalaryMonth.desc())
-            .limit(2)
-            .all()
-        )
+def salary_gap_item(row) -> Dict[str, Any]:
+    gap_percentage = (row.CurrentSalary - row.PreviousSalary) / row.PreviousSalary * 100
+    return {
+        "EmployeeID": row.EmployeeID,
+        "EmployeeName": row.FullName,
+        "CurrentSalary": row.CurrentSalary,
+        "PreviousSalary": row.PreviousSalary,
+        "GapPercentage": round(gap_percentage, 2),
+        "CurrentMonth": row.CurrentMonth.strftime("%Y-%m-%d"),
+        "PreviousMonth": row.PreviousMonth.strftime("%Y-%m-%d"),
+    }
 
-        if len(salaries) < 2:
-            continue
 
-        current_salary = salaries[0].NetSalary
-        previous_salary = salaries[1].NetSalary
-
-        if previous_salary or previous_salary > 0:
-            gap_percentage = (current_salary - previous_salary) / previous_salary * 100
-
-            if abs(gap_percentage) >= allowed_gap_percentage:
-                warnings.append(
-                    {
-                        "EmployeeID": employee.EmployeeID,
-                        "EmployeeName": employee.FullName,
-                        "CurrentSalary": current_salary,
-                        "PreviousSalary": previous_salary,
-                        "GapPercentage": round(gap_percentage, 2),
-                        "CurrentMonth": salaries[0].SalaryMonth.strftime("%Y-%m-%d"),
-                        "PreviousMonth": salaries[1].SalaryMonth.strftime("%Y-%m-%d"),
-                    }
-                )
+def salary_gap_warning(
+    session: Session,
+    allowed_gap_percentage: float = notification_conf.SALARY_GAP_ALLOWED_PERCENTAGE,
+    page: int = 1,
+    per_page: int = 50,
+):
+    query = salary_gap_query(session, allowed_gap_percentage)
+    total = query.order_by(None).count()
+    rows = (
+        query.offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    warnings = [salary_gap_item(row) for row in rows]
 
     return {
-        "count": len(warnings),
+        "count": total,
         "salary_gap_warning": warnings if warnings else "Không có thông báo",
     }
 
 
 def salary_gap_warning_personal(
-    db_user: Session, db_payroll: Session, token: str, allowed_gap_percentage: int = 30
+    db_payroll: Session,
+    user: CurrentUser,
+    allowed_gap_percentage: float = notification_conf.SALARY_GAP_ALLOWED_PERCENTAGE,
 ):
-    user = get_current_user(db_user, token)
-
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Không thể xác thực tài khoản",
-        headers={"WWW-Authenticate": "Bearer"},
+    row = (
+        salary_gap_query(db_payroll, allowed_gap_percentage, user.Employee_id).first()
     )
+    if row is None:
+        return {"count": 0, "salary_gap_warning": "Không có thông báo"}
+
+    warning = salary_gap_item(row)
+    warning["EmployeeName"] = warning["EmployeeName"] or user.Username
+    return {"count": 1, "salary_gap_warning": [warning]}
+
+
+# Các loại thông báo được đếm trong notification_summary
+ANNIVERSARIES = "anniversaries"
+ABSENT_DAYS = "absent_days"
+ABSENT_DAYS_PERSONAL = "absent_days_personal"
+SALARY_GAP = "salary_gap"
+SALARY_GAP_PERSONAL = "salary_gap_personal"
+
+# Thông báo hiển thị trên dashboard của từng vai trò
+ROLE_NOTIFICATIONS = {
+    Role.ADMIN.value: [
+        ANNIVERSARIES, ABSENT_DAYS, ABSENT_DAYS_PERSONAL, SALARY_GAP, SALARY_GAP_PERSONAL
+    ],
+    Role.HR_MANAGER.value: [
+        ANNIVERSARIES, ABSENT_DAYS, ABSENT_DAYS_PERSONAL, SALARY_GAP_PERSONAL
+    ],
+    Role.PAYROLL_MANAGER.value: [
+        ANNIVERSARIES, SALARY_GAP_PERSONAL, ABSENT_DAYS_PERSONAL, SALARY_GAP
+    ],
+    Role.EMPLOYEE.value: [ANNIVERSARIES, ABSENT_DAYS_PERSONAL, SALARY_GAP_PERSONAL],
+}
+
+
+def _all_and_personal_counts(
+    query, employee_column, employee_id: Optional[int], include_all: bool
+) -> Tuple[int, int]:
+    """
+    Đếm số cảnh báo của tất cả và của riêng một nhân viên trong một câu
+    COUNT/SUM(CASE) với cùng điều kiện lọc, không nạp dòng nào về Python.
+    """
+    if not include_all:
+        personal = (
+            query.filter(employee_column == employee_id)
+            .with_entities(func.count())
+            .scalar()
+        )
+        return 0, personal or 0
 
-    if not user:
-        raise credentials_exception
+    total, personal = query.with_entities(
+        func.count(),
+        func.coalesce(func.sum(case((employee_column == employee_id, 1), else_=0)), 0),
+    ).one()
+    return total, personal
 
-    warnings = []
 
-    salaries = (
-        db_payroll.query(PrSalary)
-        .filter(PrSalary.EmployeeID == user.Employee_id)
-        .order_by(PrSalary.SalaryMonth.desc())
-        .limit(2)
-        .all()
-    )
-
-    if len(salaries) < 2:
-        return {"salary_gap_warning": "Không có thông báo"}
-
-    current_salary = salaries[0].NetSalary
-    previous_salary = salaries[1].NetSalary
+def notification_summary(
+    session_human: Session,
+    session_payroll: Session,
+    user: CurrentUser,
+    kinds: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Chỉ đếm số thông báo (dùng cho dashboard), mặc định theo vai trò của người dùng.
+    """
+    kinds = kinds if kinds is not None else ROLE_NOTIFICATIONS.get(user.Role, [])
+    counts: Dict[str, int] = {}
 
-    gap_percentage = (current_salary - previous_salary) / previous_salary * 100
+    if ANNIVERSARIES in kinds:
+        counts[ANNIVERSARIES] = sum(
+            1 for _ in anniversary_hits(session_human, ANNIVERSARY_WINDOW_DAYS)
+        )
 
-    if abs(gap_percentage) >= allowed_gap_percentage:
-        employee = (
-            db_payroll.query(PrEmployee)
-            .filter(PrEmployee.EmployeeID == user.Employee_id)
-            .first()
+    if ABSENT_DAYS in kinds or ABSENT_DAYS_PERSONAL in kinds:
+        total, personal = _all_and_personal_counts(
+            absent_days_query(session_payroll, ABSENCE_WINDOW_MONTHS).order_by(None),
+            PrAttendance.EmployeeID,
+            user.Employee_id,
+            include_all=ABSENT_DAYS in kinds,
         )
-        employee_name = employee.FullName if employee else user.FullName
-
-        warnings.append(
-            {
-                "EmployeeID": user.Employee_id,
-                "EmployeeName": employee_name,
-                "CurrentSalary": current_salary,
-                "PreviousSalary": previous_salary,
-                "GapPercentage": round(gap_percentage, 2),
-                "CurrentMonth": salaries[0].SalaryMonth.strftime("%Y-%m-%d"),
-                "PreviousMonth": salaries[1].SalaryMonth.strftime("%Y-%m-%d"),
-            }
+        if ABSENT_DAYS in kinds:
+            counts[ABSENT_DAYS] = total
+        if ABSENT_DAYS_PERSONAL in kinds:
+            counts[ABSENT_DAYS_PERSONAL] = personal
+
+    pct = notification_conf.SALARY_GAP_ALLOWED_PERCENTAGE
+    if SALARY_GAP in kinds:
+        gaps = salary_gap_query(session_payroll, pct).order_by(None).subquery()
+        counts[SALARY_GAP], personal = _all_and_personal_counts(
+            session_payroll.query(gaps), gaps.c.EmployeeID, user.Employee_id, True
+        )
+        if SALARY_GAP_PERSONAL in kinds:
+            counts[SALARY_GAP_PERSONAL] = personal
+    elif SALARY_GAP_PERSONAL in kinds:
+        # Chỉ cần của bản thân: lọc nhân viên trước khi tính LEAD
+        counts[SALARY_GAP_PERSONAL] = (
+            salary_gap_query(session_payroll, pct, user.Employee_id)
+            .order_by(None)
+            .count()
         )
 
     return {
-        "count": len(warnings),
-        "salary_gap_warning": warnings if warnings else "Không có thông báo",
+        "total": sum(counts.values()),
+        "counts": {kind: counts[kind] for kind in kinds if kind in counts},
     }
 
 
+def email_configured() -> bool:
+    return bool(EMAIL_USERNAME and EMAIL_PASSWORD)
+
+
+def build_email(
+    to_email: str, subject: str, body_html: str, body_text: Optional[str] = None
+) -> MIMEMultipart:
+    # Có phần văn bản thuần thì gửi multipart/alternative: trình đọc email chọn phần hiển thị được
+    msg = MIMEMultipart('alternative') if body_text is not None else MIMEMultipart()
+    msg['From'] = EMAIL_FROM
+    msg['To'] = to_email
+    msg['Subject'] = subject
+
+    if body_text is not None:
+        msg.attach(MIMEText(body_text, 'plain'))
+    msg.attach(MIMEText(body_html, 'html'))
+    return msg
+
+
 def send_email(to_email: str, subject: str, body_html: str) -> bool:
     """
     Gửi email sử dụng SMTP
@@ -267,318 +419,145 @@ def send_email(to_email: str, subject: str, body_html: str) -> bool:
     Returns:
         bool: True nếu gửi thành công, False nếu thất bại
     """
-    if not EMAIL_USERNAME or not EMAIL_PASSWORD:
+    if not email_configured():
         return False
         
     try:
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_FROM
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(body_html, 'html'))
-        
-        print(f"Kết nối tới máy chủ SMTP: {EMAIL_HOST}:{EMAIL_PORT}")
-        server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
-        server.set_debuglevel(0)  # Bật chế độ debug để xem các thông báo lỗi
-        
-        server.starttls()
-        
-        server.login(EMAIL_USERNAME, EMAIL_PASSWORD)
-        
-        server.send_message(msg)
-        
-        server.quit()
-        
+        # Dùng lại kết nối đã STARTTLS + đăng nhập trong pool
+        smtp_pool.send(build_email(to_email, subject, body_html))
+
         return True
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Lỗi gửi email: {str(e)}")
-        return False
 
 
-def send_email_task(email_data: Dict[str, Any]) -> Dict[str, Any]:
+def parse_salary_month(month_str: Optional[str] = None) -> date:
     """
-    Hàm gửi email riêng lẻ, được sử dụng bởi ThreadPoolExecutor
+    Tháng lương dạng YYYY-MM hoặc YYYY-MM-DD, mặc định là tháng hiện tại.
     """
+    if not month_str:
+        return datetime.today().date().replace(day=1)
+    if len(month_str.split("-")) == 2:
+        month_str += "-01"  # Thêm ngày đầu tháng nếu chỉ có YYYY-MM
     try:
-        to_email = email_data.get("to_email")
-        subject = email_data.get("subject")
-        body_html = email_data.get("body_html")
-        employee_id = email_data.get("employee_id")
-        
-        success = send_email(to_email, subject, body_html)
-        
-        return {
-            "employee_id": employee_id,
-            "email": to_email,
-            "success": success
-        }
-    except Exception as e:
-        return {
-            "employee_id": email_data.get("employee_id"),
-            "email": email_data.get("to_email"),
-            "success": False,
-            "error": str(e)
-        }
+        return datetime.strptime(month_str, "%Y-%m-%d").date().replace(day=1)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Tháng không hợp lệ, định dạng YYYY-MM hoặc YYYY-MM-DD",
+        )
 
 
-def send_monthly_salary_notification(db_human: Session, db_payroll: Session, month_str: Optional[str] = None) -> Dict[str, Any]:
-    start_time = time()
+def prepare_salary_emails(
+    db_human: Session,
+    db_payroll: Session,
+    month: date,
+    employee_ids: Optional[List[int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Nội dung email thông báo lương tháng month cho các nhân viên có email:
+    [{employee_id, to_email, subject, body_html, body_text}], dùng bản ghi lương
+    mới nhất của mỗi nhân viên trong tháng (chỉ các employee_ids nếu truyền vào).
+    """
+    latest_salary_subq = (
+        db_payroll.query(
+            PrSalary.EmployeeID,
+            func.max(PrSalary.SalaryID).label("max_salary_id")
+        )
+        .filter(
+            extract("year", PrSalary.SalaryMonth) == month.year,
+            extract("month", PrSalary.SalaryMonth) == month.month
+        )
+        .group_by(PrSalary.EmployeeID)
+    )
+    if employee_ids is not None:
+        latest_salary_subq = latest_salary_subq.filter(PrSalary.EmployeeID.in_(employee_ids))
+    latest_salary_subq = latest_salary_subq.subquery()
     
-    try:
-        if month_str:
-            if len(month_str.split("-")) == 2:
-                month_str += "-01"  # Thêm ngày đầu tháng nếu chỉ có YYYY-MM
-            month = datetime.strptime(month_str, "%Y-%m-%d").date()
-        else:
-            month = datetime.today().date().replace(day=1)
-            
-        print(f"Chuẩn bị gửi thông báo lương tháng {month.month}/{month.year}")
-        
-        latest_salary_subq = (
-            db_payroll.query(
-                PrSalary.EmployeeID,
-                func.max(PrSalary.SalaryID).label("max_salary_id")
-            )
-            .filter(
-                extract("year", PrSalary.SalaryMonth) == month.year,
-                extract("month", PrSalary.SalaryMonth) == month.month
-            )
-            .group_by(PrSalary.EmployeeID)
-            .subquery()
+    salary_records = (
+        db_payroll.query(PrSalary)
+        .join(
+            latest_salary_subq,
+            (PrSalary.EmployeeID == latest_salary_subq.c.EmployeeID) &
+            (PrSalary.SalaryID == latest_salary_subq.c.max_salary_id)
         )
-        
-        salary_records = (
-            db_payroll.query(PrSalary)
-            .join(
-                latest_salary_subq,
-                (PrSalary.EmployeeID == latest_salary_subq.c.EmployeeID) &
-                (PrSalary.SalaryID == latest_salary_subq.c.max_salary_id)
-            )
-            .all()
+        .order_by(PrSalary.EmployeeID)
+        .all()
+    )
+    if not salary_records:
+        return []
+    
+    # Lấy danh sách ID nhân viên
+    employee_ids = [salary.EmployeeID for salary in salary_records]
+    
+    # Lấy tất cả dữ liệu cần thiết trong một lần truy vấn
+    employees = db_human.query(HmEmployee).filter(HmEmployee.EmployeeID.in_(employee_ids)).all()
+    departments = db_human.query(HmDepartment).all()
+    positions = db_human.query(HmPosition).all()
+    
+    # Tạo dictionaries để truy cập nhanh
+    employee_map = {emp.EmployeeID: emp for emp in employees}
+    department_map = {d.DepartmentID: d.DepartmentName for d in departments}
+    position_map = {p.PositionID: p.PositionName for p in positions}
+    
+    # Lọc những nhân viên có email
+    employee_emails = {emp.EmployeeID: emp.Email for emp in employees if emp.Email}
+    
+    # Phần dùng chung của email được render một lần cho cả lượt gửi
+    renderer = SalaryEmailRenderer(
+        month, plain_text=salary_email_conf.SALARY_EMAIL_PLAIN_TEXT
+    )
+
+    # Chuẩn bị danh sách công việc gửi email
+    email_tasks = []
+    
+    for salary in salary_records:
+        employee_id = salary.EmployeeID
+
+        if employee_id not in employee_emails:
+            continue
+
+        email = employee_emails[employee_id]
+        employee = employee_map.get(employee_id)
+
+        if not employee:
+            continue
+
+        # Lấy thông tin phòng ban và chức vụ
+        department_name = department_map.get(employee.DepartmentID, "Chưa phân bổ")
+        position_name = position_map.get(employee.PositionID, "Chưa phân bổ")
+
+        body_html, body_text = renderer.render(
+            employee_id=employee_id,
+            full_name=employee.FullName,
+            department_name=department_name,
+            position_name=position_name,
+            salary=salary,
         )
-        
-        
-        if not salary_records:
-            return {
-                "message": f"Không có dữ liệu lương cho tháng {month.month}/{month.year}",
-                "sent_count": 0,
-                "total_count": 0,
-                "time_taken": time() - start_time
-            }
-        
-        # Lấy danh sách ID nhân viên
-        employee_ids = [salary.EmployeeID for salary in salary_records]
-        
-        # Lấy tất cả dữ liệu cần thiết trong một lần truy vấn
-        employees = db_human.query(HmEmployee).filter(HmEmployee.EmployeeID.in_(employee_ids)).all()
-        departments = db_human.query(HmDepartment).all()
-        positions = db_human.query(HmPosition).all()
 
-        query_time = time() - start_time
-        print(f"Thời gian truy vấn SQL: {query_time:.2f} giây")
-        
-        # Tạo dictionaries để truy cập nhanh
-        employee_map = {emp.EmployeeID: emp for emp in employees}
-        department_map = {d.DepartmentID: d.DepartmentName for d in departments}
-        position_map = {p.PositionID: p.PositionName for p in positions}
-        
-        # Lọc những nhân viên có email
-        employee_emails = {emp.EmployeeID: emp.Email for emp in employees if emp.Email}
-        
-        # Chuẩn bị danh sách công việc gửi email
-        email_tasks = []
-        
-        for salary in salary_records:
-            employee_id = salary.EmployeeID
-            
-            if employee_id not in employee_emails:
-                continue
-                
-            email = employee_emails[employee_id]
-            employee = employee_map.get(employee_id)
-            
-            if not employee:
-                continue
-                
-            # Lấy thông tin phòng ban và chức vụ
-            department_name = department_map.get(employee.DepartmentID, "Chưa phân bổ")
-            position_name = position_map.get(employee.PositionID, "Chưa phân bổ")
-            
-            # Tạo nội dung email
-            subject = f"Thông báo lương tháng {month.month}/{month.year}"
-            
-            html_body = f"""
-            <html>
-            <head>
-                <style>
-                    body {{
-                        font-family: Arial, sans-serif;
-                        line-height: 1.6;
-                    }}
-                    .container {{
-                        width: 100%;
-                        max-width: 600px;
-                        margin: 0 auto;
-                        padding: 20px;
-                        border: 1px solid #ddd;
-                        border-radius: 5px;
-                    }}
-                    .header {{
-                        background-color: #4CAF50;
-                        color: white;
-                        padding: 10px;
-                        text-align: center;
-                        border-radius: 5px 5px 0 0;
-                    }}
-                    .content {{
-                        padding: 20px;
-                    }}
-                    table {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin-bottom: 20px;
-                    }}
-                    table, th, td {{
-                        border: 1px solid #ddd;
-                    }}
-                    th, td {{
-                        padding: 10px;
-                        text-align: left;
-                    }}
-                    th {{
-                        background-color: #f2f2f2;
-                    }}
-                    .footer {{
-                        background-color: #f2f2f2;
-                        padding: 10px;
-                        text-align: center;
-                        border-radius: 0 0 5px 5px;
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h2>Thông báo lương tháng {month.month}/{month.year}</h2>
-                    </div>
-                    <div class="content">
-                        <p>Kính gửi <b>{employee.FullName}</b>,</p>
-                        
-                        <p>Công ty trân trọng thông báo lương tháng {month.month}/{month.year} của bạn như sau:</p>
-                        
-                        <table>
-                            <tr>
-                                <th>Thông tin</th>
-                                <th>Chi tiết</th>
-                            </tr>
-                            <tr>
-                                <td>Mã nhân viên</td>
-                                <td>{employee.EmployeeID}</td>
-                            </tr>
-                            <tr>
-                                <td>Họ và tên</td>
-                                <td>{employee.FullName}</td>
-                            </tr>
-                            <tr>
-                                <td>Phòng ban</td>
-                                <td>{department_name}</td>
-                            </tr>
-                            <tr>
-                                <td>Chức vụ</td>
-                                <td>{position_name}</td>
-                            </tr>
-                        </table>
-                        
-                        <table>
-                            <tr>
-                                <th>Mục lương</th>
-                                <th>Giá trị (VNĐ)</th>
-                            </tr>
-                            <tr>
-                                <td>Lương cơ bản</td>
-                                <td>{format(salary.BaseSalary, ' VNĐ')}</td>
-                            </tr>
-                            <tr>
-                                <td>Thưởng</td>
-                                <td>{format(salary.Bonus, ' VNĐ')}</td>
-                            </tr>
-                            <tr>
-                                <td>Khấu trừ</td>
-                                <td>{format(salary.Deductions, ' VNĐ')}</td>
-                            </tr>
-                            <tr>
-                                <td><b>Lương thực lãnh</b></td>
-                                <td><b>{format(salary.NetSalary, ' VNĐ')}</b></td>
-                            </tr>
-                        </table>
-                        
-                        <p>Lương sẽ được chuyển vào tài khoản của bạn. Nếu có bất kỳ thắc mắc nào về bảng lương, vui lòng liên hệ với phòng kế toán.</p>
-                        
-                        <p>Trân trọng,<br>
-                        Phòng Kế Toán</p>
-                    </div>
-                    <div class="footer">
-                        <p>Đây là email tự động, vui lòng không trả lời email này.</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            # Thêm công việc vào danh sách
-            email_tasks.append({
-                "employee_id": employee_id,
-                "to_email": email,
-                "subject": subject,
-                "body_html": html_body
-            })
-        
-        # Không có email nào để gửi
-        if not email_tasks:
-            return {
-                "message": f"Không có email hợp lệ để gửi thông báo lương tháng {month.month}/{month.year}",
-                "sent_count": 0,
-                "total_count": 0,
-                "time_taken": time() - start_time
-            }
-        
-        prep_time = time() - start_time
-        print(f"Thời gian chuẩn bị dữ liệu: {prep_time:.2f} giây")
-        
-        # Số lượng worker tối đa là MAX_WORKER_THREADS hoặc số lượng email, tùy theo giá trị nào nhỏ hơn
-        worker_count = min(MAX_WORKER_THREADS, len(email_tasks))
-        
-        # Gửi email song song
-        results = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=worker_count) as executor:
-            futures = [executor.submit(send_email_task, task) for task in email_tasks]
-            for future in concurrent.futures.as_completed(futures):
-                results.append(future.result())
-        
-        sent_count = sum(1 for r in results if r.get("success", False))
-        failed_count = len(results) - sent_count
-        emails_sent = [r.get("email") for r in results if r.get("success", False)]
-        
-        total_time = time() - start_time
-        print(f"Hoàn thành gửi email trong {total_time:.2f} giây")
-        
-        return {
-            "message": f"Đã gửi {sent_count}/{len(email_tasks)} email thông báo lương tháng {month.month}/{month.year}",
-            "sent_count": sent_count,
-            "failed_count": failed_count,
-            "total_count": len(email_tasks),
-            "emails": emails_sent
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Lỗi khi gửi email: {str(e)}")
+        # Thêm công việc vào danh sách
+        email_tasks.append({
+            "employee_id": employee_id,
+            "to_email": email,
+            "subject": renderer.subject,
+            "body_html": body_html,
+            "body_text": body_text,
+        })
 
+    return email_tasks
 
-def format(value, suffix):
-    if value is None:
-        return "0" + suffix
-    
-    amount = int(value)
-    formatted = "{:,}".format(amount).replace(",", ".")
-    
-    return formatted + suffix
+
+def preview_salary_email(
+    db_human: Session, db_payroll: Session, employee_id: int, month_str: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Email thông báo lương của một nhân viên đúng như sẽ gửi, không gửi đi.
+    """
+    month = parse_salary_month(month_str)
+    tasks = prepare_salary_emails(db_human, db_payroll, month, employee_ids=[employee_id])
+    if not tasks:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Nhân viên không có dữ liệu lương tháng {month.month}/{month.year} hoặc chưa có email",
+        )
+    return tasks[0]
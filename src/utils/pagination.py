@@ -0,0 +1,186 @@
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Mỗi khóa sắp xếp là (cột, giảm dần?), ví dụ [(PrSalary.SalaryMonth, True), (PrSalary.SalaryID, True)]
+SortKey = Tuple[Any, bool]
+
+# Loại cursor: keyset mang giá trị khóa sắp xếp, offset mang vị trí trong danh sách
+# đã xếp hạng. Cùng một endpoint có thể trả cả hai (employees/search dùng chỉ mục
+# hoặc SQL), nên cursor ghi loại của nó và bị từ chối khi dùng sai đường
+KEYSET = "keyset"
+OFFSET = "offset"
+
+
+def encode_cursor(values: Sequence[Any], direction: str, kind: str = KEYSET) -> str:
+    payload = {
+        "k": [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values],
+        "d": direction,
+        "t": kind,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _load_cursor(cursor: str, kind: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        # Cursor keyset phát hành trước khi có trường "t" vẫn dùng được
+        cursor_kind = payload.get("t", KEYSET)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor phân trang không hợp lệ")
+    if cursor_kind != kind:
+        raise HTTPException(
+            status_code=400,
+            detail="Cursor phân trang không thuộc kết quả này, hãy tải lại từ trang đầu",
+        )
+    return payload
+
+
+def decode_cursor(cursor: str, keys: Sequence[SortKey]) -> Tuple[List[Any], str]:
+    payload = _load_cursor(cursor, KEYSET)
+    try:
+        direction = payload["d"]
+        raw_values = payload["k"]
+        if direction not in ("next", "prev") or len(raw_values) != len(keys):
+            raise ValueError(cursor)
+
+        values = []
+        for (column, _), value in zip(keys, raw_values):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            else:
+                value = python_type(value)
+            values.append(value)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor phân trang không hợp lệ")
+
+    return values, direction
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    payload = _load_cursor(cursor, OFFSET)
+    try:
+        offset = int(payload["k"][0])
+        if offset < 0:
+            raise ValueError(cursor)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor phân trang không hợp lệ")
+    return offset
+
+
+def offset_paginate(
+    fetch, page: int = 1, per_page: int = 10, cursor: Optional[str] = None
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Phân trang cho danh sách đã xếp hạng sẵn (ví dụ kết quả chỉ mục tìm kiếm).
+    fetch(limit, offset) trả về (bản ghi, tổng số); cursor mã hóa vị trí bắt đầu.
+    """
+    offset = decode_offset_cursor(cursor) if cursor else (page - 1) * per_page
+    rows, total = fetch(per_page, offset)
+
+    metadata = {
+        "per_page": per_page,
+        "total": total,
+        "next_cursor": (
+            encode_cursor([offset + per_page], "next", OFFSET)
+            if offset + per_page < total
+            else None
+        ),
+        "prev_cursor": (
+            encode_cursor([max(offset - per_page, 0)], "prev", OFFSET)
+            if offset > 0
+            else None
+        ),
+    }
+    if not cursor:
+        metadata["page"] = page
+
+    return rows, metadata
+
+
+def _after(keys: Sequence[SortKey], values: Sequence[Any], reverse: bool):
+    """
+    Điều kiện "đứng sau cursor" theo thứ tự sắp xếp, viết dạng OR/AND
+    để chạy được trên cả MySQL và SQL Server (không dùng row-value).
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        if descending != reverse:
+            beyond = column < values[i]
+        else:
+            beyond = column > values[i]
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+def _order_by(keys: Sequence[SortKey], reverse: bool):
+    return [
+        column.desc() if descending != reverse else column.asc()
+        for column, descending in keys
+    ]
+
+
+def _row_key(row: Any, keys: Sequence[SortKey]) -> List[Any]:
+    return [getattr(row, column.key) for column, _ in keys]
+
+
+def keyset_paginate(
+    query: Query,
+    keys: Sequence[SortKey],
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Phân trang theo khóa (keyset) khi có cursor, ngược lại dùng OFFSET theo page
+    để tương thích ngược. Trả về (danh sách bản ghi, metadata chứa next/prev cursor).
+    """
+    direction = "next"
+    if cursor:
+        values, direction = decode_cursor(cursor, keys)
+        reverse = direction == "prev"
+        query = query.filter(_after(keys, values, reverse)).order_by(
+            *_order_by(keys, reverse)
+        )
+    else:
+        reverse = False
+        query = query.order_by(*_order_by(keys, False)).offset((page - 1) * per_page)
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if reverse:
+        rows.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = bool(cursor) or page > 1, has_more
+
+    metadata = {
+        "per_page": per_page,
+        "next_cursor": (
+            encode_cursor(_row_key(rows[-1], keys), "next")
+            if rows and has_next
+            else None
+        ),
+        "prev_cursor": (
+            encode_cursor(_row_key(rows[0], keys), "prev")
+            if rows and has_prev
+            else None
+        ),
+    }
+    if not cursor:
+        metadata["page"] = page
+
+    return rows, metadata
@@ -0,0 +1,119 @@
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict
+
+from src.core.config import password_hash_conf
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasher:
+    """
+    Băm/kiểm tra mật khẩu bcrypt trên một pool luồng riêng có giới hạn.
+
+    bcrypt nhả GIL khi băm nên thread pool đủ để chạy song song, đồng thời không
+    chiếm threadpool phục vụ các endpoint khác. Khi số yêu cầu đang chờ vượt
+    queue_limit, yêu cầu mới bị từ chối ngay với mã 429.
+    """
+
+    def __init__(self, max_workers: int, queue_limit: int):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self._lock = Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._hash_total = 0.0
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._in_flight >= self.queue_limit:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail="Hệ thống đang xử lý quá nhiều yêu cầu đăng nhập, vui lòng thử lại sau",
+                    headers={"Retry-After": "1"},
+                )
+            self._in_flight += 1
+
+        submitted_at = perf_counter()
+
+        def task():
+            started_at = perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args)
+            finally:
+                finished_at = perf_counter()
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._hash_total += finished_at - started_at
+                    self._latency_total += finished_at - submitted_at
+                    self._latency_max = max(
+                        self._latency_max, finished_at - submitted_at
+                    )
+
+        def release(_: Future):
+            # Chạy cả khi future bị hủy trước khi task bắt đầu (request bị hủy
+            # khi đang xếp hàng), nên slot luôn được trả lại
+            with self._lock:
+                self._in_flight -= 1
+
+        future = self._executor.submit(task)
+        future.add_done_callback(release)
+        return future
+
+    # Bản đồng bộ chặn luồng gọi trên .result() tới khi băm xong (script, công cụ
+    # quản trị); endpoint dùng hash_async/verify_async để không giữ luồng threadpool
+    def hash(self, password: str) -> str:
+        return self._submit(pwd_context.hash, password).result()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit(pwd_context.verify, plain_password, hashed_password).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, password))
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(
+            self._submit(pwd_context.verify, plain_password, hashed_password)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self._completed
+            return {
+                "max_workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "in_flight": self._in_flight,
+                "running": self._running,
+                "queue_depth": self._in_flight - self._running,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_hash_ms": (
+                    round(self._hash_total / completed * 1000, 3) if completed else 0
+                ),
+                "avg_latency_ms": (
+                    round(self._latency_total / completed * 1000, 3) if completed else 0
+                ),
+                "max_latency_ms": round(self._latency_max * 1000, 3),
+            }
+
+
+password_hasher = PasswordHasher(
+    max_workers=password_hash_conf.PASSWORD_HASH_WORKERS,
+    queue_limit=password_hash_conf.PASSWORD_HASH_QUEUE_LIMIT,
+)
@@ -23,15 +23,30 @@ from ..models.payroll import (
 from datetime import date, timedelta
 from typing import Optional, List
 
+from .pagination import keyset_paginate
+from .notification_store import notification_scheduler
+from .notifications import SALARY_GAP, parse_salary_month
+from .dashboard_cache import SALARIES, invalidate_dashboard
+from .payroll_snapshot import payroll_snapshot
+from .exports import EXPORT_FORMATS, NDJSON, stream_export
+from src.databases.payroll_db import SessionLocal as PayrollSessionLocal
 
-def get_payroll(session: Session, page: int = 1, per_page: int = 10):
+SALARY_SORT_KEYS = [(PrSalary.SalaryMonth, True), (PrSalary.SalaryID, True)]
+ATTENDANCE_SORT_KEYS = [
+    (PrAttendance.AttendanceMonth, True),
+    (PrAttendance.AttendanceID, True),
+]
+
+
+def get_payroll(
+    session: Session, page: int = 1, per_page: int = 10, cursor: Optional[str] = None
+):
     query = session.query(PrSalary).join(
         PrEmployee, PrSalary.EmployeeID == PrEmployee.EmployeeID
     )
 
-    offset = (page - 1) * per_page
-    results = (
-        query.order_by(PrSalary.SalaryMonth.desc()).offset(offset).limit(per_page).all()
+    results, metadata = keyset_paginate(
+        query, SALARY_SORT_KEYS, page=page, per_page=per_page, cursor=cursor
     )
 
     return [
@@ -47,11 +62,15 @@ def get_payroll(session: Session, page: int = 1, per_page: int = 10):
             "Status": salary.employee.Status,
         }
         for salary in results
-    ]
+    ], metadata
 
 
 def search_payroll_logic(
-    session: Session, search_query: str = None, page: int = 1, per_page: int = 10
+    session: Session,
+    search_query: str = None,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
 ):
     query = session.query(PrSalary).join(
         PrEmployee, PrSalary.EmployeeID == PrEmployee.EmployeeID
@@ -68,9 +87,8 @@ def search_payroll_logic(
         except ValueError:
             query = query.filter((PrEmployee.FullName.ilike(f"%{search_query}%")))
 
-    offset = (page - 1) * per_page
-    results = (
-        query.order_by(PrSalary.SalaryMonth.desc()).offset(offset).limit(per_page).all()
+    results, metadata = keyset_paginate(
+        query, SALARY_SORT_KEYS, page=page, per_page=per_page, cursor=cursor
     )
 
     return [
@@ -86,7 +104,7 @@ def search_payroll_logic(
             "Status": salary.employee.Status,
         }
         for salary in results
-    ]
+    ], metadata
 
 
 def update_payroll(session: Session, payroll_id: int, update_data: PayrollUpdate):
@@ -111,6 +129,11 @@ def update_payroll(session: Session, payroll_id: int, update_data: PayrollUpdate
             status_code=500, detail=f"Lỗi khi cập nhật trong payroll: {str(e)}"
         )
 
+    # Lương thực lãnh đổi thì cảnh báo chênh lệch lương của nhân viên cũng phải tính lại
+    notification_scheduler.mark_dirty(SALARY_GAP, [payroll_emp.EmployeeID])
+    invalidate_dashboard(SALARIES)
+    payroll_snapshot.mark_stale()
+
     return {"message": f"Cập nhật bảng lương {payroll_id} thành công."}
 
 
@@ -120,7 +143,8 @@ def get_attendance_records(
     per_page: int = 10,
     search_date: Optional[date] = None,
     employee_id: Optional[int] = None,
-) -> List[PrAttendance]:
+    cursor: Optional[str] = None,
+):
     query = session.query(PrAttendance).options(
         joinedload(PrAttendance.employee).joinedload(PrEmployee.department),
         joinedload(PrAttendance.employee).joinedload(PrEmployee.position),
@@ -135,15 +159,103 @@ def get_attendance_records(
     if employee_id:
         query = query.filter(PrAttendance.EmployeeID == employee_id)
 
-    offset = (page - 1) * per_page
-    results = (
-        query.order_by(PrAttendance.AttendanceMonth.desc())
-        .offset(offset)
-        .limit(per_page)
-        .all()
+    return keyset_paginate(
+        query, ATTENDANCE_SORT_KEYS, page=page, per_page=per_page, cursor=cursor
+    )
+
+
+def _export_filters(
+    month_column,
+    month_from: Optional[str],
+    month_to: Optional[str],
+    department_id: Optional[int],
+    employee_id: Optional[int],
+    export_format: str,
+):
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Định dạng xuất không hợp lệ, chọn một trong: {', '.join(EXPORT_FORMATS)}",
+        )
+
+    filters = []
+    start = parse_salary_month(month_from) if month_from else None
+    end = parse_salary_month(month_to) if month_to else None
+    if start and end and start > end:
+        raise HTTPException(
+            status_code=400, detail="month_from phải trước hoặc bằng month_to"
+        )
+    if start:
+        filters.append(month_column >= start)
+    if end:
+        # Lấy hết tháng month_to: nhỏ hơn ngày đầu tháng kế tiếp
+        filters.append(month_column < (end + timedelta(days=32)).replace(day=1))
+    if department_id:
+        filters.append(PrEmployee.DepartmentID == department_id)
+    if employee_id:
+        filters.append(PrEmployee.EmployeeID == employee_id)
+    return filters
+
+
+def export_salaries(
+    month_from: Optional[str] = None,
+    month_to: Optional[str] = None,
+    department_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    export_format: str = NDJSON,
+):
+    """
+    Kiểm tra bộ lọc ngay khi gọi (lỗi trả 400 trước khi bắt đầu stream),
+    trả về generator các chunk NDJSON/CSV của bảng lương.
+    """
+    filters = _export_filters(
+        PrSalary.SalaryMonth, month_from, month_to, department_id, employee_id, export_format
     )
+    statement = (
+        select(
+            PrSalary.SalaryID,
+            PrSalary.EmployeeID,
+            PrEmployee.FullName,
+            PrEmployee.DepartmentID,
+            PrSalary.SalaryMonth,
+            PrSalary.BaseSalary,
+            PrSalary.Bonus,
+            PrSalary.Deductions,
+            PrSalary.NetSalary,
+        )
+        .join(PrEmployee, PrSalary.EmployeeID == PrEmployee.EmployeeID)
+        .where(*filters)
+        .order_by(PrSalary.SalaryMonth, PrSalary.SalaryID)
+    )
+    return stream_export(PayrollSessionLocal, statement, export_format)
+
 
-    return results
+def export_attendance(
+    month_from: Optional[str] = None,
+    month_to: Optional[str] = None,
+    department_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    export_format: str = NDJSON,
+):
+    filters = _export_filters(
+        PrAttendance.AttendanceMonth, month_from, month_to, department_id, employee_id, export_format
+    )
+    statement = (
+        select(
+            PrAttendance.AttendanceID,
+            PrAttendance.EmployeeID,
+            PrEmployee.FullName,
+            PrEmployee.DepartmentID,
+            PrAttendance.AttendanceMonth,
+            PrAttendance.WorkDays,
+            PrAttendance.AbsentDays,
+            PrAttendance.LeaveDays,
+        )
+        .join(PrEmployee, PrAttendance.EmployeeID == PrEmployee.EmployeeID)
+        .where(*filters)
+        .order_by(PrAttendance.AttendanceMonth, PrAttendance.AttendanceID)
+    )
+    return stream_export(PayrollSessionLocal, statement, export_format)
 
 
 def get_personal_attendance(session: Session, employee_id: int) -> List[PrAttendance]:
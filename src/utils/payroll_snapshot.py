@@ -0,0 +1,520 @@
+import asyncio
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.core.config import payroll_snapshot_conf
+from src.databases.payroll_db import SessionLocal as PayrollSessionLocal
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from ..schemas.payroll import (
+    Attendance as PrAttendance,
+    Department as PrDepartment,
+    Employee as PrEmployee,
+    Salary as PrSalary,
+)
+
+MONEY = pa.decimal128(12, 2)
+MANIFEST = "_manifest.json"
+# Có thay đổi sau mốc mtime của file này thì snapshot không còn khớp database
+STALE_MARKER = "_stale"
+RUN_LOCK = ".run.lock"
+MONTH_PARTITIONING = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+
+@dataclass(frozen=True)
+class SnapshotTable:
+    """
+    Một bảng payroll trong snapshot. Bảng có month_column được ghi thành các
+    phân vùng month=YYYY-MM; fingerprint là các phép tổng hợp theo tháng dùng
+    để phát hiện tháng đã thay đổi. Bảng không có month_column (danh mục nhỏ)
+    được ghi lại toàn bộ mỗi lần chạy.
+    """
+
+    name: str
+    columns: Tuple[Any, ...]
+    schema: pa.Schema
+    month_column: Any = None
+    fingerprint: Tuple[Any, ...] = ()
+
+
+SALARIES = SnapshotTable(
+    "salaries",
+    (
+        PrSalary.SalaryID,
+        PrSalary.EmployeeID,
+        PrSalary.SalaryMonth,
+        PrSalary.BaseSalary,
+        PrSalary.Bonus,
+        PrSalary.Deductions,
+        PrSalary.NetSalary,
+        PrSalary.CreatedAt,
+    ),
+    pa.schema([
+        ("SalaryID", pa.int64()),
+        ("EmployeeID", pa.int64()),
+        ("SalaryMonth", pa.date32()),
+        ("BaseSalary", MONEY),
+        ("Bonus", MONEY),
+        ("Deductions", MONEY),
+        ("NetSalary", MONEY),
+        ("CreatedAt", pa.timestamp("us")),
+    ]),
+    month_column=PrSalary.SalaryMonth,
+    fingerprint=(
+        func.count(PrSalary.SalaryID),
+        func.max(PrSalary.SalaryID),
+        func.sum(PrSalary.EmployeeID),
+        func.sum(PrSalary.NetSalary),
+        func.sum(PrSalary.Bonus),
+        func.sum(PrSalary.Deductions),
+    ),
+)
+ATTENDANCE = SnapshotTable(
+    "attendance",
+    (
+        PrAttendance.AttendanceID,
+        PrAttendance.EmployeeID,
+        PrAttendance.AttendanceMonth,
+        PrAttendance.WorkDays,
+        PrAttendance.AbsentDays,
+        PrAttendance.LeaveDays,
+        PrAttendance.CreatedAt,
+    ),
+    pa.schema([
+        ("AttendanceID", pa.int64()),
+        ("EmployeeID", pa.int64()),
+        ("AttendanceMonth", pa.date32()),
+        ("WorkDays", pa.int32()),
+        ("AbsentDays", pa.int32()),
+        ("LeaveDays", pa.int32()),
+        ("CreatedAt", pa.timestamp("us")),
+    ]),
+    month_column=PrAttendance.AttendanceMonth,
+    fingerprint=(
+        func.count(PrAttendance.AttendanceID),
+        func.max(PrAttendance.AttendanceID),
+        func.sum(PrAttendance.EmployeeID),
+        func.sum(PrAttendance.WorkDays),
+        func.sum(PrAttendance.AbsentDays),
+        func.sum(PrAttendance.LeaveDays),
+    ),
+)
+EMPLOYEES = SnapshotTable(
+    "employees",
+    (
+        PrEmployee.EmployeeID,
+        PrEmployee.FullName,
+        PrEmployee.DepartmentID,
+        PrEmployee.PositionID,
+        PrEmployee.Status,
+    ),
+    pa.schema([
+        ("EmployeeID", pa.int64()),
+        ("FullName", pa.string()),
+        ("DepartmentID", pa.int64()),
+        ("PositionID", pa.int64()),
+        ("Status", pa.string()),
+    ]),
+)
+DEPARTMENTS = SnapshotTable(
+    "departments",
+    (PrDepartment.DepartmentID, PrDepartment.DepartmentName),
+    pa.schema([("DepartmentID", pa.int64()), ("DepartmentName", pa.string())]),
+)
+
+SNAPSHOT_TABLES = {table.name: table for table in (SALARIES, ATTENDANCE, EMPLOYEES, DEPARTMENTS)}
+
+
+def month_key(month: date) -> str:
+    return month.strftime("%Y-%m")
+
+
+def _month_bounds(key: str) -> Tuple[date, date]:
+    start = datetime.strptime(key, "%Y-%m").date()
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def _record_batch(rows, schema: pa.Schema) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def _replace_file(path: Path, write) -> None:
+    # Ghi ra file ẩn (dataset bỏ qua file bắt đầu bằng ".") rồi đổi tên một lần,
+    # người đọc không bao giờ thấy file ghi dở
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}-{uuid4().hex}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+@contextmanager
+def _try_lock(path: Path) -> Iterator[bool]:
+    """
+    Khóa file giữa các tiến trình (các worker uvicorn dùng chung thư mục
+    snapshot); trả về False ngay nếu tiến trình khác đang giữ khóa.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        try:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class PayrollSnapshot:
+    """
+    Snapshot dạng cột (Parquet) của salaries/attendance để chạy phân tích nhiều
+    năm mà không quét bảng OLTP trên MySQL.
+
+    Mỗi lần chạy chỉ đọc một truy vấn tổng hợp theo tháng (fingerprint) rồi ghi
+    lại các tháng mới, đã thay đổi, và xóa các tháng không còn trong database.
+    Fingerprint được lấy trước khi đọc dữ liệu tháng, nên thay đổi xen giữa
+    sẽ bị phát hiện ở lần chạy sau.
+
+    Mỗi lần chạy giữ khóa file trong thư mục snapshot, nên trong nhiều tiến
+    trình chỉ một tiến trình ghi tại một thời điểm. Ghi dữ liệu lương (hoặc
+    đồng bộ nhân viên, phòng ban) gọi mark_stale: snapshot lấy trước thời điểm
+    đó không còn được dùng cho báo cáo cho tới lần cập nhật sau.
+    """
+
+    def __init__(self, root: str, batch_size: int, max_age_seconds: int):
+        self.root = Path(root)
+        self.batch_size = batch_size
+        self.max_age_seconds = max_age_seconds
+        self._run_lock = Lock()
+        self._lock = Lock()
+        self._runs = 0
+        self._runs_skipped = 0
+        self._months_written = 0
+        self._months_removed = 0
+        self._last_run_at: Optional[datetime] = None
+        self._last_duration_ms: Optional[float] = None
+        self._last_error: Optional[str] = None
+
+    def _table_path(self, table: SnapshotTable) -> Path:
+        if table.month_column is None:
+            return self.root / f"{table.name}.parquet"
+        return self.root / table.name
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.root / MANIFEST, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"snapshot_at": None, "tables": {}}
+
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        def write(path: Path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        _replace_file(self.root / MANIFEST, write)
+
+    def _month_fingerprints(self, session: Session, table: SnapshotTable) -> Dict[str, str]:
+        rows = session.execute(
+            select(table.month_column, *table.fingerprint)
+            .group_by(table.month_column)
+            .order_by(table.month_column)
+        ).all()
+        fingerprints: Dict[str, List[str]] = {}
+        for month, *values in rows:
+            fingerprints.setdefault(month_key(month), []).append(
+                ",".join([month.isoformat(), *(str(value) for value in values)])
+            )
+        return {key: "|".join(parts) for key, parts in fingerprints.items()}
+
+    def _write_parquet(self, session: Session, table: SnapshotTable, statement, path: Path) -> int:
+        written = 0
+
+        def write(tmp: Path):
+            nonlocal written
+            result = session.execute(statement.execution_options(yield_per=self.batch_size))
+            with pq.ParquetWriter(tmp, table.schema) as writer:
+                for rows in result.partitions():
+                    writer.write_batch(_record_batch(rows, table.schema))
+                    written += len(rows)
+
+        _replace_file(path, write)
+        return written
+
+    def _write_month(self, session: Session, table: SnapshotTable, key: str) -> int:
+        start, end = _month_bounds(key)
+        statement = (
+            select(*table.columns)
+            .where(table.month_column >= start, table.month_column < end)
+            .order_by(*table.columns[:1])
+        )
+        path = self._table_path(table) / f"month={key}" / "part-0.parquet"
+        return self._write_parquet(session, table, statement, path)
+
+    def run_once(self) -> Optional[Dict[str, Any]]:
+        """
+        Cập nhật snapshot, trả về số tháng đã ghi/xóa của từng bảng; None nếu
+        tiến trình khác đang cập nhật.
+        """
+        with self._run_lock, _try_lock(self.root / RUN_LOCK) as locked:
+            if not locked:
+                with self._lock:
+                    self._runs_skipped += 1
+                return None
+            started = datetime.now()
+            manifest = self._load_manifest()
+            summary: Dict[str, Any] = {}
+            with PayrollSessionLocal() as session:
+                for table in (SALARIES, ATTENDANCE):
+                    current = self._month_fingerprints(session, table)
+                    known = manifest["tables"].setdefault(table.name, {})
+                    written, removed = [], []
+                    for key, fingerprint in current.items():
+                        if known.get(key, {}).get("fingerprint") == fingerprint:
+                            continue
+                        rows = self._write_month(session, table, key)
+                        known[key] = {"fingerprint": fingerprint, "rows": rows}
+                        written.append(key)
+                    for key in sorted(set(known) - set(current)):
+                        shutil.rmtree(self._table_path(table) / f"month={key}", ignore_errors=True)
+                        del known[key]
+                        removed.append(key)
+                    self._table_path(table).mkdir(parents=True, exist_ok=True)
+                    summary[table.name] = {"written": written, "removed": removed}
+
+                for table in (EMPLOYEES, DEPARTMENTS):
+                    rows = self._write_parquet(
+                        session,
+                        table,
+                        select(*table.columns).order_by(*table.columns[:1]),
+                        self._table_path(table),
+                    )
+                    manifest["tables"][table.name] = {"rows": rows}
+
+            manifest["snapshot_at"] = started.isoformat()
+            self._save_manifest(manifest)
+
+            with self._lock:
+                self._runs += 1
+                self._months_written += sum(len(s["written"]) for s in summary.values())
+                self._months_removed += sum(len(s["removed"]) for s in summary.values())
+                self._last_run_at = started
+                self._last_duration_ms = round(
+                    (datetime.now() - started).total_seconds() * 1000, 2
+                )
+            return summary
+
+    def snapshot_at(self) -> Optional[datetime]:
+        value = self._load_manifest()["snapshot_at"]
+        return datetime.fromisoformat(value) if value else None
+
+    def stale_since(self) -> Optional[datetime]:
+        try:
+            return datetime.fromtimestamp((self.root / STALE_MARKER).stat().st_mtime)
+        except FileNotFoundError:
+            return None
+
+    def mark_stale(self) -> None:
+        """
+        Gọi sau khi commit thay đổi dữ liệu có trong snapshot; báo cáo đọc lại
+        từ database cho tới khi snapshot được cập nhật.
+        """
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            (self.root / STALE_MARKER).touch()
+        except OSError as e:
+            self.record_error(e)
+
+    def is_fresh(self, max_age_seconds: Optional[int] = None) -> bool:
+        """
+        Snapshot chưa quá max_age_seconds (mặc định PAYROLL_SNAPSHOT_MAX_AGE_SECONDS)
+        và được lấy sau lần mark_stale gần nhất.
+        """
+        snapshot_at = self.snapshot_at()
+        if snapshot_at is None:
+            return False
+        if max_age_seconds is None:
+            max_age_seconds = self.max_age_seconds
+        stale_since = self.stale_since()
+        return (datetime.now() - snapshot_at).total_seconds() <= max_age_seconds and (
+            stale_since is None or stale_since < snapshot_at
+        )
+
+    def read(
+        self,
+        table: SnapshotTable,
+        month_from: Optional[date] = None,
+        month_to: Optional[date] = None,
+        employee_id: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pa.Table:
+        """
+        Đọc một bảng của snapshot. Lọc theo tháng chỉ mở các phân vùng cần
+        thiết; columns chỉ đọc các cột được chọn.
+        """
+        if self.snapshot_at() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Chưa có snapshot dữ liệu lương",
+            )
+        columns = columns or table.schema.names
+        unknown = [name for name in columns if name not in table.schema.names]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cột không tồn tại trong {table.name}: {', '.join(unknown)}",
+            )
+
+        filters = []
+        if employee_id and "EmployeeID" in table.schema.names:
+            filters.append(ds.field("EmployeeID") == employee_id)
+        if table.month_column is None:
+            dataset = ds.dataset(self._table_path(table), format="parquet", schema=table.schema)
+        else:
+            dataset = ds.dataset(
+                self._table_path(table),
+                format="parquet",
+                schema=table.schema.append(pa.field("month", pa.string())),
+                partitioning=MONTH_PARTITIONING,
+            )
+            if month_from:
+                filters.append(ds.field("month") >= month_key(month_from))
+            if month_to:
+                filters.append(ds.field("month") <= month_key(month_to))
+
+        expression = None
+        for condition in filters:
+            expression = condition if expression is None else expression & condition
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def record_error(self, error: Exception) -> None:
+        with self._lock:
+            self._last_error = f"{datetime.now().isoformat()}: {str(error)[:500]}"
+
+    def stats(self) -> Dict[str, Any]:
+        manifest = self._load_manifest()
+        tables = {}
+        for name, entries in manifest["tables"].items():
+            if SNAPSHOT_TABLES[name].month_column is None:
+                tables[name] = entries
+                continue
+            months = sorted(entries)
+            tables[name] = {
+                "months": len(months),
+                "first_month": months[0] if months else None,
+                "last_month": months[-1] if months else None,
+                "rows": sum(entry["rows"] for entry in entries.values()),
+            }
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "snapshot_at": manifest["snapshot_at"],
+                "stale_since": self.stale_since(),
+                "fresh": self.is_fresh(),
+                "tables": tables,
+                "runs": self._runs,
+                "runs_skipped": self._runs_skipped,
+                "months_written": self._months_written,
+                "months_removed": self._months_removed,
+                "last_run_at": self._last_run_at,
+                "last_duration_ms": self._last_duration_ms,
+                "last_error": self._last_error,
+            }
+
+
+payroll_snapshot = PayrollSnapshot(
+    root=payroll_snapshot_conf.PAYROLL_SNAPSHOT_DIR,
+    batch_size=payroll_snapshot_conf.PAYROLL_SNAPSHOT_BATCH_SIZE,
+    max_age_seconds=payroll_snapshot_conf.PAYROLL_SNAPSHOT_MAX_AGE_SECONDS,
+)
+
+
+def refresh_snapshot() -> Dict[str, Any]:
+    summary = payroll_snapshot.run_once()
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Snapshot đang được cập nhật bởi tiến trình khác",
+        )
+    return summary
+
+
+def export_snapshot_table(
+    table_name: str,
+    month_from: Optional[date] = None,
+    month_to: Optional[date] = None,
+    employee_id: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+) -> bytes:
+    """
+    Đọc bảng snapshot theo bộ lọc và trả về nội dung một file Parquet.
+    """
+    table = SNAPSHOT_TABLES.get(table_name)
+    if table is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bảng snapshot không tồn tại, chọn một trong: {', '.join(SNAPSHOT_TABLES)}",
+        )
+    if month_from and month_to and month_from > month_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="month_from phải trước hoặc bằng month_to",
+        )
+    result = payroll_snapshot.read(table, month_from, month_to, employee_id, columns)
+    sink = pa.BufferOutputStream()
+    pq.write_table(result, sink)
+    return sink.getvalue().to_pybytes()
+
+
+async def run_payroll_snapshot() -> None:
+    """
+    Vòng lặp nền: cập nhật snapshot mỗi PAYROLL_SNAPSHOT_INTERVAL_SECONDS;
+    0 là tắt. Mọi worker đều chạy vòng lặp này nhưng bỏ qua khi snapshot vẫn
+    mới hơn một chu kỳ hoặc tiến trình khác đang cập nhật.
+    """
+    interval = payroll_snapshot_conf.PAYROLL_SNAPSHOT_INTERVAL_SECONDS
+    if interval <= 0:
+        return
+    while True:
+        try:
+            if not payroll_snapshot.is_fresh(interval):
+                await asyncio.to_thread(payroll_snapshot.run_once)
+        except Exception as e:
+            payroll_snapshot.record_error(e)
+            print(f"Lỗi khi cập nhật snapshot dữ liệu lương: {str(e)}")
+        await asyncio.sleep(interval)
@@ -8,6 +8,9 @@ from typing import Optional, List
 from datetime import date, datetime, timedelta
 
 from src.models.human import PositionCreate, PositionUpdate
+from .search_index import employee_search_index
+from .id_allocator import POSITION, id_allocator
+from .replication import DELETE, UPSERT, enqueue_change
 
 from ..schemas.human import (
     Department as HmDepartment,
@@ -92,34 +95,9 @@ def get_position_distribution(session: Session, position_id: int):
 
 
 def add_and_sync_position(
-    session_human: Session, session_payroll: Session, position: PositionCreate
+    session_human: Session, position: PositionCreate
 ):
-    max_id_human = (
-        session_human.query(HmPosition.PositionID)
-        .order_by(HmPosition.PositionID.desc())
-        .first()
-    )
-    max_id_payroll = (
-        session_payroll.query(PrPosition.PositionID)
-        .order_by(PrPosition.PositionID.desc())
-        .first()
-    )
-
-    max_id = max(
-        max_id_human[0] if max_id_human else 0,
-        max_id_payroll[0] if max_id_payroll else 0,
-    )
-
-    position_id = max_id + 1
-
-    if session_human.query(HmPosition).filter_by(PositionID=position_id).first():
-        raise HTTPException(
-            status_code=400, detail="PositionID đã tồn tại trong HUMAN_2025"
-        )
-    if session_payroll.query(PrPosition).filter_by(PositionID=position_id).first():
-        raise HTTPException(
-            status_code=400, detail="PositionID đã tồn tại trong payroll"
-        )
+    position_id = id_allocator.next_id(POSITION)
 
     try:
         new_human_position = HmPosition(
@@ -129,14 +107,10 @@ def add_and_sync_position(
             UpdatedAt=position.UpdatedAt,
         )
         session_human.add(new_human_position)
+        enqueue_change(session_human, POSITION, position_id, UPSERT, new_human_position)
         session_human.commit()
 
-        new_payroll_position = PrPosition(
-            PositionID=position_id,
-            PositionName=position.PositionName,
-        )
-        session_payroll.add(new_payroll_position)
-        session_payroll.commit()
+        employee_search_index.set_position(position_id, position.PositionName)
 
         return {
             "message": "Chức vụ đã được thêm và đồng bộ hóa thành công",
@@ -145,36 +119,27 @@ def add_and_sync_position(
 
     except Exception as e:
         session_human.rollback()
-        session_payroll.rollback()
         raise HTTPException(status_code=500, detail=f"Lỗi khi thêm chức vụ: {str(e)}")
 
 
 def update_and_sync_position(
     session_human: Session,
-    session_payroll: Session,
     position_id: int,
     position: PositionUpdate,
 ):
     human_position = (
         session_human.query(HmPosition).filter_by(PositionID=position_id).first()
     )
-    payroll_position = (
-        session_payroll.query(PrPosition).filter_by(PositionID=position_id).first()
-    )
 
-    if not human_position or not payroll_position:
-        missing = []
-        if not human_position:
-            missing.append("HUMAN_2025")
-        if not payroll_position:
-            missing.append("payroll")
+    if not human_position:
         raise HTTPException(
-            status_code=404, detail=f"Chức vụ không tồn tại trong: {', '.join(missing)}"
+            status_code=404, detail="Chức vụ không tồn tại trong: HUMAN_2025"
         )
 
     try:
         for field, value in position.model_dump(exclude_unset=True).items():
             setattr(human_position, field, value)
+        enqueue_change(session_human, POSITION, position_id, UPSERT, human_position)
         session_human.commit()
     except Exception as e:
         session_human.rollback()
@@ -182,15 +147,7 @@ def update_and_sync_position(
             status_code=500, detail=f"Lỗi cập nhật trong HUMAN_2025: {str(e)}"
         )
 
-    try:
-        for field in ["PositionName", "UpdatedAt"]:
-            setattr(payroll_position, field, getattr(human_position, field))
-        session_payroll.commit()
-    except Exception as e:
-        session_payroll.rollback()
-        raise HTTPException(
-            status_code=500, detail=f"Lỗi cập nhật trong payroll: {str(e)}"
-        )
+    employee_search_index.set_position(position_id, human_position.PositionName)
 
     return {
         "message": "Chức vụ đã được cập nhật và đồng bộ hóa thành công",
@@ -204,26 +161,23 @@ def delete_and_sync_position(
     human_position = (
         session_human.query(HmPosition).filter_by(PositionID=position_id).first()
     )
-    payroll_position = (
-        session_payroll.query(PrPosition).filter_by(PositionID=position_id).first()
-    )
 
-    if not human_position or not payroll_position:
-        missing = []
-        if not human_position:
-            missing.append("HUMAN_2025")
-        if not payroll_position:
-            missing.append("payroll")
+    if not human_position:
         raise HTTPException(
-            status_code=404, detail=f"Chức vụ không tồn tại trong: {', '.join(missing)}"
+            status_code=404, detail="Chức vụ không tồn tại trong: HUMAN_2025"
         )
 
     try:
+        # Vẫn kiểm tra nhân viên bên payroll để worker không vướng khóa ngoại khi xóa
         human_employees = (
-            session_human.query(HmEmployee).filter_by(PositionID=position_id).all()
+            session_human.query(HmEmployee.EmployeeID, HmEmployee.FullName)
+            .filter(HmEmployee.PositionID == position_id)
+            .all()
         )
         payroll_employees = (
-            session_payroll.query(PrEmployee).filter_by(PositionID=position_id).all()
+            session_payroll.query(PrEmployee.EmployeeID, PrEmployee.FullName)
+            .filter(PrEmployee.PositionID == position_id)
+            .all()
         )
 
         if human_employees or payroll_employees:
@@ -256,14 +210,11 @@ def delete_and_sync_position(
                 detail={"message": error_message, "employees": employee_list},
             )
 
-        if human_position:
-            session_human.delete(human_position)
-
-        if payroll_position:
-            session_payroll.delete(payroll_position)
-
+        session_human.execute(delete(HmPosition).where(HmPosition.PositionID == position_id))
+        enqueue_change(session_human, POSITION, position_id, DELETE)
         session_human.commit()
-        session_payroll.commit()
+
+        employee_search_index.remove_position(position_id)
 
         return {
             "message": f"Chức vụ {position_id} đã được xóa thành công khỏi cả hai hệ thống.",
@@ -274,5 +225,4 @@ def delete_and_sync_position(
         raise
     except Exception as e:
         session_human.rollback()
-        session_payroll.rollback()
         raise HTTPException(status_code=500, detail=f"Lỗi khi xóa chức vụ: {str(e)}")
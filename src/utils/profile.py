@@ -1,5 +1,6 @@
 from sqlalchemy import func, desc, extract
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
 from datetime import date, datetime
@@ -21,24 +22,14 @@ from ..schemas.payroll import (
 
 from ..schemas.user import User
 
-from src.utils.auth import get_current_user, verify_password
+from src.utils.auth import CurrentUser, get_user, invalidate_user_cache
 from src.utils.employees import view_employee_details_logic
 from src.utils.payroll import get_personal_payroll, get_personal_attendance
 
-from src._utils import hash_password
-
-def read_profile_logic(db_user: Session, db_human: Session, db_payroll: Session, token: str):
-    user = get_current_user(db_user, token)
-
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Không thể xác thực tài khoản",
-        headers={"WWW-Authenticate": "Bearer"},
-    )    
-
-    if not user:
-        raise credentials_exception
+from src.utils.password import password_hasher
+from src._utils import run_sync
 
+def read_profile_logic(db_human: Session, db_payroll: Session, user: CurrentUser):
     try:
         employee = view_employee_details_logic(session=db_human, employee_id=user.Employee_id)
         payroll = get_personal_payroll(session=db_payroll, employee_id=user.Employee_id)
@@ -57,20 +48,29 @@ def read_profile_logic(db_user: Session, db_human: Session, db_payroll: Session,
     }
 
 
-def change_password_logic(session: Session, token: str, old_password: str, new_password: str):
-    user = get_current_user(session, token)
-    if not user:
-        raise HTTPException(status_code=401, detail="Không thể xác thực tài khoản")
-    
-    if not verify_password(plain_password=old_password, hashed_password=user.Password):
-        raise HTTPException(status_code=401, detail="Mật khẩu cũ không chính xác")
-    
+def _save_password(session: Session, user: User, password_hash: str):
     try:
-        user.Password = hash_password(new_password)
+        user.Password = password_hash
         session.commit()
     except Exception as e:
         session.rollback()
         raise HTTPException(status_code=500, detail=f"Lỗi khi cập nhật mật khẩu: {str(e)}")
+    finally:
+        invalidate_user_cache(user.Username)
+
+
+async def change_password_logic(session: AsyncSession, current_user: CurrentUser, old_password: str, new_password: str):
+    # Băm/kiểm tra trên pool băm mật khẩu và chờ bất đồng bộ, không giữ luồng
+    # threadpool; lỗi 429 khi hàng đợi băm đầy được trả nguyên cho client
+    user = await run_sync(get_user, db=session, username=current_user.Username)
+    if not user:
+        raise HTTPException(status_code=401, detail="Không thể xác thực tài khoản")
+    
+    if not await password_hasher.verify_async(old_password, user.Password):
+        raise HTTPException(status_code=401, detail="Mật khẩu cũ không chính xác")
+    
+    password_hash = await password_hasher.hash_async(new_password)
+    await run_sync(_save_password, session=session, user=user, password_hash=password_hash)
     
     return {
         "username": user.Username
@@ -0,0 +1,324 @@
+from sqlalchemy import delete, exists, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+
+import asyncio
+import json
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.core.config import replication_conf
+from src.databases.human_db import SessionLocal as HumanSessionLocal, engine as human_engine
+from src.databases.payroll_db import SessionLocal as PayrollSessionLocal
+from ..schemas.human import ReplicationOutbox
+from ..schemas.payroll import (
+    Attendance as PrAttendance,
+    Department as PrDepartment,
+    Employee as PrEmployee,
+    Notification as PrNotification,
+    NotificationRead as PrNotificationRead,
+    Position as PrPosition,
+    Salary as PrSalary,
+)
+from .id_allocator import DEPARTMENT, EMPLOYEE, POSITION
+from .dashboard_cache import ATTENDANCE, SALARIES, invalidate_dashboard
+from .payroll_snapshot import payroll_snapshot
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+# Loại đối tượng -> (model payroll, cột khóa, các trường được đồng bộ)
+REPLICATED_ENTITIES = {
+    DEPARTMENT: (PrDepartment, "DepartmentID", ["DepartmentID", "DepartmentName"]),
+    POSITION: (PrPosition, "PositionID", ["PositionID", "PositionName"]),
+    EMPLOYEE: (
+        PrEmployee,
+        "EmployeeID",
+        ["EmployeeID", "FullName", "DepartmentID", "PositionID", "Status"],
+    ),
+}
+# Thêm/sửa phòng ban, chức vụ trước nhân viên; xóa nhân viên trước phòng ban, chức vụ (khóa ngoại)
+UPSERT_ORDER = [DEPARTMENT, POSITION, EMPLOYEE]
+DELETE_ORDER = [EMPLOYEE, DEPARTMENT, POSITION]
+
+
+def outbox_row(entity: str, entity_id: int, operation: str, source: Any = None) -> dict:
+    """
+    Dòng outbox cho một thay đổi; source là bản ghi HUMAN_2025 (ORM hoặc dict) sau thay đổi.
+    """
+    payload = None
+    if operation == UPSERT:
+        fields = REPLICATED_ENTITIES[entity][2]
+        get = source.get if isinstance(source, dict) else lambda f: getattr(source, f)
+        payload = json.dumps({field: get(field) for field in fields}, ensure_ascii=False)
+
+    return {
+        "EntityType": entity,
+        "EntityID": entity_id,
+        "Operation": operation,
+        "Payload": payload,
+        "CreatedAt": datetime.now(),
+        "Attempts": 0,
+    }
+
+
+def enqueue_change(
+    session_human: Session,
+    entity: str,
+    entity_id: int,
+    operation: str,
+    source: Any = None,
+) -> None:
+    """
+    Ghi thay đổi vào outbox trong cùng transaction với thay đổi ở HUMAN_2025;
+    worker sẽ áp dụng sang payroll sau khi transaction commit.
+    """
+    session_human.add(
+        ReplicationOutbox(**outbox_row(entity, entity_id, operation, source))
+    )
+
+
+def enqueue_changes(session_human: Session, rows: List[dict]) -> None:
+    if rows:
+        session_human.execute(insert(ReplicationOutbox), rows)
+
+
+def ensure_outbox_table() -> None:
+    ReplicationOutbox.__table__.create(human_engine, checkfirst=True)
+
+
+def _coalesce(entries: Iterable[ReplicationOutbox]) -> Dict[Tuple[str, int], ReplicationOutbox]:
+    # Nhiều thay đổi của cùng một đối tượng trong lô: chỉ cần áp dụng thay đổi cuối
+    latest: Dict[Tuple[str, int], ReplicationOutbox] = {}
+    for entry in entries:
+        latest[(entry.EntityType, entry.EntityID)] = entry
+    return latest
+
+
+def apply_changes(session_payroll: Session, entries: Iterable[ReplicationOutbox]) -> None:
+    """
+    Áp dụng thay đổi sang payroll theo lô, có thể chạy lại nhiều lần cho cùng kết quả:
+    upsert ghi đè toàn bộ trường đồng bộ, delete bỏ qua bản ghi đã không còn.
+    """
+    latest = _coalesce(entries)
+
+    for entity in UPSERT_ORDER:
+        model, key, _ = REPLICATED_ENTITIES[entity]
+        rows = [
+            json.loads(entry.Payload)
+            for (entity_type, _), entry in latest.items()
+            if entity_type == entity and entry.Operation == UPSERT
+        ]
+        if not rows:
+            continue
+        key_column = getattr(model, key)
+        existing = {
+            v
+            for (v,) in session_payroll.query(key_column).filter(
+                key_column.in_([row[key] for row in rows])
+            )
+        }
+        new_rows = [row for row in rows if row[key] not in existing]
+        changed_rows = [row for row in rows if row[key] in existing]
+        if new_rows:
+            session_payroll.execute(insert(model), new_rows)
+        if changed_rows:
+            session_payroll.execute(update(model), changed_rows)
+
+    for entity in DELETE_ORDER:
+        model, key, _ = REPLICATED_ENTITIES[entity]
+        ids = [
+            entity_id
+            for (entity_type, entity_id), entry in latest.items()
+            if entity_type == entity and entry.Operation == DELETE
+        ]
+        if not ids:
+            continue
+        if entity == EMPLOYEE:
+            session_payroll.execute(delete(PrSalary).where(PrSalary.EmployeeID.in_(ids)))
+            session_payroll.execute(
+                delete(PrAttendance).where(PrAttendance.EmployeeID.in_(ids))
+            )
+            # Thông báo đã lưu của nhân viên bị xóa (kèm trạng thái đã đọc)
+            session_payroll.execute(
+                delete(PrNotificationRead).where(
+                    PrNotificationRead.NotificationID.in_(
+                        select(PrNotification.NotificationID).where(
+                            PrNotification.EmployeeID.in_(ids)
+                        )
+                    )
+                )
+            )
+            session_payroll.execute(
+                delete(PrNotification).where(PrNotification.EmployeeID.in_(ids))
+            )
+        session_payroll.execute(delete(model).where(getattr(model, key).in_(ids)))
+
+
+class ReplicationWorker:
+    """
+    Đọc outbox chưa xử lý theo lô và áp dụng sang payroll.
+
+    Các dòng outbox được khóa bằng UPDLOCK/READPAST cho tới khi đánh dấu đã xử lý,
+    nên nhiều worker cùng chạy không lấy trùng lô. Thay đổi của cùng một đối
+    tượng luôn được áp dụng theo thứ tự OutboxID: dòng chỉ được lấy khi không còn
+    dòng cũ hơn của đối tượng đó chờ xử lý (kể cả dòng worker khác đang giữ).
+    Khi cả lô lỗi, từng thay đổi được áp dụng riêng để một bản ghi hỏng không
+    chặn các đối tượng khác; các thay đổi sau của chính đối tượng đó chờ tới khi
+    bản ghi lỗi thành công hoặc bị bỏ qua sau max_attempts lần.
+    """
+
+    def __init__(self, batch_size: int, max_attempts: int):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._lock = Lock()
+        self._batches = 0
+        self._applied = 0
+        self._failed = 0
+        self._last_run_at: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+
+    def run_once(self) -> int:
+        """
+        Xử lý một lô, trả về số bản ghi outbox đã lấy ra.
+        """
+        with HumanSessionLocal() as session_human, PayrollSessionLocal() as session_payroll:
+            older = aliased(ReplicationOutbox)
+            entries = (
+                session_human.query(ReplicationOutbox)
+                .filter(
+                    ReplicationOutbox.ProcessedAt.is_(None),
+                    ReplicationOutbox.Attempts < self.max_attempts,
+                    ~exists().where(
+                        older.EntityType == ReplicationOutbox.EntityType,
+                        older.EntityID == ReplicationOutbox.EntityID,
+                        older.OutboxID < ReplicationOutbox.OutboxID,
+                        older.ProcessedAt.is_(None),
+                        older.Attempts < self.max_attempts,
+                    ),
+                )
+                .order_by(ReplicationOutbox.OutboxID)
+                .limit(self.batch_size)
+                # with_for_update không sinh hint nào trên SQL Server; chỉ khóa bảng
+                # chính, truy vấn con vẫn thấy các dòng cũ hơn worker khác đang giữ
+                .with_hint(ReplicationOutbox, "WITH (UPDLOCK, ROWLOCK, READPAST)", "mssql")
+                .all()
+            )
+            if not entries:
+                session_human.commit()
+                return 0
+
+            try:
+                apply_changes(session_payroll, entries)
+                session_payroll.commit()
+                done, failed = entries, []
+            except Exception as e:
+                session_payroll.rollback()
+                self._record_error(e)
+                done, failed = self._apply_one_by_one(session_payroll, entries)
+
+            now = datetime.now()
+            for entry in done:
+                entry.ProcessedAt = now
+            for entry, error in failed:
+                entry.Attempts += 1
+                entry.LastError = str(error)[:1000]
+            session_human.commit()
+
+        # Báo cáo từ snapshot nhóm lương theo nhân viên/phòng ban bên payroll
+        if done:
+            payroll_snapshot.mark_stale()
+        # Xóa nhân viên kéo theo xóa lương và chấm công bên payroll
+        if any(entry.EntityType == EMPLOYEE and entry.Operation == DELETE for entry in done):
+            invalidate_dashboard(SALARIES, ATTENDANCE)
+
+        with self._lock:
+            self._batches += 1
+            self._applied += len(done)
+            self._failed += len(failed)
+            self._last_run_at = now
+        return len(entries)
+
+    def _apply_one_by_one(self, session_payroll: Session, entries: List[ReplicationOutbox]):
+        done, failed = [], []
+        blocked = set()
+        for entry in entries:
+            key = (entry.EntityType, entry.EntityID)
+            if key in blocked:
+                # Không áp dụng thay đổi mới hơn khi thay đổi trước của đối tượng còn lỗi;
+                # dòng giữ nguyên trạng thái chờ, lấy lại theo thứ tự ở lô sau
+                continue
+            try:
+                apply_changes(session_payroll, [entry])
+                session_payroll.commit()
+                done.append(entry)
+            except Exception as e:
+                session_payroll.rollback()
+                failed.append((entry, e))
+                blocked.add(key)
+        return done, failed
+
+    def _record_error(self, error: Exception) -> None:
+        with self._lock:
+            self._last_error = f"{datetime.now().isoformat()}: {str(error)[:500]}"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batch_size": self.batch_size,
+                "max_attempts": self.max_attempts,
+                "batches": self._batches,
+                "applied": self._applied,
+                "failed": self._failed,
+                "last_run_at": self._last_run_at,
+                "last_error": self._last_error,
+            }
+
+
+replication_worker = ReplicationWorker(
+    batch_size=replication_conf.REPLICATION_BATCH_SIZE,
+    max_attempts=replication_conf.REPLICATION_MAX_ATTEMPTS,
+)
+
+
+def replication_status(session_human: Session) -> Dict[str, Any]:
+    pending = ReplicationOutbox.ProcessedAt.is_(None)
+    backlog, oldest_pending_at = (
+        session_human.query(func.count(ReplicationOutbox.OutboxID), func.min(ReplicationOutbox.CreatedAt))
+        .filter(pending, ReplicationOutbox.Attempts < replication_worker.max_attempts)
+        .one()
+    )
+    dead_letters = (
+        session_human.query(func.count(ReplicationOutbox.OutboxID))
+        .filter(pending, ReplicationOutbox.Attempts >= replication_worker.max_attempts)
+        .scalar()
+    )
+    last_processed_at = session_human.query(func.max(ReplicationOutbox.ProcessedAt)).scalar()
+
+    return {
+        "backlog": backlog,
+        "dead_letters": dead_letters,
+        "oldest_pending_at": oldest_pending_at,
+        "lag_seconds": (
+            round((datetime.now() - oldest_pending_at).total_seconds(), 3)
+            if oldest_pending_at
+            else 0
+        ),
+        "last_processed_at": last_processed_at,
+        "worker": replication_worker.stats(),
+    }
+
+
+async def run_replication_worker() -> None:
+    """
+    Vòng lặp nền: xử lý liên tục khi còn tồn đọng, nghỉ REPLICATION_POLL_SECONDS khi hết.
+    """
+    while True:
+        try:
+            processed = await asyncio.to_thread(replication_worker.run_once)
+        except Exception as e:
+            replication_worker._record_error(e)
+            print(f"Lỗi khi đồng bộ HUMAN_2025 -> payroll: {str(e)}")
+            processed = 0
+        if processed < replication_worker.batch_size:
+            await asyncio.sleep(replication_conf.REPLICATION_POLL_SECONDS)
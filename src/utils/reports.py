@@ -6,6 +6,8 @@ from datetime import date, datetime
 from typing import Optional, List, Dict, Any
 from decimal import Decimal
 
+import pyarrow.compute as pc
+
 from ..schemas.human import (
     Department as HmDepartment,
     Employee as HmEmployee,
@@ -18,6 +20,12 @@ from ..schemas.payroll import (
     Salary as PrSalary,
     Attendance as PrAttendance,
 )
+from .payroll_snapshot import (
+    DEPARTMENTS as SNAPSHOT_DEPARTMENTS,
+    EMPLOYEES as SNAPSHOT_EMPLOYEES,
+    SALARIES as SNAPSHOT_SALARIES,
+    payroll_snapshot,
+)
 
 
 def get_hr_report_logic(session: Session):
@@ -131,17 +139,64 @@ def get_payroll_report_logic(session: Session, month: Optional[date] = None):
         report_title = "Tất cả thời gian"
 
     salary_stats = salary_query.first()
-    total_budget = salary_stats.total_budget or 0
-    total_salary_count = salary_stats.total_salary_count or 0
+    avg_salary_by_dept = dept_query.group_by(
+        PrDepartment.DepartmentID, PrDepartment.DepartmentName
+    ).all()
+
+    return _payroll_report(
+        report_title,
+        salary_stats.total_budget or 0,
+        salary_stats.total_salary_count or 0,
+        avg_salary_by_dept,
+    )
+
+
+def get_payroll_report_snapshot_logic(month: Optional[date] = None):
+    """
+    Cùng báo cáo với get_payroll_report_logic nhưng đọc từ snapshot Parquet:
+    chỉ đọc phân vùng của tháng cần báo cáo và các cột cần dùng.
+    """
+    salaries = payroll_snapshot.read(
+        SNAPSHOT_SALARIES,
+        month_from=month,
+        month_to=month,
+        columns=["SalaryID", "EmployeeID", "NetSalary"],
+    )
+    employees = payroll_snapshot.read(
+        SNAPSHOT_EMPLOYEES, columns=["EmployeeID", "DepartmentID"]
+    )
+    departments = payroll_snapshot.read(SNAPSHOT_DEPARTMENTS)
 
+    by_department = (
+        salaries.join(employees, "EmployeeID", join_type="inner")
+        .join(departments, "DepartmentID", join_type="inner")
+        .group_by(["DepartmentID", "DepartmentName"])
+        .aggregate([("SalaryID", "count"), ("NetSalary", "sum")])
+        .sort_by("DepartmentID")
+    )
+
+    return _payroll_report(
+        month.strftime("%m/%Y") if month else "Tất cả thời gian",
+        pc.sum(salaries["NetSalary"]).as_py() or 0,
+        salaries.num_rows,
+        [
+            (
+                row["DepartmentID"],
+                row["DepartmentName"],
+                row["SalaryID_count"],
+                row["NetSalary_sum"],
+                float(row["NetSalary_sum"]) / row["SalaryID_count"],
+            )
+            for row in by_department.to_pylist()
+        ],
+    )
+
+
+def _payroll_report(report_title, total_budget, total_salary_count, avg_salary_by_dept):
     average_salary = (
         float(total_budget) / total_salary_count if total_salary_count > 0 else 0
     )
 
-    avg_salary_by_dept = dept_query.group_by(
-        PrDepartment.DepartmentID, PrDepartment.DepartmentName
-    ).all()
-
     return {
         "report_period": report_title,
         "total_budget": float(total_budget),
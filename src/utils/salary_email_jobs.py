@@ -0,0 +1,679 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from fastapi import HTTPException, status
+
+import asyncio
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from time import monotonic, sleep
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from src.core.config import salary_email_conf
+from src.databases.human_db import SessionLocal as HumanSessionLocal
+from src.databases.payroll_db import (
+    SessionLocal as PayrollSessionLocal,
+    engine as payroll_engine,
+)
+from ..schemas.payroll import SalaryEmailJob, SalaryEmailLedger
+from .auth import CurrentUser
+from .notifications import (
+    MAX_WORKER_THREADS,
+    build_email,
+    email_configured,
+    parse_salary_month,
+    prepare_salary_emails,
+    smtp_pool,
+)
+
+# Trạng thái tác vụ
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+COMPLETED_WITH_ERRORS = "completed_with_errors"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# Trạng thái từng email trong sổ gửi; PENDING gồm cả email chờ gửi lại (NextAttemptAt)
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+
+MAX_ERROR_LENGTH = 1000
+# Số email lỗi trả về kèm trạng thái tác vụ
+FAILURE_SAMPLE = 50
+
+
+class LostClaim(Exception):
+    """
+    Worker không còn giữ tác vụ (quá hạn heartbeat, worker khác đã nhận lại).
+    """
+
+
+def ensure_salary_email_tables() -> None:
+    SalaryEmailJob.__table__.create(payroll_engine, checkfirst=True)
+    SalaryEmailLedger.__table__.create(payroll_engine, checkfirst=True)
+
+
+class RateLimiter:
+    """
+    Giãn đều các lần gửi: tối đa rate email/giây trên tất cả luồng gửi.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = monotonic()
+            wait = self._next - now
+            self._next = max(self._next, now) + self.interval
+        if wait > 0:
+            sleep(wait)
+
+
+def retry_delay(attempts: int) -> float:
+    return min(
+        salary_email_conf.SALARY_EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        salary_email_conf.SALARY_EMAIL_RETRY_MAX_SECONDS,
+    )
+
+
+def _permanent_failure(error: Exception) -> bool:
+    """
+    Lỗi 5xx của riêng email (địa chỉ không tồn tại, bị từ chối...) gửi lại cũng
+    không thành công; lỗi đăng nhập và lỗi kết nối thì thử lại sau.
+    """
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def _error_text(error: Any) -> str:
+    return str(error)[:MAX_ERROR_LENGTH]
+
+
+def _job_dict(job: SalaryEmailJob) -> Dict[str, Any]:
+    done = job.Sent + job.Failed + job.Skipped
+    if job.Total:
+        progress = round(done * 100 / job.Total, 1)
+    else:
+        progress = 0.0 if job.Status in ACTIVE_STATUSES else 100.0
+    return {
+        "JobID": job.JobID,
+        "SalaryMonth": job.SalaryMonth,
+        "Status": job.Status,
+        "CreatedBy": job.CreatedBy,
+        "CreatedAt": job.CreatedAt,
+        "StartedAt": job.StartedAt,
+        "FinishedAt": job.FinishedAt,
+        "Total": job.Total,
+        "Sent": job.Sent,
+        "Failed": job.Failed,
+        "Skipped": job.Skipped,
+        "Pending": max(job.Total - done, 0),
+        "Progress": progress,
+        "LastError": job.LastError,
+    }
+
+
+def create_salary_email_job(
+    session_payroll: Session, user: CurrentUser, month_str: Optional[str] = None
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Xếp hàng tác vụ gửi email lương của tháng; nếu tháng đó đang có tác vụ chờ
+    hoặc đang chạy thì trả về tác vụ đó (False) thay vì tạo tác vụ mới.
+
+    Hai request đồng thời cho cùng tháng đều có thể không thấy tác vụ nào; khóa
+    duy nhất trên ActiveMonth chỉ cho một request tạo được, request còn lại trả
+    về tác vụ vừa tạo.
+    """
+    month = parse_salary_month(month_str)
+    if not email_configured():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Chưa cấu hình EMAIL_USERNAME/EMAIL_PASSWORD để gửi email",
+        )
+
+    active = _active_job(session_payroll, month)
+    if active:
+        return _job_dict(active), False
+
+    job = SalaryEmailJob(
+        SalaryMonth=month,
+        ActiveMonth=month,
+        Status=QUEUED,
+        CreatedBy=user.Username,
+        CreatedAt=datetime.now(),
+        Total=0,
+        Sent=0,
+        Failed=0,
+        Skipped=0,
+    )
+    session_payroll.add(job)
+    try:
+        session_payroll.commit()
+    except IntegrityError:
+        session_payroll.rollback()
+        active = _active_job(session_payroll, month)
+        if active is None:
+            raise
+        return _job_dict(active), False
+    session_payroll.refresh(job)
+    return _job_dict(job), True
+
+
+def _active_job(session_payroll: Session, month) -> Optional[SalaryEmailJob]:
+    return session_payroll.scalars(
+        select(SalaryEmailJob).where(SalaryEmailJob.ActiveMonth == month)
+    ).first()
+
+
+def salary_email_job_status(session_payroll: Session, job_id: int) -> Dict[str, Any]:
+    job = session_payroll.get(SalaryEmailJob, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy tác vụ gửi email",
+        )
+
+    failures = (
+        session_payroll.query(SalaryEmailLedger)
+        .filter(SalaryEmailLedger.JobID == job_id, SalaryEmailLedger.Status == FAILED)
+        .order_by(SalaryEmailLedger.LedgerID)
+        .limit(FAILURE_SAMPLE)
+        .all()
+    )
+    retrying = (
+        session_payroll.query(func.count(SalaryEmailLedger.LedgerID))
+        .filter(
+            SalaryEmailLedger.JobID == job_id,
+            SalaryEmailLedger.Status == PENDING,
+            SalaryEmailLedger.Attempts > 0,
+        )
+        .scalar()
+    )
+    return {
+        **_job_dict(job),
+        "Retrying": retrying,
+        "Failures": [
+            {
+                "EmployeeID": row.EmployeeID,
+                "Email": row.Email,
+                "Attempts": row.Attempts,
+                "LastError": row.LastError,
+            }
+            for row in failures
+        ],
+    }
+
+
+class SalaryEmailWorker:
+    """
+    Xử lý tuần tự các tác vụ gửi email lương trong bảng salary_email_jobs.
+
+    - Mỗi email có một dòng trong sổ gửi theo (tháng, nhân viên): tác vụ chạy
+      lại cho cùng tháng bỏ qua các email đã gửi, tác vụ bị gián đoạn tiếp tục
+      từ các email còn chờ.
+    - Email lỗi được gửi lại sau retry_delay(lần thử) tới tối đa max_attempts
+      lần; lỗi 5xx của riêng email không gửi lại.
+    - Tốc độ gửi giới hạn bởi RateLimiter, dùng chung smtp_pool.
+    - Nhiều worker (nhiều tiến trình) nhận tác vụ bằng UPDATE có điều kiện
+      trạng thái và ghi ClaimToken; mọi cập nhật tác vụ kiểm tra ClaimToken,
+      nên worker đã mất tác vụ dừng ngay ở lần ghi tiếp theo. Heartbeat được
+      ghi từ luồng riêng; tác vụ "running" không còn heartbeat được nhận lại.
+    - Email được nhận (PENDING -> SENDING) trước khi gửi; email SENDING của
+      worker đã dừng được đánh dấu lỗi chứ không gửi lại, tránh gửi trùng.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        max_attempts: int,
+        batch_size: int,
+        poll_seconds: float,
+        stale_seconds: int,
+    ):
+        self.limiter = RateLimiter(rate_per_second)
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self._stop = Event()
+        self._lock = Lock()
+        self._current_job: Optional[int] = None
+        self._jobs_processed = 0
+        self._sent = 0
+        self._failed = 0
+        self._last_error: Optional[str] = None
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _claim(self, session_payroll: Session) -> Optional[Tuple[int, str]]:
+        now = datetime.now()
+        session_payroll.execute(
+            update(SalaryEmailJob)
+            .where(
+                SalaryEmailJob.Status == RUNNING,
+                SalaryEmailJob.HeartbeatAt < now - timedelta(seconds=self.stale_seconds),
+            )
+            .values(Status=QUEUED, ClaimToken=None)
+            .execution_options(synchronize_session=False)
+        )
+        session_payroll.commit()
+
+        queued = session_payroll.scalars(
+            select(SalaryEmailJob.JobID)
+            .where(SalaryEmailJob.Status == QUEUED)
+            .order_by(SalaryEmailJob.JobID)
+            .limit(10)
+        ).all()
+        for job_id in queued:
+            token = uuid4().hex
+            claimed = session_payroll.execute(
+                update(SalaryEmailJob)
+                .where(SalaryEmailJob.JobID == job_id, SalaryEmailJob.Status == QUEUED)
+                .values(
+                    Status=RUNNING,
+                    ClaimToken=token,
+                    StartedAt=func.coalesce(SalaryEmailJob.StartedAt, now),
+                    HeartbeatAt=now,
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session_payroll.commit()
+            if claimed:
+                return job_id, token
+        return None
+
+    def _update_job(self, session_payroll: Session, job_id: int, token: str, **values) -> None:
+        """
+        Mọi thay đổi trên tác vụ chỉ có hiệu lực khi worker còn giữ ClaimToken;
+        các thay đổi sổ gửi chưa commit trong cùng session bị hủy theo.
+        """
+        result = session_payroll.execute(
+            update(SalaryEmailJob)
+            .where(SalaryEmailJob.JobID == job_id, SalaryEmailJob.ClaimToken == token)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            session_payroll.rollback()
+            raise LostClaim(f"Tác vụ {job_id} đã được worker khác nhận lại")
+        session_payroll.commit()
+
+    def _heartbeat(self, job_id: int, token: str, done: Event, lost: Event) -> None:
+        # Luồng riêng: một lô gửi chậm (SMTP timeout) không làm tác vụ bị coi là mất heartbeat
+        interval = max(self.stale_seconds / 3, 1)
+        while not done.wait(interval):
+            try:
+                with PayrollSessionLocal() as session_payroll:
+                    self._update_job(session_payroll, job_id, token, HeartbeatAt=datetime.now())
+            except LostClaim:
+                lost.set()
+                return
+            except Exception as e:
+                self.record_error(e)
+
+    def _sync_ledger(
+        self,
+        session_payroll: Session,
+        job: SalaryEmailJob,
+        token: str,
+        tasks: Dict[int, Dict[str, Any]],
+    ) -> None:
+        """
+        Đưa các email cần gửi của tháng vào sổ gửi cho tác vụ này; email đã gửi
+        bởi tác vụ trước được tính là bỏ qua.
+        """
+        existing = {
+            row.EmployeeID: row
+            for row in session_payroll.query(SalaryEmailLedger).filter(
+                SalaryEmailLedger.SalaryMonth == job.SalaryMonth
+            )
+        }
+        skipped = 0
+        new_rows = []
+        for employee_id, task in tasks.items():
+            row = existing.get(employee_id)
+            if row is None:
+                new_rows.append(
+                    {
+                        "SalaryMonth": job.SalaryMonth,
+                        "EmployeeID": employee_id,
+                        "JobID": job.JobID,
+                        "Email": task["to_email"],
+                        "Status": PENDING,
+                        "Attempts": 0,
+                    }
+                )
+            elif row.Status == SENT:
+                if row.JobID != job.JobID:
+                    skipped += 1
+            elif row.Status == SENDING:
+                # Đang được gửi (hoặc bị bỏ dở); _expire_abandoned xử lý khi quá hạn
+                continue
+            elif row.JobID != job.JobID:
+                # Email lỗi/chưa gửi của tác vụ trước: tác vụ này gửi lại từ đầu
+                row.JobID = job.JobID
+                row.Email = task["to_email"]
+                row.Status = PENDING
+                row.Attempts = 0
+                row.NextAttemptAt = None
+                row.LastError = None
+            elif row.Status == PENDING:
+                row.Email = task["to_email"]
+        if new_rows:
+            session_payroll.execute(SalaryEmailLedger.__table__.insert(), new_rows)
+
+        # Tác vụ bị gián đoạn: nhân viên không còn dữ liệu lương/email thì không gửi nữa
+        for employee_id, row in existing.items():
+            if employee_id not in tasks and row.JobID == job.JobID and row.Status == PENDING:
+                row.Status = FAILED
+                row.NextAttemptAt = None
+                row.LastError = "Không còn dữ liệu lương hoặc email của nhân viên"
+
+        session_payroll.flush()
+        self._update_job(
+            session_payroll, job.JobID, token, Total=len(tasks), Skipped=skipped
+        )
+
+    def _claim_rows(self, session_payroll: Session, job_id: int, token: str) -> List[SalaryEmailLedger]:
+        """
+        Nhận một lô email đến hạn: chuyển PENDING -> SENDING kèm ClaimToken trước
+        khi gửi, nên hai worker không bao giờ gửi cùng một email.
+        """
+        now = datetime.now()
+        due_ids = session_payroll.scalars(
+            select(SalaryEmailLedger.LedgerID)
+            .where(
+                SalaryEmailLedger.JobID == job_id,
+                SalaryEmailLedger.Status == PENDING,
+                (SalaryEmailLedger.NextAttemptAt.is_(None))
+                | (SalaryEmailLedger.NextAttemptAt <= now),
+            )
+            .order_by(SalaryEmailLedger.LedgerID)
+            .limit(self.batch_size)
+        ).all()
+        if not due_ids:
+            return []
+
+        session_payroll.execute(
+            update(SalaryEmailLedger)
+            .where(
+                SalaryEmailLedger.LedgerID.in_(due_ids),
+                SalaryEmailLedger.JobID == job_id,
+                SalaryEmailLedger.Status == PENDING,
+            )
+            .values(Status=SENDING, ClaimToken=token, ClaimedAt=now)
+            .execution_options(synchronize_session=False)
+        )
+        self._update_job(session_payroll, job_id, token, HeartbeatAt=now)
+        return (
+            session_payroll.query(SalaryEmailLedger)
+            .filter(
+                SalaryEmailLedger.LedgerID.in_(due_ids),
+                SalaryEmailLedger.Status == SENDING,
+                SalaryEmailLedger.ClaimToken == token,
+            )
+            .order_by(SalaryEmailLedger.LedgerID)
+            .execution_options(populate_existing=True)
+            .all()
+        )
+
+    def _expire_abandoned(self, session_payroll: Session, job_id: int) -> None:
+        # Email SENDING quá hạn của worker đã dừng: không rõ máy chủ đã nhận hay
+        # chưa, đánh dấu lỗi thay vì gửi lại để không gửi trùng
+        session_payroll.execute(
+            update(SalaryEmailLedger)
+            .where(
+                SalaryEmailLedger.JobID == job_id,
+                SalaryEmailLedger.Status == SENDING,
+                SalaryEmailLedger.ClaimedAt
+                < datetime.now() - timedelta(seconds=self.stale_seconds),
+            )
+            .values(
+                Status=FAILED,
+                ClaimToken=None,
+                NextAttemptAt=None,
+                LastError="Bị gián đoạn khi đang gửi, không xác định được email đã gửi hay chưa",
+            )
+            .execution_options(synchronize_session=False)
+        )
+        session_payroll.commit()
+
+    def _remaining(self, session_payroll: Session, job_id: int) -> Tuple[int, Optional[datetime]]:
+        """
+        Số email chưa xong (chờ gửi hoặc đang gửi) và lượt gửi lại gần nhất.
+        """
+        return session_payroll.execute(
+            select(
+                func.count(SalaryEmailLedger.LedgerID),
+                func.min(SalaryEmailLedger.NextAttemptAt),
+            ).where(
+                SalaryEmailLedger.JobID == job_id,
+                SalaryEmailLedger.Status.in_((PENDING, SENDING)),
+            )
+        ).one()
+
+    def _send(self, task: Dict[str, Any]) -> Optional[Exception]:
+        self.limiter.acquire()
+        try:
+            smtp_pool.send(
+                build_email(
+                    task["to_email"], task["subject"], task["body_html"], task.get("body_text")
+                )
+            )
+        except Exception as e:
+            return e
+        return None
+
+    def _record_results(
+        self,
+        session_payroll: Session,
+        token: str,
+        rows: List[SalaryEmailLedger],
+        errors: List[Optional[Exception]],
+    ) -> None:
+        # Ghi theo ClaimToken của từng dòng (không theo tác vụ): email đã gửi vẫn
+        # được ghi nhận kể cả khi tác vụ vừa bị worker khác nhận lại
+        now = datetime.now()
+        sent = failed = 0
+        for row, error in zip(rows, errors):
+            attempts = row.Attempts + 1
+            if error is None:
+                values = {"Status": SENT, "SentAt": now, "NextAttemptAt": None, "LastError": None}
+                sent += 1
+            elif _permanent_failure(error) or attempts >= self.max_attempts:
+                values = {"Status": FAILED, "NextAttemptAt": None, "LastError": _error_text(error)}
+                failed += 1
+            else:
+                values = {
+                    "Status": PENDING,
+                    "NextAttemptAt": now + timedelta(seconds=retry_delay(attempts)),
+                    "LastError": _error_text(error),
+                }
+            session_payroll.execute(
+                update(SalaryEmailLedger)
+                .where(
+                    SalaryEmailLedger.LedgerID == row.LedgerID,
+                    SalaryEmailLedger.Status == SENDING,
+                    SalaryEmailLedger.ClaimToken == token,
+                )
+                .values(Attempts=attempts, ClaimToken=None, **values)
+                .execution_options(synchronize_session=False)
+            )
+        session_payroll.commit()
+        with self._lock:
+            self._sent += sent
+            self._failed += failed
+
+    def _update_progress(self, session_payroll: Session, job_id: int, token: str) -> Tuple[int, int]:
+        counts = dict(
+            session_payroll.query(SalaryEmailLedger.Status, func.count(SalaryEmailLedger.LedgerID))
+            .filter(SalaryEmailLedger.JobID == job_id)
+            .group_by(SalaryEmailLedger.Status)
+            .all()
+        )
+        sent, failed = counts.get(SENT, 0), counts.get(FAILED, 0)
+        self._update_job(
+            session_payroll, job_id, token, Sent=sent, Failed=failed, HeartbeatAt=datetime.now()
+        )
+        return sent, failed
+
+    def _finish(self, session_payroll: Session, job_id: int, token: str, status_: str, error: Any = None) -> None:
+        values = {
+            "Status": status_,
+            "ActiveMonth": None,
+            "FinishedAt": datetime.now(),
+            "ClaimToken": None,
+        }
+        if error is not None:
+            values["LastError"] = _error_text(error)
+        self._update_job(session_payroll, job_id, token, **values)
+
+    def _process(self, job_id: int, token: str) -> None:
+        done, lost = Event(), Event()
+        heartbeat = Thread(
+            target=self._heartbeat,
+            args=(job_id, token, done, lost),
+            name=f"salary-email-heartbeat-{job_id}",
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            with PayrollSessionLocal() as session_payroll:
+                job = session_payroll.get(SalaryEmailJob, job_id)
+                if not email_configured():
+                    self._finish(
+                        session_payroll, job_id, token, FAILED,
+                        "Chưa cấu hình EMAIL_USERNAME/EMAIL_PASSWORD",
+                    )
+                    return
+
+                with HumanSessionLocal() as session_human:
+                    tasks = {
+                        task["employee_id"]: task
+                        for task in prepare_salary_emails(session_human, session_payroll, job.SalaryMonth)
+                    }
+                self._sync_ledger(session_payroll, job, token, tasks)
+
+                worker_count = max(1, min(MAX_WORKER_THREADS, len(tasks)))
+                with ThreadPoolExecutor(max_workers=worker_count) as executor:
+                    while not self._stop.is_set():
+                        if lost.is_set():
+                            raise LostClaim(f"Tác vụ {job_id} đã được worker khác nhận lại")
+                        rows = self._claim_rows(session_payroll, job_id, token)
+                        if not rows:
+                            self._expire_abandoned(session_payroll, job_id)
+                            remaining, next_at = self._remaining(session_payroll, job_id)
+                            if not remaining:
+                                break
+                            # Chờ lượt gửi lại gần nhất hoặc email đang gửi dở của worker khác
+                            self._update_progress(session_payroll, job_id, token)
+                            wait = self.poll_seconds
+                            if next_at is not None:
+                                wait = min(max((next_at - datetime.now()).total_seconds(), 0), wait)
+                            self._stop.wait(wait)
+                            continue
+                        errors = list(
+                            executor.map(self._send, [tasks[row.EmployeeID] for row in rows])
+                        )
+                        self._record_results(session_payroll, token, rows, errors)
+                        self._update_progress(session_payroll, job_id, token)
+
+                if self._stop.is_set():
+                    # Ứng dụng dừng: trả tác vụ về hàng đợi, lần khởi động sau gửi tiếp
+                    self._update_job(session_payroll, job_id, token, Status=QUEUED, ClaimToken=None)
+                    return
+
+                _, failed = self._update_progress(session_payroll, job_id, token)
+                self._finish(
+                    session_payroll, job_id, token,
+                    COMPLETED if failed == 0 else COMPLETED_WITH_ERRORS,
+                )
+        finally:
+            done.set()
+            heartbeat.join()
+
+    def run_once(self) -> bool:
+        """
+        Nhận và xử lý một tác vụ; False nếu không có tác vụ nào đang chờ.
+        """
+        with PayrollSessionLocal() as session_payroll:
+            claim = self._claim(session_payroll)
+        if claim is None:
+            return False
+        job_id, token = claim
+
+        with self._lock:
+            self._current_job = job_id
+        try:
+            self._process(job_id, token)
+        except LostClaim as e:
+            # Worker khác đang xử lý tác vụ này; dừng gửi, không ghi gì thêm
+            self.record_error(e)
+        except Exception as e:
+            # Chạy lại tác vụ mới cho tháng này sẽ bỏ qua các email đã gửi
+            with PayrollSessionLocal() as session_payroll:
+                try:
+                    self._finish(session_payroll, job_id, token, FAILED, e)
+                except LostClaim:
+                    pass
+            raise
+        finally:
+            with self._lock:
+                self._current_job = None
+                self._jobs_processed += 1
+        return True
+
+    def record_error(self, error: Exception) -> None:
+        with self._lock:
+            self._last_error = f"{datetime.now().isoformat()}: {str(error)[:500]}"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "current_job": self._current_job,
+                "jobs_processed": self._jobs_processed,
+                "rate_per_second": self.limiter.rate,
+                "max_attempts": self.max_attempts,
+                "sent": self._sent,
+                "failed": self._failed,
+                "last_error": self._last_error,
+            }
+
+
+salary_email_worker = SalaryEmailWorker(
+    rate_per_second=salary_email_conf.SALARY_EMAIL_RATE_PER_SECOND,
+    max_attempts=salary_email_conf.SALARY_EMAIL_MAX_ATTEMPTS,
+    batch_size=salary_email_conf.SALARY_EMAIL_BATCH_SIZE,
+    poll_seconds=salary_email_conf.SALARY_EMAIL_POLL_SECONDS,
+    stale_seconds=salary_email_conf.SALARY_EMAIL_STALE_SECONDS,
+)
+
+
+async def run_salary_email_worker() -> None:
+    while True:
+        try:
+            if await asyncio.to_thread(salary_email_worker.run_once):
+                # Còn tác vụ khác đang chờ thì xử lý ngay
+                continue
+        except Exception as e:
+            salary_email_worker.record_error(e)
+            print(f"Lỗi khi xử lý tác vụ gửi email lương: {str(e)}")
+        await asyncio.sleep(salary_email_conf.SALARY_EMAIL_POLL_SECONDS)
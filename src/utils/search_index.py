@@ -0,0 +1,518 @@
+from sqlalchemy.orm import Session
+
+import asyncio
+import heapq
+import unicodedata
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from collections import Counter
+from itertools import islice
+from threading import Lock, RLock
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.core.config import search_index_conf
+from src.databases.human_db import SessionLocal as HumanSessionLocal
+from ..schemas.human import (
+    Department as HmDepartment,
+    Employee as HmEmployee,
+    Position as HmPosition,
+)
+
+# Độ dài tối đa của tiền tố từ được đánh chỉ mục
+MAX_PREFIX_LENGTH = 12
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """
+    Chuẩn hóa để so khớp không dấu: "Nguyễn Văn Đạt" -> "nguyen van dat".
+    """
+    if not value:
+        return ""
+    value = value.replace("đ", "d").replace("Đ", "D")
+    value = unicodedata.normalize("NFD", value)
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return " ".join(value.lower().split())
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def word_prefixes(text: str) -> Set[str]:
+    return {
+        word[:length]
+        for word in text.split()
+        for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1)
+    }
+
+
+def _insort(ids: List[int], employee_id: int) -> None:
+    if not ids or ids[-1] < employee_id:
+        ids.append(employee_id)
+    else:
+        insort(ids, employee_id)
+
+
+def _discard(ids: List[int], employee_id: int) -> None:
+    i = bisect_left(ids, employee_id)
+    if i < len(ids) and ids[i] == employee_id:
+        del ids[i]
+
+
+def _decrement(counter: Counter, key) -> None:
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
+
+
+@dataclass
+class EmployeeDoc:
+    EmployeeID: int
+    FullName: str
+    DepartmentID: Optional[int]
+    PositionID: Optional[int]
+    name_key: str
+
+
+class EmployeeSearchIndex:
+    """
+    Chỉ mục tìm kiếm nhân viên trong bộ nhớ, so khớp không dấu.
+
+    - Tiền tố từng từ của tên -> danh sách EmployeeID đã sắp xếp, trả lời nhóm
+      "một từ trong tên bắt đầu bằng truy vấn" (một từ) bằng một lần tra dict.
+    - Nhân viên được nhóm theo tên chuẩn hóa (tên trùng nhau rất nhiều); trigram
+      trỏ tới các tên khác nhau, nên so khớp chuỗi con và truy vấn nhiều từ chỉ
+      duyệt vài nghìn tên thay vì toàn bộ nhân viên. Tổng số kết quả là tổng kích
+      thước nhóm; trang kết quả lấy bằng k-way merge các danh sách EmployeeID
+      đã sắp xếp, dừng khi đủ offset + limit + 1 phần tử.
+    - Mảng (tên chuẩn hóa, EmployeeID) và mảng mã nhân viên dạng chuỗi đã sắp xếp,
+      tra tiền tố bằng bisect cho gợi ý khi gõ (typeahead).
+    - Tên phòng ban/chức vụ (ít bản ghi) được so khớp trực tiếp; danh sách nhân
+      viên đã sắp xếp của từng phòng ban/chức vụ và số nhân viên theo cặp
+      (phòng ban, chức vụ) cho phép đếm và lấy trang mà không dựng tập hợp lớn.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._rebuild_lock = Lock()
+        self.ready = False
+        self._docs: Dict[int, EmployeeDoc] = {}
+        self._prefixes: Dict[str, List[int]] = {}
+        self._name_groups: Dict[str, List[int]] = {}
+        self._name_pairs: Dict[str, Counter] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._name_keys: List[Tuple[str, int]] = []
+        self._id_keys: List[str] = []
+        # Khi dựng lại toàn bộ: nối cuối rồi sắp xếp một lần thay vì insort từng phần tử
+        self._bulk_loading = False
+        self._departments: Dict[int, Tuple[str, str]] = {}
+        self._positions: Dict[int, Tuple[str, str]] = {}
+        self._department_members: Dict[Optional[int], List[int]] = {}
+        self._position_members: Dict[Optional[int], List[int]] = {}
+        self._pair_counts: Counter = Counter()
+        # Các thay đổi ghi vào chỉ mục trong lúc rebuild đọc database; phát lại sau
+        # khi thay chỉ mục mới để không mất thay đổi nằm giữa lúc đọc và lúc thay
+        self._pending: Optional[List[Tuple[Callable, tuple]]] = None
+
+    def rebuild(self, session: Session) -> None:
+        with self._rebuild_lock:
+            with self._lock:
+                self._pending = []
+            try:
+                departments = session.query(
+                    HmDepartment.DepartmentID, HmDepartment.DepartmentName
+                ).all()
+                positions = session.query(HmPosition.PositionID, HmPosition.PositionName).all()
+                employees = (
+                    session.query(
+                        HmEmployee.EmployeeID,
+                        HmEmployee.FullName,
+                        HmEmployee.DepartmentID,
+                        HmEmployee.PositionID,
+                    )
+                    .order_by(HmEmployee.EmployeeID)
+                    .all()
+                )
+
+                fresh = EmployeeSearchIndex()
+                fresh.load(departments, positions, employees)
+            except Exception:
+                with self._lock:
+                    self._pending = None
+                raise
+
+            with self._lock:
+                pending, self._pending = self._pending, None
+                for name in (
+                    "_docs", "_prefixes", "_name_groups", "_name_pairs", "_trigrams",
+                    "_name_keys", "_id_keys", "_departments", "_positions",
+                    "_department_members", "_position_members", "_pair_counts",
+                ):
+                    setattr(self, name, getattr(fresh, name))
+                # Ghi lại có thể trùng với dữ liệu vừa đọc; các thao tác đều idempotent
+                for apply, args in pending:
+                    apply(*args)
+                self.ready = True
+
+    def _log(self, apply: Callable, *args) -> None:
+        if self._pending is not None:
+            self._pending.append((apply, args))
+
+    def load(
+        self,
+        departments: Iterable[Tuple[int, str]],
+        positions: Iterable[Tuple[int, str]],
+        employees: Iterable[Tuple[int, str, Optional[int], Optional[int]]],
+    ) -> None:
+        """
+        Nạp toàn bộ dữ liệu vào chỉ mục rỗng; employees nên theo EmployeeID tăng dần.
+        """
+        self._bulk_loading = True
+        try:
+            for dept_id, dept_name in departments:
+                self._set_department(dept_id, dept_name)
+            for pos_id, pos_name in positions:
+                self._set_position(pos_id, pos_name)
+            for emp_id, full_name, dept_id, pos_id in employees:
+                self._upsert(emp_id, full_name, dept_id, pos_id)
+            self._name_keys.sort()
+            self._id_keys.sort()
+        finally:
+            self._bulk_loading = False
+        self.ready = True
+
+    def upsert(
+        self,
+        employee_id: int,
+        full_name: str,
+        department_id: Optional[int],
+        position_id: Optional[int],
+    ) -> None:
+        with self._lock:
+            self._log(self._upsert, employee_id, full_name, department_id, position_id)
+            self._upsert(employee_id, full_name, department_id, position_id)
+
+    def _upsert(
+        self,
+        employee_id: int,
+        full_name: str,
+        department_id: Optional[int],
+        position_id: Optional[int],
+    ) -> None:
+        self._remove(employee_id)
+        doc = EmployeeDoc(
+            EmployeeID=employee_id,
+            FullName=full_name,
+            DepartmentID=department_id,
+            PositionID=position_id,
+            name_key=normalize_text(full_name),
+        )
+        self._docs[employee_id] = doc
+        for prefix in word_prefixes(doc.name_key):
+            _insort(self._prefixes.setdefault(prefix, []), employee_id)
+        group = self._name_groups.get(doc.name_key)
+        if group is None:
+            group = self._name_groups[doc.name_key] = []
+            self._name_pairs[doc.name_key] = Counter()
+            for gram in trigrams(doc.name_key):
+                self._trigrams.setdefault(gram, set()).add(doc.name_key)
+        _insort(group, employee_id)
+        pair = (department_id, position_id)
+        self._name_pairs[doc.name_key][pair] += 1
+        self._pair_counts[pair] += 1
+        if self._bulk_loading:
+            self._name_keys.append((doc.name_key, employee_id))
+            self._id_keys.append(str(employee_id))
+        else:
+            insort(self._name_keys, (doc.name_key, employee_id))
+            insort(self._id_keys, str(employee_id))
+        _insort(self._department_members.setdefault(department_id, []), employee_id)
+        _insort(self._position_members.setdefault(position_id, []), employee_id)
+
+    def update_assignment(
+        self,
+        employee_id: int,
+        department_id: Optional[int],
+        position_id: Optional[int],
+    ) -> None:
+        with self._lock:
+            self._log(self._update_assignment, employee_id, department_id, position_id)
+            self._update_assignment(employee_id, department_id, position_id)
+
+    def _update_assignment(
+        self,
+        employee_id: int,
+        department_id: Optional[int],
+        position_id: Optional[int],
+    ) -> None:
+        doc = self._docs.get(employee_id)
+        if doc is not None:
+            self._upsert(employee_id, doc.FullName, department_id, position_id)
+
+    def remove(self, employee_id: int) -> None:
+        with self._lock:
+            self._log(self._remove, employee_id)
+            self._remove(employee_id)
+
+    def _remove(self, employee_id: int) -> None:
+        doc = self._docs.pop(employee_id, None)
+        if doc is None:
+            return
+        for prefix in word_prefixes(doc.name_key):
+            ids = self._prefixes.get(prefix)
+            if ids is not None:
+                _discard(ids, employee_id)
+                if not ids:
+                    del self._prefixes[prefix]
+        group = self._name_groups[doc.name_key]
+        _discard(group, employee_id)
+        pair = (doc.DepartmentID, doc.PositionID)
+        _decrement(self._name_pairs[doc.name_key], pair)
+        _decrement(self._pair_counts, pair)
+        if not group:
+            del self._name_groups[doc.name_key]
+            del self._name_pairs[doc.name_key]
+            for gram in trigrams(doc.name_key):
+                names = self._trigrams.get(gram)
+                if names is not None:
+                    names.discard(doc.name_key)
+                    if not names:
+                        del self._trigrams[gram]
+        i = bisect_left(self._name_keys, (doc.name_key, employee_id))
+        if i < len(self._name_keys) and self._name_keys[i][1] == employee_id:
+            del self._name_keys[i]
+        i = bisect_left(self._id_keys, str(employee_id))
+        if i < len(self._id_keys) and self._id_keys[i] == str(employee_id):
+            del self._id_keys[i]
+        _discard(self._department_members.get(doc.DepartmentID, []), employee_id)
+        _discard(self._position_members.get(doc.PositionID, []), employee_id)
+
+    def set_department(self, department_id: int, name: str) -> None:
+        with self._lock:
+            self._log(self._set_department, department_id, name)
+            self._set_department(department_id, name)
+
+    def _set_department(self, department_id: int, name: str) -> None:
+        self._departments[department_id] = (name, normalize_text(name))
+
+    def remove_department(self, department_id: int) -> None:
+        with self._lock:
+            self._log(self._departments.pop, department_id, None)
+            self._departments.pop(department_id, None)
+
+    def set_position(self, position_id: int, name: str) -> None:
+        with self._lock:
+            self._log(self._set_position, position_id, name)
+            self._set_position(position_id, name)
+
+    def _set_position(self, position_id: int, name: str) -> None:
+        self._positions[position_id] = (name, normalize_text(name))
+
+    def remove_position(self, position_id: int) -> None:
+        with self._lock:
+            self._log(self._positions.pop, position_id, None)
+            self._positions.pop(position_id, None)
+
+    def department_name(self, department_id: Optional[int]) -> Optional[str]:
+        item = self._departments.get(department_id)
+        return item[0] if item else None
+
+    def position_name(self, position_id: Optional[int]) -> Optional[str]:
+        item = self._positions.get(position_id)
+        return item[0] if item else None
+
+    def get(self, employee_id: int) -> Optional[EmployeeDoc]:
+        return self._docs.get(employee_id)
+
+    def _word_prefix_hits(self, key: str) -> List[int]:
+        """
+        Nhân viên có một từ trong tên bắt đầu bằng truy vấn, theo EmployeeID tăng dần.
+        """
+        if len(key.split()) == 1 and len(key) <= MAX_PREFIX_LENGTH:
+            return self._prefixes.get(key, [])
+        prefix_names, _ = self._match_names(key)
+        return list(heapq.merge(*(self._name_groups[name] for name in prefix_names)))
+
+    def _match_names(self, key: str) -> Tuple[List[str], List[str]]:
+        """
+        Các tên (đã chuẩn hóa) chứa truy vấn, chia thành tên có một từ bắt đầu
+        bằng truy vấn và tên chỉ chứa truy vấn ở giữa từ.
+        """
+        if len(key) < 3:
+            return [], []
+        name_sets = []
+        for gram in trigrams(key):
+            names = self._trigrams.get(gram)
+            if not names:
+                return [], []
+            name_sets.append(names)
+        name_sets.sort(key=len)
+        needle = f" {key}"
+        prefix_names, substring_names = [], []
+        # Trigram chỉ là điều kiện cần, luôn kiểm tra lại chuỗi con trên từng tên
+        for name in name_sets[0].intersection(*name_sets[1:]):
+            if needle in f" {name}":
+                prefix_names.append(name)
+            elif key in name:
+                substring_names.append(name)
+        return prefix_names, substring_names
+
+    def _groups_page(self, names: List[str], wanted: int) -> Tuple[List[int], int]:
+        groups = [self._name_groups[name] for name in names]
+        if len(groups) == 1:
+            return groups[0][:wanted], len(groups[0])
+        return list(islice(heapq.merge(*groups), wanted)), sum(map(len, groups))
+
+    def _label_page(
+        self, key: str, exclude_names: Set[str], wanted: int
+    ) -> Tuple[List[int], int, Callable[[EmployeeDoc], bool]]:
+        """
+        Nhân viên chỉ khớp tên phòng ban/chức vụ (tên không nằm trong exclude_names):
+        (trang đầu theo EmployeeID, tổng số, hàm kiểm tra một nhân viên có khớp không).
+        """
+        # Truy vấn quá ngắn khớp gần như mọi tên phòng ban/chức vụ, bỏ qua
+        if len(key) < 3:
+            return [], 0, lambda doc: False
+        departments = {
+            dept_id for dept_id, (_, name_key) in self._departments.items() if key in name_key
+        }
+        positions = {
+            pos_id for pos_id, (_, name_key) in self._positions.items() if key in name_key
+        }
+        if not departments and not positions:
+            return [], 0, lambda doc: False
+
+        def matches(pair) -> bool:
+            return pair[0] in departments or pair[1] in positions
+
+        total = sum(count for pair, count in self._pair_counts.items() if matches(pair))
+        # Trừ các nhân viên đã thuộc nhóm khớp theo tên
+        for name in exclude_names:
+            total -= sum(
+                count for pair, count in self._name_pairs[name].items() if matches(pair)
+            )
+
+        members = [self._department_members.get(dept_id, []) for dept_id in departments]
+        members += [self._position_members.get(pos_id, []) for pos_id in positions]
+        page: List[int] = []
+        last = None
+        for emp_id in heapq.merge(*members):
+            if emp_id == last:
+                continue
+            last = emp_id
+            if self._docs[emp_id].name_key not in exclude_names:
+                page.append(emp_id)
+                if len(page) >= wanted:
+                    break
+        return page, total, lambda doc: matches((doc.DepartmentID, doc.PositionID))
+
+    def search(self, query: str, limit: int, offset: int = 0) -> Tuple[List[int], int]:
+        """
+        Trả về (danh sách EmployeeID đã xếp hạng trong trang, tổng số kết quả).
+        Thứ tự: trùng mã nhân viên > một từ trong tên bắt đầu bằng truy vấn
+        > tên chứa truy vấn > chỉ khớp phòng ban/chức vụ; cùng nhóm thì theo EmployeeID.
+        """
+        key = normalize_text(query)
+        if not key:
+            return [], 0
+
+        wanted = offset + limit
+        with self._lock:
+            exact_doc = self._docs.get(int(key)) if key.isdigit() else None
+            exact = [exact_doc.EmployeeID] if exact_doc else []
+
+            prefix_names, substring_names = self._match_names(key)
+            if len(key.split()) == 1 and len(key) <= MAX_PREFIX_LENGTH:
+                prefix_ids = self._prefixes.get(key, [])
+                prefix_page, prefix_total = prefix_ids[: wanted + 1], len(prefix_ids)
+            else:
+                prefix_page, prefix_total = self._groups_page(prefix_names, wanted + 1)
+            substring_page, substring_total = self._groups_page(substring_names, wanted + 1)
+            name_matches = set(prefix_names).union(substring_names)
+            label_page, label_total, label_match = self._label_page(
+                key, name_matches, wanted + 1
+            )
+            # Mỗi nhóm chỉ cần lấy đủ số phần tử cho trang hiện tại
+            tiers = [exact, prefix_page, substring_page, label_page]
+            total = prefix_total + substring_total + label_total
+            if exact_doc and not (
+                f" {key}" in f" {exact_doc.name_key}"
+                or (len(key) >= 3 and key in exact_doc.name_key)
+                or label_match(exact_doc)
+            ):
+                total += 1
+
+        ordered: List[int] = []
+        seen: Set[int] = set()
+        for tier in tiers:
+            for emp_id in tier:
+                if emp_id not in seen:
+                    seen.add(emp_id)
+                    ordered.append(emp_id)
+            if len(ordered) >= wanted:
+                break
+
+        return ordered[offset:wanted], total
+
+
+    def suggest(self, query: str, limit: int = 10) -> List[EmployeeDoc]:
+        """
+        Gợi ý nhân viên khi gõ: mã nhân viên bắt đầu bằng truy vấn > tên bắt đầu
+        bằng truy vấn (theo thứ tự chữ cái) > một từ trong tên bắt đầu bằng truy vấn.
+        """
+        key = normalize_text(query)
+        if not key:
+            return []
+
+        ordered: List[int] = []
+        seen: Set[int] = set()
+
+        def take(emp_id: int) -> bool:
+            if emp_id not in seen:
+                seen.add(emp_id)
+                ordered.append(emp_id)
+            return len(ordered) >= limit
+
+        with self._lock:
+            if key.isdigit():
+                i = bisect_left(self._id_keys, key)
+                while i < len(self._id_keys) and self._id_keys[i].startswith(key):
+                    if take(int(self._id_keys[i])):
+                        return self._docs_of(ordered)
+                    i += 1
+
+            i = bisect_left(self._name_keys, (key,))
+            while i < len(self._name_keys) and self._name_keys[i][0].startswith(key):
+                if take(self._name_keys[i][1]):
+                    return self._docs_of(ordered)
+                i += 1
+
+            for emp_id in self._word_prefix_hits(key):
+                if take(emp_id):
+                    break
+
+            return self._docs_of(ordered)
+
+    def _docs_of(self, employee_ids: List[int]) -> List[EmployeeDoc]:
+        return [self._docs[emp_id] for emp_id in employee_ids]
+
+
+employee_search_index = EmployeeSearchIndex()
+
+
+def build_employee_search_index() -> None:
+    with HumanSessionLocal() as session:
+        employee_search_index.rebuild(session)
+
+
+async def run_employee_search_index_refresher() -> None:
+    """
+    Dựng chỉ mục khi khởi động rồi nạp lại định kỳ, để các worker khác nhau
+    cùng thấy thay đổi do worker khác ghi.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(build_employee_search_index)
+        except Exception as e:
+            print(f"Lỗi khi dựng chỉ mục tìm kiếm nhân viên: {str(e)}")
+        await asyncio.sleep(search_index_conf.EMPLOYEE_INDEX_REFRESH_SECONDS)
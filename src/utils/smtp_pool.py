@@ -0,0 +1,190 @@
+import smtplib
+from email.message import Message
+from queue import Empty, LifoQueue
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+from typing import Any, Dict
+
+
+def _connection_lost(error: Exception) -> bool:
+    """
+    Lỗi do kết nối (máy chủ ngắt, hết thời gian, 421) thì mở kết nối mới và gửi lại;
+    lỗi của riêng email (người nhận bị từ chối...) thì kết nối vẫn dùng tiếp được.
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+
+class _SMTP(smtplib.SMTP):
+    """
+    Ghi nhận đã bắt đầu lệnh DATA: từ đó máy chủ có thể đã nhận email dù kết
+    nối bị ngắt trước khi trả lời, nên không được tự gửi lại.
+    """
+
+    data_started = False
+
+    def data(self, msg):
+        self.data_started = True
+        return super().data(msg)
+
+
+class _PooledConnection:
+    __slots__ = ("smtp", "sent", "last_used")
+
+    def __init__(self, smtp: _SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Pool kết nối SMTP dùng lại cho nhiều email.
+
+    STARTTLS và đăng nhập chỉ làm một lần cho mỗi kết nối thay vì mỗi email.
+    Tối đa size kết nối cùng lúc (mỗi luồng gửi giữ một kết nối); kết nối đã
+    gửi max_messages email hoặc nhàn rỗi quá idle_timeout giây được đóng và mở
+    lại. Khi kết nối bị ngắt trước lệnh DATA (MAIL/RCPT, kết nối cũ đã bị máy
+    chủ đóng), email được gửi lại một lần trên kết nối mới; ngắt từ lệnh DATA
+    trở đi thì trả lỗi cho người gọi quyết định, vì email có thể đã được nhận.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        size: int = 5,
+        max_messages: int = 100,
+        idle_timeout: float = 60,
+        timeout: float = 30,
+        starttls: bool = True,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.starttls = starttls
+        self._slots = BoundedSemaphore(size)
+        self._idle: LifoQueue = LifoQueue()
+        self._lock = Lock()
+        self._connects = 0
+        self._reconnects = 0
+        self._recycled = 0
+        self._sent = 0
+        self._failed = 0
+
+    def _connect(self) -> _PooledConnection:
+        smtp = _SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        with self._lock:
+            self._connects += 1
+        return _PooledConnection(smtp)
+
+    def _close(self, conn: _PooledConnection) -> None:
+        try:
+            conn.smtp.quit()
+        except Exception:
+            conn.smtp.close()
+
+    def _checkout(self) -> _PooledConnection:
+        # LIFO: dùng kết nối vừa trả về, kết nối ít dùng nằm dưới và hết hạn dần
+        try:
+            conn = self._idle.get_nowait()
+        except Empty:
+            return self._connect()
+        if monotonic() - conn.last_used > self.idle_timeout:
+            self._close(conn)
+            with self._lock:
+                self._recycled += 1
+            return self._connect()
+        return conn
+
+    def _checkin(self, conn: _PooledConnection) -> None:
+        if conn.sent >= self.max_messages:
+            self._close(conn)
+            with self._lock:
+                self._recycled += 1
+            return
+        conn.last_used = monotonic()
+        self._idle.put(conn)
+
+    def _send_on(self, conn: _PooledConnection, message: Message) -> None:
+        conn.smtp.data_started = False
+        conn.smtp.send_message(message)
+        conn.sent += 1
+
+    def send(self, message: Message) -> None:
+        with self._slots:
+            conn = self._checkout()
+            try:
+                self._send_on(conn, message)
+            except Exception as e:
+                if not _connection_lost(e):
+                    self._checkin(conn)
+                    self._record_failure()
+                    raise
+                self._close(conn)
+                if conn.smtp.data_started:
+                    self._record_failure()
+                    raise
+                with self._lock:
+                    self._reconnects += 1
+                conn = None
+                try:
+                    conn = self._connect()
+                    self._send_on(conn, message)
+                except Exception as retry_error:
+                    self._record_failure()
+                    if conn is not None:
+                        if _connection_lost(retry_error):
+                            self._close(conn)
+                        else:
+                            self._checkin(conn)
+                    raise
+
+            self._checkin(conn)
+            with self._lock:
+                self._sent += 1
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._failed += 1
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                return
+            self._close(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "max_messages": self.max_messages,
+                "connects": self._connects,
+                "reconnects": self._reconnects,
+                "recycled": self._recycled,
+                "sent": self._sent,
+                "failed": self._failed,
+            }
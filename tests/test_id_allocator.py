@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.schemas.human import IdAllocation
+from src.utils.id_allocator import IdBlockAllocator
+
+EMPLOYEE = "Employee"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/ids.db")
+    # IdAllocations dùng GETDATE() của SQL Server làm giá trị mặc định
+    event.listen(
+        engine,
+        "connect",
+        lambda conn, _: conn.create_function("GETDATE", 0, lambda: datetime.now().isoformat(" ")),
+    )
+    IdAllocation.__table__.create(engine)
+    return engine
+
+
+def make_allocator(engine):
+    allocator = IdBlockAllocator(sessionmaker(engine), block_size=50)
+    allocator.register(EMPLOYEE, lambda: 10)
+    return allocator
+
+
+@pytest.fixture
+def allocator(engine):
+    return make_allocator(engine)
+
+
+def test_reserve_rejects_id_inside_leased_block(allocator):
+    assert allocator.next_id(EMPLOYEE) == 11
+
+    # Mã 15 nằm trong khối 11..60 worker này đang giữ
+    assert allocator.reserve(EMPLOYEE, [15]) == []
+    assert allocator.next_ids(EMPLOYEE, 5) == [12, 13, 14, 15, 16]
+
+
+def test_reserve_rejects_id_inside_block_of_another_worker(engine):
+    worker_a = make_allocator(engine)
+    worker_b = make_allocator(engine)
+
+    assert worker_a.next_id(EMPLOYEE) == 11
+
+    # Worker B không biết khối 11..60 của A, nhưng mốc chung đã là 60
+    assert worker_b.reserve(EMPLOYEE, [30, 100]) == [100]
+
+    ids = worker_a.next_ids(EMPLOYEE, 49) + worker_b.next_ids(EMPLOYEE, 50)
+    assert 30 in ids
+    assert 100 not in ids
+    assert len(set(ids)) == len(ids)
+
+
+def test_reserve_before_first_lease_uses_seed(allocator):
+    assert allocator.reserve(EMPLOYEE, [5, 13, 20]) == [13, 20]
+
+    assert allocator.next_id(EMPLOYEE) == 21
+
+
+def test_mixed_explicit_and_auto_ids_in_one_batch(allocator):
+    allocator.next_id(EMPLOYEE)
+    explicit_ids = [70, 80, 90]
+
+    assert allocator.reserve(EMPLOYEE, explicit_ids) == explicit_ids
+    auto_ids = allocator.next_ids(EMPLOYEE, 60)
+
+    assert len(set(auto_ids)) == 60
+    assert not set(auto_ids) & set(explicit_ids)